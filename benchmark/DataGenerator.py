@@ -0,0 +1,94 @@
+import csv
+import random
+from datetime import date, timedelta
+from string import ascii_lowercase
+
+# 벤치마크 스키마. ORDERS가 CUSTOMER, PRODUCT를 외래키로 참조한다.
+# scale은 ORDERS의 레코드 수이고, CUSTOMER는 scale / 10, PRODUCT는 scale / 100개를 만든다.
+SCHEMA = [
+    "create table customer (id int, name char(20) not null, city char(12), joined date, primary key (id));",
+    "create table product (id int, title char(30) not null, price int, primary key (id));",
+    "create table orders (id int, customer_id int not null, product_id int not null, quantity int, "
+    "status char(10), ordered date, note char(40), "
+    "primary key (id), foreign key (customer_id) references customer (id), foreign key (product_id) references product (id));",
+    "create index orders_ordered on orders (ordered);",
+]
+TABLES = ("CUSTOMER", "PRODUCT", "ORDERS")
+
+DEFAULT_SEED = 42
+
+DATE_START = date(2020, 1, 1)
+DATE_RANGE_DAYS = 5 * 365
+
+CITIES = [f"city{i:02d}" for i in range(50)]
+STATUSES = ("PENDING", "PAID", "SHIPPED", "DELIVERED", "CANCELLED")
+STATUS_WEIGHTS = (5, 10, 15, 65, 5)
+NOTE_WORDS = ("gift", "fragile", "express", "leave at door", "call first", "no invoice", "weekend", "office")
+# ORDERS.NOTE가 NULL인 비율
+NOTE_NULL_RATIO = 0.3
+
+
+class DataGenerator:
+    """
+    seeded synthetic rows of benchmark schema.
+    same scale and seed always generate same rows, and each table has its own random sequence
+    so rows of a table do not depend on which tables were generated before.
+    """
+    def __init__(self, scale, seed = DEFAULT_SEED):
+        self.scale = scale
+        self.seed = seed
+        self.row_counts = {
+            "CUSTOMER": max(1, scale // 10),
+            "PRODUCT": max(1, scale // 100),
+            "ORDERS": scale,
+        }
+
+    def random(self, name) -> random.Random:
+        """random sequence of name, determined by seed"""
+        return random.Random(f"{self.seed}:{name}")
+
+    def rows(self, table):
+        """generate rows of table in primary key order"""
+        rng = self.random(table)
+        row = {"CUSTOMER": self.customer, "PRODUCT": self.product, "ORDERS": self.order}[table]
+        for id in range(self.row_counts[table]):
+            yield row(id, rng)
+
+    def write_csv(self, table, path) -> int:
+        """write rows of table to csv file read by LOAD DATA. returns number of rows"""
+        count = 0
+        with open(path, "w", newline="") as file:
+            writer = csv.writer(file)
+            for row in self.rows(table):
+                writer.writerow("" if value is None else value for value in row)
+                count += 1
+        return count
+
+    def customer(self, id, rng):
+        return [id, self._word(rng, 20), rng.choice(CITIES), self.random_date(rng)]
+
+    def product(self, id, rng):
+        return [id, self._word(rng, 30), rng.randint(100, 100000)]
+
+    def order(self, id, rng):
+        """row of ORDERS. id may be beyond scale for rows inserted by benchmark"""
+        note = None
+        if rng.random() >= NOTE_NULL_RATIO:
+            note = " ".join(rng.choices(NOTE_WORDS, k=rng.randint(1, 3)))[:40]
+        return [
+            id,
+            rng.randrange(self.row_counts["CUSTOMER"]),
+            rng.randrange(self.row_counts["PRODUCT"]),
+            rng.randint(1, 20),
+            rng.choices(STATUSES, STATUS_WEIGHTS)[0],
+            self.random_date(rng),
+            note,
+        ]
+
+    @staticmethod
+    def random_date(rng) -> date:
+        return DATE_START + timedelta(days=rng.randrange(DATE_RANGE_DAYS))
+
+    @staticmethod
+    def _word(rng, max_length):
+        return "".join(rng.choices(ascii_lowercase, k=rng.randint(4, max_length)))
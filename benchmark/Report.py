@@ -0,0 +1,118 @@
+import json
+import math
+import resource
+import sys
+
+# 결과 파일의 형식 버전. 다르면 기준 결과와 비교하지 않는다.
+RESULT_VERSION = 1
+
+# 비교하는 지표 -> 값이 클수록 좋으면 True
+METRICS = {
+    "throughput": True,
+    "rows_per_second": True,
+    "p50_ms": False,
+    "p99_ms": False,
+    "peak_rss_mb": False,
+}
+
+DEFAULT_THRESHOLD = 0.10
+
+
+def reset_peak_rss():
+    """reset peak RSS of this process so that next peak_rss_mb() is peak of one workload (linux only)"""
+    try:
+        with open("/proc/self/clear_refs", "w") as file:
+            file.write("5")
+    except OSError:
+        pass
+
+
+def peak_rss_mb() -> float:
+    """peak resident set size since reset_peak_rss, or since process start if it cannot be reset"""
+    try:
+        with open("/proc/self/status") as file:
+            for line in file:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+
+    # ru_maxrss는 linux에서 KB, macOS에서 byte 단위다.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / 1024
+
+
+def percentile(values, q) -> float:
+    """nearest-rank percentile of sorted values"""
+    if not values:
+        return 0.0
+    return values[max(0, math.ceil(q / 100 * len(values)) - 1)]
+
+
+def summarize(measurement, peak_rss) -> dict:
+    latencies = sorted(measurement.latencies)
+    seconds = sum(latencies)
+    return {
+        "operations": len(latencies),
+        "rows": measurement.rows,
+        "seconds": round(seconds, 6),
+        "throughput": round(len(latencies) / seconds, 3) if seconds else 0.0,
+        "rows_per_second": round(measurement.rows / seconds, 3) if seconds else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 4),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 4),
+        "peak_rss_mb": round(peak_rss, 1),
+    }
+
+
+def load(path) -> dict:
+    with open(path, "r") as file:
+        return json.load(file)
+
+
+def save(result, path):
+    with open(path, "w") as file:
+        json.dump(result, file, indent=2)
+        file.write("\n")
+
+
+def compare(result, baseline, threshold = DEFAULT_THRESHOLD) -> list[tuple]:
+    """
+    (workload, metric, baseline value, current value, relative change) of metrics
+    worse than baseline by more than threshold. only workloads in both results are compared.
+    """
+    if baseline.get("version") != RESULT_VERSION:
+        raise ValueError(f"baseline has result version {baseline.get('version')}, expected {RESULT_VERSION}")
+
+    regressions = []
+    for name, current in result["workloads"].items():
+        before = baseline["workloads"].get(name)
+        if before is None:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            old, new = before.get(metric), current.get(metric)
+            # rows가 없는 작업의 rows_per_second 등, 값이 0인 지표는 비교하지 않는다.
+            if not old or not new:
+                continue
+            change = (new - old) / old
+            if (-change if higher_is_better else change) > threshold:
+                regressions.append((name, metric, old, new, change))
+    return regressions
+
+
+def format_table(result) -> str:
+    lines = [f"{'workload':<14} {'ops':>8} {'rows':>10} {'ops/s':>10} {'rows/s':>12} {'p50 ms':>10} {'p99 ms':>10} {'rss MB':>8}"]
+    for name, summary in result["workloads"].items():
+        lines.append(
+            f"{name:<14} {summary['operations']:>8} {summary['rows']:>10} {summary['throughput']:>10.1f} "
+            f"{summary['rows_per_second']:>12.1f} {summary['p50_ms']:>10.3f} {summary['p99_ms']:>10.3f} {summary['peak_rss_mb']:>8.1f}"
+        )
+    return "\n".join(lines)
+
+
+def format_regressions(regressions, threshold) -> str:
+    if not regressions:
+        return f"no regression beyond {threshold:.0%}"
+    lines = [f"{len(regressions)} regression(s) beyond {threshold:.0%}:"]
+    for name, metric, old, new, change in regressions:
+        lines.append(f"  {name:<14} {metric:<16} {old:>12.3f} -> {new:>12.3f} ({change:+.1%})")
+    return "\n".join(lines)
@@ -0,0 +1,195 @@
+import io
+import os
+import re
+from contextlib import redirect_stdout
+from dataclasses import dataclass, field
+from datetime import timedelta
+from pathlib import Path
+from time import perf_counter
+from lark import Lark
+from berkeleydb import db
+from src import DatabaseHandler, Engine, MyTransformer, ResultWriter
+from benchmark.DataGenerator import DataGenerator, SCHEMA, TABLES, CITIES, DATE_START, DATE_RANGE_DAYS
+
+# 벤치마크에서 측정하는 작업들. 각 작업은 (Bench, queries)를 받아 문장마다 걸린 시간을 잰 Measurement를 돌려준다.
+# queries는 짧은 문장(INSERT, 점 조회, 범위 조회)의 실행 횟수이고, 무거운 문장은 그보다 적게 실행한다.
+
+GRAMMAR_PATH = Path(__file__).resolve().parent.parent / "grammar.lark"
+
+# 범위 조회, 조인에서 읽는 ORDERED 구간의 일 수
+RANGE_DAYS = 7
+JOIN_DAYS = 30
+# ORDER BY로 ORDERS 전체를 정렬하는 횟수, 데이터베이스를 다시 여는 횟수
+ORDER_BY_REPEATS = 3
+STARTUP_REPEATS = 5
+
+_ROW_MESSAGE = re.compile(r"(\d+) rows? (?:inserted|deleted|updated)$", re.MULTILINE)
+
+
+@dataclass
+class Measurement:
+    latencies: list = field(default_factory=list)   # 문장마다 걸린 시간(초)
+    rows: int = 0                                   # 읽거나 쓴 레코드 수
+
+
+class CountingWriter(ResultWriter.ResultWriter):
+    """consumes SELECT result without formatting it, keeping number of records"""
+    def __init__(self):
+        super().__init__(None)
+        self.row_count = None
+
+    def write(self, headers, records) -> int:
+        count = 0
+        for _ in records:
+            count += 1
+        self.row_count = count
+        return count
+
+
+class Bench:
+    """benchmark database in env_path and engine executing statements on it in this process"""
+    def __init__(self, env_path, generator: DataGenerator, settings = None):
+        self.env_path = env_path
+        self.generator = generator
+        self.settings = settings or {}
+        with open(GRAMMAR_PATH, "r") as file:
+            self.grammar = file.read()
+        self.open()
+
+    def open(self):
+        """open database and build parser and engine as run.py does"""
+        env = db.DBEnv()
+        env.set_lk_max_locks(100000)
+        env.set_lk_max_objects(100000)
+        env.open(self.env_path, db.DB_CREATE | db.DB_INIT_MPOOL | db.DB_INIT_TXN | db.DB_INIT_LOG | db.DB_INIT_LOCK | db.DB_RECOVER)
+        self.db_handler = DatabaseHandler.DatabaseHandler(env, self.env_path)
+
+        parser = Lark(self.grammar, start="command", lexer="basic")
+        self.transformer = MyTransformer.MyTransformer("BENCH", self.db_handler)
+        self.engine = Engine.Engine(parser, self.transformer)
+
+        self.writer = CountingWriter()
+        self.transformer.use_session(self.transformer.settings, self.writer)
+        for name, value in self.settings.items():
+            self.transformer.settings.set(name, value)
+
+    def close(self):
+        self.db_handler.close()
+
+    def run(self, sql, params = None) -> int:
+        """execute one statement. returns number of records selected, inserted or deleted"""
+        self.writer.row_count = None
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.engine.execute(sql, params)
+        if self.writer.row_count is not None:
+            return self.writer.row_count
+        return sum(int(count) for count in _ROW_MESSAGE.findall(output.getvalue()))
+
+    def time(self, statements) -> Measurement:
+        """run (sql, params) pairs, timing each statement"""
+        measurement = Measurement()
+        for sql, params in statements:
+            start = perf_counter()
+            measurement.rows += self.run(sql, params)
+            measurement.latencies.append(perf_counter() - start)
+        return measurement
+
+
+def create_schema(bench):
+    for statement in SCHEMA:
+        bench.run(statement)
+
+
+def bulk_load(bench, queries):
+    """LOAD DATA of every table from csv files of generator. writing csv files is not measured"""
+    paths = []
+    for table in TABLES:
+        path = os.path.join(bench.env_path, f"{table.lower()}.csv")
+        bench.generator.write_csv(table, path)
+        paths.append((table, path))
+
+    measurement = bench.time((f"load data '{path}' into table {table.lower()};", None) for table, path in paths)
+    for _, path in paths:
+        os.remove(path)
+    return measurement
+
+
+def insert(bench, queries):
+    """single row INSERTs with parameters, new orders after generated ones"""
+    rng = bench.generator.random("insert")
+    start = bench.generator.row_counts["ORDERS"]
+    return bench.time(
+        ("insert into orders values (?, ?, ?, ?, ?, ?, ?);", bench.generator.order(start + i, rng))
+        for i in range(queries)
+    )
+
+
+def point_select(bench, queries):
+    """primary key lookups"""
+    rng = bench.generator.random("point_select")
+    count = bench.generator.row_counts["ORDERS"]
+    return bench.time(("select * from orders where id = ?;", [rng.randrange(count)]) for _ in range(queries))
+
+
+def range_select(bench, queries):
+    """RANGE_DAYS days of orders by index on ORDERED"""
+    rng = bench.generator.random("range_select")
+    statements = []
+    for _ in range(queries):
+        start = DataGenerator.random_date(rng)
+        statements.append(("select id, quantity, status from orders where ordered >= ? and ordered < ?;",
+                           [start, start + timedelta(days=RANGE_DAYS)]))
+    return bench.time(statements)
+
+
+def join(bench, queries):
+    """three table join of orders of one city in JOIN_DAYS days"""
+    rng = bench.generator.random("join")
+    statements = []
+    for _ in range(max(1, queries // 10)):
+        start = DataGenerator.random_date(rng)
+        statements.append((
+            "select customer.name, product.title, orders.quantity from orders, customer, product "
+            "where orders.customer_id = customer.id and orders.product_id = product.id "
+            "and customer.city = ? and orders.ordered >= ? and orders.ordered < ?;",
+            [rng.choice(CITIES), start, start + timedelta(days=JOIN_DAYS)],
+        ))
+    return bench.time(statements)
+
+
+def order_by(bench, queries):
+    """whole ORDERS sorted by non-indexed column"""
+    return bench.time(("select id, customer_id, quantity from orders order by quantity desc;", None)
+                      for _ in range(ORDER_BY_REPEATS))
+
+
+def delete(bench, queries):
+    """DELETE with WHERE of orders of one day, removing about a tenth of orders in total"""
+    rng = bench.generator.random("delete")
+    days = rng.sample(range(DATE_RANGE_DAYS), max(1, min(queries // 10, DATE_RANGE_DAYS // 10)))
+    return bench.time(("delete from orders where ordered = ?;", [DATE_START + timedelta(days=day)]) for day in days)
+
+
+def cold_startup(bench, queries):
+    """close and reopen database: recovery, restoring table metadata and building parser"""
+    measurement = Measurement()
+    for _ in range(STARTUP_REPEATS):
+        bench.close()
+        start = perf_counter()
+        bench.open()
+        measurement.latencies.append(perf_counter() - start)
+    return measurement
+
+
+# 이름 -> 작업. 이 순서로 실행한다. bulk_load는 다른 작업이 사용할 데이터를 만드므로 항상 실행한다.
+WORKLOADS = {
+    "bulk_load": bulk_load,
+    "insert": insert,
+    "point_select": point_select,
+    "range_select": range_select,
+    "join": join,
+    "order_by": order_by,
+    "delete": delete,
+    "cold_startup": cold_startup,
+}
@@ -0,0 +1,132 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+from benchmark import Report, Workloads
+from benchmark.DataGenerator import DataGenerator, DEFAULT_SEED
+
+# 데이터베이스 엔진 벤치마크. 저장소 최상위 디렉토리에서 실행한다.
+#
+#   python -m benchmark --scale 100k --output result.json
+#   python -m benchmark --scale 100k --baseline result.json     (기준 결과보다 나빠진 지표가 있으면 exit status 1)
+#
+# 임시 디렉토리에 새 데이터베이스 환경을 만들고, 생성한 데이터를 LOAD DATA로 넣은 뒤 Workloads.WORKLOADS를 순서대로 실행한다.
+# 각 작업의 처리량, 지연 시간 p50 / p99, 최대 RSS를 json으로 기록한다.
+
+DEFAULT_SCALE = 10000
+DEFAULT_QUERIES = 1000
+
+_SCALE_SUFFIXES = {"K": 1000, "M": 1000000}
+
+
+def _scale(value):
+    value = value.strip().upper()
+    multiplier = _SCALE_SUFFIXES.get(value[-1:], 1)
+    if multiplier != 1:
+        value = value[:-1]
+    scale = int(float(value) * multiplier)
+    if scale <= 0:
+        raise argparse.ArgumentTypeError("scale must be positive")
+    return scale
+
+
+def _setting(value):
+    name, separator, setting = value.partition("=")
+    if not separator:
+        raise argparse.ArgumentTypeError("expected NAME=VALUE")
+    if setting.lstrip("-").isdigit():
+        setting = int(setting)
+    return name.strip().upper(), setting
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmark", description="benchmark of sql engine on synthetic data")
+    parser.add_argument("--scale", type=_scale, default=DEFAULT_SCALE, help="rows of ORDERS, e.g. 10k, 1m, 10m (default 10k)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--queries", type=int, default=DEFAULT_QUERIES, help="statements of each short workload")
+    parser.add_argument("--workloads", help=f"comma separated subset of {', '.join(Workloads.WORKLOADS)}")
+    parser.add_argument("--set", type=_setting, action="append", default=[], metavar="NAME=VALUE",
+                        help="session variable, as SET NAME = VALUE")
+    parser.add_argument("--output", help="write result json to file instead of stdout")
+    parser.add_argument("--baseline", help="compare with result json of earlier run")
+    parser.add_argument("--threshold", type=float, default=Report.DEFAULT_THRESHOLD,
+                        help="relative change reported as regression (default 0.10)")
+    parser.add_argument("--dir", help="directory for database, kept after run (default temporary directory)")
+    args = parser.parse_args()
+
+    names = list(Workloads.WORKLOADS)
+    if args.workloads:
+        selected = {name.strip() for name in args.workloads.split(",")}
+        unknown = selected - set(names)
+        if unknown:
+            parser.error(f"unknown workloads: {', '.join(sorted(unknown))}")
+        names = [name for name in names if name == "bulk_load" or name in selected]
+
+    baseline = Report.load(args.baseline) if args.baseline else None
+    settings = dict(args.set)
+    generator = DataGenerator(args.scale, args.seed)
+
+    env_path = args.dir or tempfile.mkdtemp(prefix="benchmark")
+    os.makedirs(env_path, exist_ok=True)
+    workloads = {}
+    try:
+        bench = Workloads.Bench(env_path, generator, settings)
+        try:
+            Workloads.create_schema(bench)
+            for name in names:
+                print(f"{name} ...", file=sys.stderr)
+                Report.reset_peak_rss()
+                measurement = Workloads.WORKLOADS[name](bench, args.queries)
+                workloads[name] = Report.summarize(measurement, Report.peak_rss_mb())
+        finally:
+            bench.close()
+    finally:
+        if args.dir is None:
+            shutil.rmtree(env_path, ignore_errors=True)
+
+    result = {
+        "version": Report.RESULT_VERSION,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "scale": args.scale,
+        "seed": args.seed,
+        "queries": args.queries,
+        "row_counts": generator.row_counts,
+        "settings": settings,
+        "workloads": workloads,
+    }
+
+    print(Report.format_table(result), file=sys.stderr)
+    if args.output:
+        Report.save(result, args.output)
+    else:
+        print(json.dumps(result, indent=2))
+
+    if baseline is not None:
+        if (baseline.get("scale"), baseline.get("queries")) != (args.scale, args.queries):
+            print(f"warning: baseline ran with scale {baseline.get('scale')} and queries {baseline.get('queries')}",
+                  file=sys.stderr)
+        regressions = Report.compare(result, baseline, args.threshold)
+        print(Report.format_regressions(regressions, args.threshold), file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
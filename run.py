@@ -1,7 +1,14 @@
 import os
+import sys
+import argparse
+from collections import defaultdict
+from time import perf_counter
 from lark import Lark, UnexpectedInput, Transformer
 import src.MyTransformer as MyTransformer
 import src.DatabaseHandler as DatabaseHandler
+import src.Engine as Engine
+import src.ScriptReader as ScriptReader
+import src.Server as Server
 from berkeleydb import db
 
 
@@ -10,55 +17,145 @@ id = "2023-11225"
 env_path="DB"
 db_file="my_database.db"
 
-if not os.path.exists(env_path):
-    os.makedirs(env_path)
 
-# 데이터베이스를 열고 이를 DatabaseHandler 객체에 넘겨준다.
-database_env = db.DBEnv()
-database_env.open(env_path, db.DB_CREATE | db.DB_INIT_MPOOL)
-db_handler = DatabaseHandler.DatabaseHandler(database_env)
+def open_database():
+    """
+    open database environment and build parser and engine. returns (db_handler, engine).
+    not done at import time, because worker processes of ParallelScanner import this module again (spawn).
+    """
+    if not os.path.exists(env_path):
+        os.makedirs(env_path)
+
+    # 데이터베이스를 열고 이를 DatabaseHandler 객체에 넘겨준다.
+    # 트랜잭션, 로그, 락을 사용하고, 시작할 때 로그로 복구한다.
+    database_env = db.DBEnv()
+    database_env.set_lk_max_locks(100000)
+    database_env.set_lk_max_objects(100000)
+    database_env.open(env_path, db.DB_CREATE | db.DB_INIT_MPOOL | db.DB_INIT_TXN | db.DB_INIT_LOG | db.DB_INIT_LOCK | db.DB_RECOVER | db.DB_THREAD)
+    db_handler = DatabaseHandler.DatabaseHandler(database_env)
 
-with open('grammar.lark', 'r') as file:
-    sql_grammar = file.read()
+    with open('grammar.lark', 'r') as file:
+        sql_grammar = file.read()
 
+    # sql 문법을 파싱할 파서 생성. 
+    sql_parser = Lark(sql_grammar, start='command',  lexer='basic')
 
-# sql 문법을 파싱할 파서 생성. 
-sql_parser = Lark(sql_grammar, start='command',  lexer='basic')
+    # 파싱된 sql 명령을 입력받아 명령을 수행하는 객체. 위에서 만든 데이터베이스 핸들러 객체를 입력으로 받는다.
+    myTransformer = MyTransformer.MyTransformer(id, db_handler)
+
+    # 파싱, 실행을 담당하는 객체. 자주 실행되는 문장의 파싱 트리와 이름 해석 결과를 캐시한다.
+    engine = Engine.Engine(sql_parser, myTransformer)
+    return db_handler, engine
 
-# 파싱된 sql 명령을 입력받아 명령을 수행하는 객체. 위에서 만든 데이터베이스 핸들러 객체를 입력으로 받는다.
-myTransformer = MyTransformer.MyTransformer(id, db_handler)
 
 def prompt():
     """
     This function receives user input, splits the command based on semicolons, and returns.
+    Input continues to next line while a line does not end with semicolon or a string literal is not closed.
     """
     
-    prompt_input = ""
+    splitter = ScriptReader.StatementSplitter()
+    query_list = []
     while True:
         t_input = input(f"DB_{id}> ")
-        prompt_input += t_input + " "
+        query_list += splitter.feed(t_input + " ")
         if len(t_input) == 0:
             pass
-        elif t_input[-1] == ";":
+        elif t_input[-1] == ";" and splitter.complete():
             break
     
-    query_list = []
-    s = 0
-    for i, j in enumerate(prompt_input):
-        if j == ";":
-            query_list.append(prompt_input[s:i+1].strip())
-            s = i + 1
     return query_list
 
 
+def run_script(db_handler, engine, file, stop_on_error):
+    """
+    batch mode. executes statements of file without prompt and prints timing summary to stderr.
+    returns exit status, 1 if any statement failed.
+    """
+    # 문장마다 출력을 flush하지 않고 버퍼가 찰 때 한 번에 쓴다.
+    sys.stdout.reconfigure(line_buffering=False)
+
+    # 문장 종류(첫 단어) -> [실행 횟수, 실행 시간]
+    timings = defaultdict(lambda: [0, 0.0])
+    failed = 0
+    start = perf_counter()
+    try:
+        for number, command in enumerate(ScriptReader.read_statements(file), 1):
+            kind = command.split(None, 1)[0].rstrip(";").upper() or ";"
+            statement_start = perf_counter()
+            try:
+                engine.execute(command)
+            except UnexpectedInput:
+                print(f"DB_{id}> Syntax error")
+                failed += 1
+            except Exception as e:
+                print(f'DB_{id}> {e}')
+                failed += 1
+            finally:
+                timing = timings[kind]
+                timing[0] += 1
+                timing[1] += perf_counter() - statement_start
+
+            if failed and stop_on_error:
+                sys.stdout.flush()
+                print(f"stopped at statement {number}", file=sys.stderr)
+                break
+        db_handler.close()
+
+    # EXIT 문도 요약을 출력한 뒤 종료한다.
+    finally:
+        sys.stdout.flush()
+        total = perf_counter() - start
+        count = sum(timing[0] for timing in timings.values())
+        print(f"{count} statements, {failed} failed, {total:.3f} s", file=sys.stderr)
+        for kind, (kind_count, elapsed) in sorted(timings.items(), key=lambda item: -item[1][1]):
+            print(f"  {kind:<10} {kind_count:>8} {elapsed:>10.3f} s", file=sys.stderr)
+
+    return 1 if failed else 0
+
+
 def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-f", "--file", help="execute sql script file and exit")
+    parser.add_argument("-i", "--interactive", action="store_true", help="show prompt even if stdin is not a terminal")
+    parser.add_argument("--stop-on-error", action="store_true", help="stop script at first failed statement")
+    parser.add_argument("--serve", action="store_true", help="serve clients over network (src/Server.py)")
+    parser.add_argument("--host", default=Server.DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=Server.DEFAULT_PORT)
+    parser.add_argument("--socket", help="serve on unix socket path instead of tcp")
+    # COMMIT 시 트랜잭션 로그를 디스크에 기록하는 방식 (DatabaseHandler.set_durability)
+    #   "sync"          : COMMIT마다 디스크에 기록
+    #   "write_no_sync" : COMMIT마다 OS에 넘기고, 디스크 기록은 OS가 정함
+    #   "group"         : COMMIT들을 모아 --group-commit-interval초마다 한 번 기록. 뒤따르는 COMMIT이 없으면 타이머가 기록한다.
+    #                     비정상 종료되면 마지막 interval 동안의 COMMIT들이 사라질 수 있다.
+    parser.add_argument("--durability", choices=DatabaseHandler.DURABILITY_MODES, default="sync",
+                        help="how commits write transaction log: sync flushes on every commit, write_no_sync leaves "
+                             "flushing to OS, group flushes commits together every --group-commit-interval seconds "
+                             "and may lose commits of last interval on crash (default sync)")
+    parser.add_argument("--group-commit-interval", type=float, default=0.01, metavar="SECONDS",
+                        help="seconds between log flushes in group durability (default 0.01)")
+    args = parser.parse_args()
+
+    db_handler, engine = open_database()
+    db_handler.set_durability(args.durability, args.group_commit_interval)
+
+    if args.serve:
+        Server.serve(engine, args.host, args.port, args.socket)
+        return
+
+    # 파일이 주어지거나 입력이 터미널이 아니면(run.py < script.sql) batch mode로 실행한다.
+    if args.file is not None:
+        with open(args.file, "r") as file:
+            sys.exit(run_script(db_handler, engine, file, args.stop_on_error))
+    if not args.interactive and not sys.stdin.isatty():
+        sys.exit(run_script(db_handler, engine, sys.stdin, args.stop_on_error))
+
     while True: 
         query = prompt()
         
         try:
             for command in query:
-                output = sql_parser.parse(command)
-                myTransformer.transform(output)
+                engine.execute(command)
         
         # sql 문법에 오류가 있는 경우 Syntax error 메세지를 띄운다.
         except UnexpectedInput:
@@ -66,7 +163,7 @@ def main():
         
         # 명령어의 내용에 오류가 있는 경우 그에 따른 에러 메세지를 띄운다.
         except Exception as e:
-            print(f'DB_{id}> {e.orig_exc}')
+            print(f'DB_{id}> {e}')
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,81 @@
+import json
+import socket
+from dataclasses import dataclass, field
+from src import Exceptions
+from src.Server import DEFAULT_HOST, DEFAULT_PORT
+
+
+@dataclass
+class Result:
+    columns: list = None                          # SELECT가 아니면 None
+    rows: list = field(default_factory=list)      # DATE는 'YYYY-MM-DD' 문자열, NULL은 None
+    messages: list = field(default_factory=list)
+    row_count: int = None
+
+
+class Client:
+    """
+    blocking client of run.py --serve (src/Server.py protocol).
+
+        with Client() as client:
+            client.execute("insert into t values (?, ?);", [1, "a"])
+            result = client.execute("select * from t;")
+
+    failed statement raises Exceptions.ServerError with the message of the server.
+    """
+    def __init__(self, host = DEFAULT_HOST, port = DEFAULT_PORT, path = None):
+        if path is not None:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.connect(path)
+        else:
+            self.sock = socket.create_connection((host, port))
+        self.file = self.sock.makefile("rwb")
+
+    def execute(self, sql, params = None) -> Result:
+        """run one statement. rows of SELECT are collected in Result"""
+        result = Result()
+        for frame in self.stream(sql, params):
+            if "columns" in frame:
+                result.columns = frame["columns"]
+            else:
+                result.rows.extend(frame["rows"])
+        result.messages = self.last["messages"]
+        result.row_count = self.last.get("row_count")
+        return result
+
+    def stream(self, sql, params = None):
+        """
+        run one statement and yield {"columns": ...} and {"rows": ...} frames as they arrive.
+        final frame is kept in self.last.
+        """
+        request = {"sql": sql}
+        if params is not None:
+            request["params"] = list(params)
+        self.file.write(json.dumps(request).encode() + b"\n")
+        self.file.flush()
+
+        while True:
+            line = self.file.readline()
+            if not line:
+                raise ConnectionError("connection closed by server")
+            frame = json.loads(line)
+            if "ok" in frame:
+                self.last = frame
+                if not frame["ok"]:
+                    raise Exceptions.ServerError(frame["error"])
+                return
+            yield frame
+
+    def close(self):
+        # 서버가 먼저 연결을 끊었으면 보내지 못한 요청은 버린다.
+        try:
+            self.file.close()
+        except OSError:
+            pass
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,6 +1,20 @@
 import json
-from datetime import date, datetime
+import threading
+import uuid
+from contextlib import contextmanager
+from time import perf_counter
 from berkeleydb import db
+from src import KeyCodec, RecordCodec, Statistics
+from src.TableSchema import TableSchema
+
+# table_insert_many에서 인덱스 항목을 모아 정렬해 넣는 단위
+INSERT_BATCH_SIZE = 10000
+
+# COMMIT 시 트랜잭션 로그를 디스크에 기록하는 방식
+DURABILITY_MODES = ("sync", "write_no_sync", "group")
+
+# 외래키 컬럼마다 만드는 인덱스 이름. 사용자가 만드는 인덱스 이름에는 숫자가 들어갈 수 없으므로 겹치지 않는다.
+FOREIGN_KEY_INDEX_NAME = "{table_name}_FK{number}"
 
 class DatabaseHandler():
     def __init__(self, database, env_path="DB", db_file="my_database.db"):
@@ -8,10 +22,25 @@ class DatabaseHandler():
         self.env_path = env_path # 데이터베이스 파일 경로
         
         self.env = database        
+        
+        # BEGIN으로 시작한 트랜잭션, 현재 문장이 사용하는 트랜잭션.
+        # 모든 읽기/쓰기는 current_txn으로 수행한다. None이면 연산마다 auto commit.
+        self.txn = None
+        self.current_txn = None
+        self.durability = "sync"
+        self.group_commit_interval = 0.01
+        self._last_flush = 0.0   # group 방식에서 마지막으로 로그를 디스크에 기록한 시각
+        self._flush_timer = None # group 방식에서 기록되지 않은 COMMIT을 interval 뒤에 기록할 타이머
+        self._flush_lock = threading.Lock()
+        
         self.meta_db = db.DB(self.env)   # 메타데이터가 저장되는 테이블
-        self.meta_db.open(db_file, "metadata", db.DB_HASH, db.DB_CREATE)
+        self.meta_db.open(db_file, "metadata", db.DB_HASH, db.DB_CREATE | db.DB_AUTO_COMMIT)
 
         self.tables = {}
+        self.indexes = {}   # index name -> B-tree DB
+        self.schemas = {}   # table name -> TableSchema. metadata_put / metadata_delete로만 바뀐다.
+        self.schema_version = 0   # 메타데이터가 바뀔 때마다 증가. 이름 해석을 캐시한 문장은 버전이 다르면 다시 해석한다.
+        self.bytes_read = 0       # 테이블 레코드와 인덱스 항목을 읽은 바이트 수 (Profiler)
         self.__restore_tables()
     
     
@@ -20,17 +49,53 @@ class DatabaseHandler():
         # metadata 테이블을 순회해 데이터베이스에 저장되어 있는 테이블들을 모두 open 상태로 만듦
         cursor = self.meta_db.cursor()
         
+        legacy_tables = []
         while record := cursor.next():
-            key, _ = record
+            key, val = record
             table_name = key.decode()
             self.open_table(table_name)
+            
+            meta = TableSchema(table_name, json.loads(val.decode()))
+            self.schemas[table_name] = meta
+            for index_name in meta.indexes:
+                self.open_index(table_name, index_name)
+            if meta.get("record_format") != RecordCodec.FORMAT_VERSION:
+                legacy_tables.append(table_name)
 
         cursor.close()
+        
+        for table_name in legacy_tables:
+            self.migrate_table(table_name)
+        
+        # 이전 버전에서 만든 테이블에는 외래키 인덱스가 없다.
+        for table_name in list(self.schemas):
+            self.create_foreign_key_indexes(table_name)
+    
+    def migrate_table(self, table_name):
+        """rewrite records stored in JSON by earlier version into binary record format"""
+        codec = self.get_codec(table_name)
+        
+        with self.transaction():
+            cursor = self.tables[table_name].cursor(self.current_txn)
+            while x := cursor.next():
+                key, val = x
+                if val[0] != RecordCodec.FORMAT_MARK:
+                    cursor.put(key, codec.encode(codec.decode_json(val)), db.DB_CURRENT)
+            cursor.close()
+        
+        meta = self.get_table_metadata(table_name).to_metadata()
+        meta["record_format"] = RecordCodec.FORMAT_VERSION
+        self.metadata_put(table_name, meta)
 
-    # 프로그램 종료 시 테이블들 안전하게 close
+    # 프로그램 종료 시 테이블들 안전하게 close. 끝나지 않은 트랜잭션은 취소된다.
     def close(self):
+        self.rollback()
+        self.set_durability("sync")
+        
         for table_db in self.tables.values():
             table_db.close()
+        for index_db in self.indexes.values():
+            index_db.close()
         self.meta_db.close()
         self.env.close()
     
@@ -40,7 +105,7 @@ class DatabaseHandler():
             return 0
         
         table_db = db.DB(self.env)
-        table_db.open("my_database.db", table_name, db.DB_HASH, db.DB_CREATE)
+        table_db.open("my_database.db", table_name, db.DB_HASH, db.DB_CREATE | db.DB_AUTO_COMMIT)
         self.tables[table_name] = table_db
         return 1
     
@@ -49,64 +114,535 @@ class DatabaseHandler():
         if table_name not in self.tables:
             return 0
         
+        for index_name in self.get_table_metadata(table_name).indexes:
+            self.delete_index(table_name, index_name)
+        
         self.tables[table_name].close()
         del self.tables[table_name] 
         
-        self.env.dbremove(self.db_file ,table_name)
+        self.env.dbremove(self.db_file ,table_name, flags=db.DB_AUTO_COMMIT)
     
-    # 테이블의 메타데이터 불러오는 함수
-    def get_table_metadata(self, table_name) -> dict:
-        """from table name return metadata"""   
-        metadata = self.meta_db.get(table_name.encode())
-        if metadata:
-            return json.loads(metadata.decode())
-        return None
+    # 인덱스는 같은 파일 안의 '테이블이름.인덱스이름' B-tree로 저장된다.
+    # 키는 인덱스 컬럼 값을 KeyCodec으로 인코딩한 값 뒤에 레코드 키를 붙인 것이고, 값은 레코드 키다.
+    def open_index(self, table_name, index_name):
+        if index_name in self.indexes:
+            return 0
+        
+        index_db = db.DB(self.env)
+        index_db.open(self.db_file, f"{table_name}.{index_name}", db.DB_BTREE, db.DB_CREATE | db.DB_AUTO_COMMIT)
+        self.indexes[index_name] = index_db
+        return 1
     
+    def create_index(self, table_name, index_name, columns):
+        """open new index and fill it with records already in the table"""
+        self.open_index(table_name, index_name)
+        column_index = self.get_table_metadata(table_name).column_index
+        positions = [column_index[col] for col in columns]
+        
+        index_db = self.indexes[index_name]
+        with self.transaction():
+            for key, record in self.table_scan(table_name):
+                index_db.put(self._index_key(record, positions, key), key, self.current_txn)
+    
+    def delete_index(self, table_name, index_name):
+        if index_name not in self.indexes:
+            return 0
+        
+        self.indexes[index_name].close()
+        del self.indexes[index_name]
+        
+        self.env.dbremove(self.db_file, f"{table_name}.{index_name}", flags=db.DB_AUTO_COMMIT)
+        return 1
     
+    def _index_key(self, record, positions, key) -> bytes:
+        return KeyCodec.encode_key([record[i] for i in positions]) + key
+    
+    # 레코드가 추가/삭제될 때 인덱스에 넣거나 뺄 (인덱스 이름, 인덱스 키) 목록
+    def _index_entries(self, meta, record, key) -> list[tuple]:
+        return [(index_name, self._index_key(record, positions, key)) for index_name, positions in meta.index_positions.items()]
+    
+    def index_scan(self, index_name, prefix, lower = None, upper = None):
+        """
+        generate record keys from index.
+        prefix is encoded values of leading columns which must be equal.
+        lower / upper are (encoded value, inclusive) range of the next column, or None.
+        """
+        start = prefix
+        if lower:
+            start = prefix + lower[0]
+        elif upper:
+            start = prefix + KeyCodec.VALUE_MARK   # NULL은 범위 조건을 만족하지 않음
+        
+        cursor = self.indexes[index_name].cursor(self.current_txn)
+        try:
+            entry = cursor.set_range(start)
+            while entry:
+                index_key, key = entry
+                self.bytes_read += len(index_key) + len(key)
+                if not index_key.startswith(prefix):
+                    break
+                
+                if lower and not lower[1] and index_key.startswith(prefix + lower[0]):
+                    entry = cursor.next()
+                    continue
+                
+                if upper:
+                    bound = prefix + upper[0]
+                    if index_key.startswith(bound):
+                        if not upper[1]:
+                            break
+                    elif index_key > bound:
+                        break
+                
+                yield key
+                entry = cursor.next()
+        finally:
+            cursor.close()
+    
+    # 트랜잭션
+    def begin(self) -> bool:
+        """start transaction. return False if transaction is already in progress"""
+        if self.txn is not None:
+            return False
+        self.txn = self.current_txn = self.env.txn_begin()
+        return True
+    
+    def commit(self) -> bool:
+        if self.txn is None:
+            return False
+        txn, self.txn, self.current_txn = self.txn, None, None
+        txn.commit()
+        self._group_commit()
+        return True
+    
+    def rollback(self) -> bool:
+        if self.txn is None:
+            return False
+        txn, self.txn, self.current_txn = self.txn, None, None
+        txn.abort()
+        return True
+    
+    # 서버는 세션마다 BEGIN한 트랜잭션을 따로 가지고, 그 세션의 문장을 실행하는 동안만 바꿔 끼운다.
+    def swap_transaction(self, txn):
+        """make txn transaction of following statements and return previous one"""
+        previous = self.txn
+        self.txn = self.current_txn = txn
+        return previous
+    
+    @contextmanager
+    def transaction(self):
+        """
+        run a statement atomically.
+        inside BEGIN ... COMMIT the statement runs in a child transaction,
+        so a failed statement is rolled back without aborting the whole transaction.
+        """
+        parent = self.current_txn
+        txn = self.env.txn_begin(parent)
+        self.current_txn = txn
+        try:
+            yield
+        except BaseException:
+            self.current_txn = parent
+            txn.abort()
+            raise
+        self.current_txn = parent
+        txn.commit()
+        if parent is None:
+            self._group_commit()
+    
+    def set_durability(self, mode, interval = 0.01):
+        """
+        sync:           log is flushed to disk on every commit
+        write_no_sync:  log is written to OS on every commit, OS decides when to flush it
+        group:          commits do not write log. log of all commits since last flush is flushed
+                        when interval seconds have passed since then, by next commit or by timer,
+                        so commits of last interval before a crash may be lost
+        """
+        if mode not in DURABILITY_MODES:
+            raise ValueError(f"unknown durability mode '{mode}'")
+        
+        with self._flush_lock:
+            # group에서 바꿀 때는 아직 디스크에 기록되지 않은 COMMIT들을 먼저 기록한다.
+            if self.durability == "group":
+                self._flush_log()
+            
+            self.env.set_flags(db.DB_TXN_WRITE_NOSYNC, 1 if mode == "write_no_sync" else 0)
+            self.env.set_flags(db.DB_TXN_NOSYNC, 1 if mode == "group" else 0)
+            self.durability = mode
+            self.group_commit_interval = interval
+            self._last_flush = perf_counter()
+    
+    # group 방식에서 마지막 기록 후 group_commit_interval초가 지났으면 그 사이의 COMMIT들을 한 번에 기록한다.
+    # 아직 지나지 않았으면 뒤따르는 COMMIT이 없어도 interval이 지날 때 기록되도록 타이머를 건다.
+    # 타이머 스레드는 env의 log_flush만 호출하므로 환경은 DB_THREAD로 열어야 한다. (run.py)
+    def _group_commit(self):
+        if self.durability != "group":
+            return
+        with self._flush_lock:
+            wait = self._last_flush + self.group_commit_interval - perf_counter()
+            if wait <= 0:
+                self._flush_log()
+            elif self._flush_timer is None:
+                self._flush_timer = threading.Timer(wait, self._flush_on_timer)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+    
+    def _flush_on_timer(self):
+        with self._flush_lock:
+            # 그 사이 COMMIT이나 set_durability가 먼저 기록했으면 이 타이머는 취소된 것이다.
+            if self._flush_timer is threading.current_thread():
+                self._flush_log()
+    
+    # _flush_lock을 잡은 상태에서 호출한다.
+    def _flush_log(self):
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        self.env.log_flush()
+        self._last_flush = perf_counter()
+    
+    # 테이블의 메타데이터 불러오는 함수
+    def get_table_metadata(self, table_name) -> TableSchema:
+        """
+        from table name return metadata, or None if table does not exist.
+        returned schema is shared and read-only, use to_metadata() to modify it.
+        """
+        schema = self.schemas.get(table_name)
+        if schema is None:
+            metadata = self.meta_db.get(table_name.encode(), txn=self.current_txn)
+            if not metadata:
+                return None
+            schema = TableSchema(table_name, json.loads(metadata.decode()))
+            self.schemas[table_name] = schema
+        return schema
+    
+    # 메타데이터를 저장할 때 캐시도 함께 바꾼다 (write-through)
     def metadata_put(self, key, data):
-        self.meta_db.put(key.encode(), json.dumps(data).encode())
+        self.meta_db.put(key.encode(), json.dumps(data).encode(), self.current_txn)
+        self.schemas[key] = TableSchema(key, data)
+        self.schema_version += 1
     
     def metadata_delete(self, key):
-        self.meta_db.delete(key.encode())
+        self.meta_db.delete(key.encode(), self.current_txn)
+        self.schemas.pop(key, None)
+        self.schema_version += 1
+    
+    def analyze_table(self, table_name):
+        """compute statistics of table (see Statistics) and store them in metadata"""
+        meta = self.get_table_metadata(table_name)
+        metadata = meta.to_metadata()
+        metadata["statistics"] = Statistics.collect(meta, self.table_scan(table_name))
+        self.metadata_put(table_name, metadata)
+    
+    # 테이블의 레코드를 바이너리로 인코딩/디코딩하는 객체
+    def get_codec(self, table_name) -> RecordCodec.RecordCodec:
+        return self.get_table_metadata(table_name).codec
+    
+    # 레코드의 키. primary key가 있는 테이블은 primary key 값을 인코딩한 키, 없으면 uuid
+    def record_key(self, meta, record) -> bytes:
+        if not meta.keyed_by_primary_key:
+            return str(uuid.uuid4()).encode()
+        
+        return KeyCodec.encode_key([record[i] for i in meta.primary_key_positions])
+    
+    # primary key 값들로 레코드 키 생성. primary key로 저장되지 않는 테이블이면 None
+    def primary_key(self, meta, values):
+        if not meta.keyed_by_primary_key:
+            return None
+        return KeyCodec.encode_key(values)
     
-    #
     def table_put(self, target_table, key, data):
-        self.tables[target_table].put(key.encode(), json.dumps(data).encode())
+        self.tables[target_table].put(key, self.get_codec(target_table).encode(data), self.current_txn)
+    
+    def table_insert(self, target_table, record) -> bool:
+        """insert new record. return False if record with same key already exists"""
+        meta = self.get_table_metadata(target_table)
+        key = self.record_key(meta, record)
+        try:
+            self.tables[target_table].put(key, meta.codec.encode(record), self.current_txn, db.DB_NOOVERWRITE)
+        except db.DBKeyExistError:
+            return False
+        
+        for index_name, index_key in self._index_entries(meta, record, key):
+            self.indexes[index_name].put(index_key, key, self.current_txn)
+        return True
+    
+    def table_insert_many(self, target_table, records, parents = None):
+        """
+        insert records, which can be a generator.
+        return number of inserted records, or None if some record has duplicate key.
+        records inserted before the failure are rolled back with the statement transaction.
+        if parents is a set, foreign keys of inserted records are added to it (see parents_exist).
+        """
+        meta = self.get_table_metadata(target_table)
+        table_db = self.tables[target_table]
+        encode = meta.codec.encode
+        txn = self.current_txn
+        parent_specs = self._parent_specs(meta) if parents is not None else []
+        
+        inserted_count = 0
+        pending = []    # 아직 넣지 않은 (인덱스 이름, 인덱스 키, 레코드 키)
+        
+        # 인덱스(B-tree) 항목은 모아서 키 순서로 넣으면 같은 페이지에 연속으로 쓰게 된다.
+        def flush():
+            pending.sort()
+            for index_name, index_key, key in pending:
+                self.indexes[index_name].put(index_key, key, txn)
+            pending.clear()
+        
+        for record in records:
+            key = self.record_key(meta, record)
+            try:
+                table_db.put(key, encode(record), txn, db.DB_NOOVERWRITE)
+            except db.DBKeyExistError:
+                return None
+            inserted_count += 1
+            
+            if parent_specs:
+                self._add_probes(parent_specs, record, parents)
+            if meta.indexes:
+                for index_name, index_key in self._index_entries(meta, record, key):
+                    pending.append((index_name, index_key, key))
+                if len(pending) >= INSERT_BATCH_SIZE:
+                    flush()
+        flush()
+        
+        return inserted_count
+    
+    def table_delete(self, target_table, key, record = None):
+        """delete record with key. record is needed to update indexes, read if not given"""
+        meta = self.get_table_metadata(target_table)
+        if meta.indexes:
+            if record is None:
+                record = self.table_get(target_table, key)
+            for index_name, index_key in self._index_entries(meta, record, key):
+                self.indexes[index_name].delete(index_key, self.current_txn)
+        
+        self.tables[target_table].delete(key, self.current_txn)
+    
+    def table_update(self, target_table, update, keys = None, parents = None, children = None):
+        """
+        rewrite records in one cursor pass with cursor.put(DB_CURRENT).
+        update(record) returns new record, or None if the record is not updated.
+        keys, if given, are the only records to visit (found by primary key or index).
+        return number of updated records, or None if changed primary key is duplicated.
+
+        records whose primary key changes are deleted during the pass and inserted after it,
+        so that they are not visited again.
+        if parents / children are sets, changed foreign keys and changed referenced values are added to them.
+        """
+        meta = self.get_table_metadata(target_table)
+        codec = meta.codec
+        txn = self.current_txn
+        parent_specs = self._parent_specs(meta) if parents is not None else []
+        child_specs = self._child_specs(meta) if children is not None else []
+        
+        updated_count = 0
+        moved = []   # primary key가 바뀐 (키, 레코드)
+        
+        cursor = self.tables[target_table].cursor(txn)
+        try:
+            for key, val in self._cursor_entries(cursor, keys):
+                record = codec.decode(val)
+                new_record = update(record)
+                if new_record is None:
+                    continue
+                updated_count += 1
+                if new_record == record:
+                    continue
+                
+                if parent_specs:
+                    self._add_probes(parent_specs, new_record, parents, record)
+                if child_specs:
+                    self._add_probes(child_specs, record, children, new_record)
+                
+                new_key = key
+                if meta.keyed_by_primary_key and any(record[i] != new_record[i] for i in meta.primary_key_positions):
+                    new_key = self.record_key(meta, new_record)
+                
+                if new_key == key:
+                    cursor.put(key, codec.encode(new_record), db.DB_CURRENT)
+                else:
+                    cursor.delete()
+                    moved.append((new_key, new_record))
+                
+                # 바뀐 인덱스 항목만 고친다.
+                for (index_name, old_index_key), (_, new_index_key) in zip(self._index_entries(meta, record, key), self._index_entries(meta, new_record, new_key)):
+                    if old_index_key != new_index_key:
+                        self.indexes[index_name].delete(old_index_key, txn)
+                        self.indexes[index_name].put(new_index_key, new_key, txn)
+        finally:
+            cursor.close()
+        
+        for key, record in moved:
+            try:
+                self.tables[target_table].put(key, codec.encode(record), txn, db.DB_NOOVERWRITE)
+            except db.DBKeyExistError:
+                return None
+        return updated_count
+    
+    def table_delete_where(self, target_table, predicate, keys = None, children = None):
+        """
+        delete records satisfying predicate(record) in one cursor pass with cursor.delete().
+        keys, if given, are the only records to visit (found by primary key or index).
+        return number of deleted records.
+        if children is a set, values of deleted records referenced by foreign keys are added to it (see children_exist).
+        """
+        meta = self.get_table_metadata(target_table)
+        decode = meta.codec.decode
+        txn = self.current_txn
+        child_specs = self._child_specs(meta) if children is not None else []
+        
+        deleted_count = 0
+        cursor = self.tables[target_table].cursor(txn)
+        try:
+            for key, val in self._cursor_entries(cursor, keys):
+                record = decode(val)
+                if not predicate(record):
+                    continue
+                
+                cursor.delete()
+                for index_name, index_key in self._index_entries(meta, record, key):
+                    self.indexes[index_name].delete(index_key, txn)
+                if child_specs:
+                    self._add_probes(child_specs, record, children)
+                deleted_count += 1
+        finally:
+            cursor.close()
+        return deleted_count
     
-    def table_delete(self, target_table, key):
-        self.tables[target_table].delete(key.encode())
+    # 커서로 (키, 값)을 순회. keys가 주어지면 그 키들의 위치로만 이동한다.
+    def _cursor_entries(self, cursor, keys):
+        if keys is None:
+            while entry := cursor.next():
+                self.bytes_read += len(entry[1])
+                yield entry
+        else:
+            for key in keys:
+                if entry := cursor.set(key):
+                    self.bytes_read += len(entry[1])
+                    yield entry
     
-    def table_delete_all(self, target_table):
-        """delete every record in table"""
-        deleted_count = self.tables[target_table].truncate()
+    # 키로 레코드 하나를 읽는 함수. 없으면 None
+    def table_get(self, target_table, key) -> list:
+        val = self.tables[target_table].get(key, txn=self.current_txn)
+        if val is None:
+            return None
+        
+        self.bytes_read += len(val)
+        return self.get_codec(target_table).decode(val)
+    
+    def table_delete_all(self, target_table, children = None):
+        """delete every record in table. if children is a set, same as table_delete_where"""
+        meta = self.get_table_metadata(target_table)
+        # 다른 테이블이 참조하는 테이블은 삭제되는 값을 모아야 하므로 truncate하지 않는다.
+        if children is not None and any(child_table != target_table for child_table, _, _ in meta.referencing_tables):
+            return self.table_delete_where(target_table, lambda record: True, None, children)
+        
+        deleted_count = self.tables[target_table].truncate(self.current_txn)
+        for index_name in self.get_table_metadata(target_table).indexes:
+            self.indexes[index_name].truncate(self.current_txn)
         return deleted_count
+    
+    # 테이블의 레코드 수. 레코드를 디코딩하지 않고 Berkeley DB 통계로 센다.
+    def table_count(self, target_table) -> int:
+        return self.tables[target_table].stat(txn=self.current_txn)["ndata"]
         
     # 레코드 전체 순회
     def table_get_all(self, target_table, flag = True) -> list[tuple]:
-        meta = self.get_table_metadata(target_table)
-        dtype_date = []
+        return list(self.table_scan(target_table, flag))
+    
+    def table_scan(self, target_table, flag = True):
+        """generate records with cursor. if flag is True, generate (key, record)"""
+        decode = self.get_codec(target_table).decode
+        
+        cursor = self.tables[target_table].cursor(self.current_txn)  # 커서 생성
+        try:
+            while x := cursor.next():
+                key, val = x
+                self.bytes_read += len(val)
+                val = decode(val)
+                if flag:
+                    yield (key, val)
+                else:
+                    yield val
+        finally:
+            cursor.close()  # 커서 닫기
         
-        for i, col in enumerate(meta["column_order"]):
-            if meta["columns"][col]["data_type"] == "DATE":
-                dtype_date.append(i)
         
+    # 외래키 확인
+    # 삽입/수정/삭제하는 동안 확인할 값을 (테이블, 컬럼들, 인코딩한 값) 형태의 probe로 모아 두고,
+    # 문장이 끝날 때 정렬해 한 번에 찾는다. 부모 테이블은 primary key로, 자식 테이블은 외래키 인덱스로 찾으므로
+    # probe 하나를 확인하는 비용은 O(1) 또는 O(log n)이다. 문장 안에서 서로를 참조하는 레코드도 문장 끝에 확인된다.
+    def create_foreign_key_indexes(self, table_name):
+        """create index on foreign key columns of table if not exists, used to find referencing records"""
+        meta = self.get_table_metadata(table_name)
+        missing = []
+        for number, fk in enumerate(meta["foreign_keys"]):
+            index_name = FOREIGN_KEY_INDEX_NAME.format(table_name=table_name, number=number)
+            if index_name not in meta.indexes:
+                missing.append((index_name, list(fk["fk_columns"])))
+        if not missing:
+            return
         
-        cursor = self.tables[target_table].cursor()  # 커서 생성
-        tmp = []
-        while x := cursor.next():
-            key, val = x
-            key = key.decode()
-            val = json.loads(val.decode())
-            for i in dtype_date:
-                val[i] = datetime.strptime(val[i], '%Y-%m-%d').date()
-            if flag:
-                tmp.append((key, val))
-            else:
-                tmp.append(val)
-        cursor.close()  # 커서 닫기
-        return tmp
+        metadata = meta.to_metadata()
+        for index_name, columns in missing:
+            metadata.setdefault("indexes", {})[index_name] = columns
+        self.metadata_put(table_name, metadata)
+        for index_name, columns in missing:
+            self.create_index(table_name, index_name, columns)
+    
+    # (부모 테이블, 부모의 primary key 컬럼들, 그 순서대로 이 테이블의 외래키 컬럼 위치)
+    def _parent_specs(self, meta) -> list[tuple]:
+        specs = []
+        for parent_table, ref_columns, positions in meta.foreign_key_positions:
+            primary_keys = tuple(self.get_table_metadata(parent_table)["primary_keys"])
+            specs.append((parent_table, primary_keys, tuple(positions[ref_columns.index(col)] for col in primary_keys)))
+        return specs
+    
+    # (자식 테이블, 자식의 외래키 컬럼들, 그 순서대로 이 테이블에서 참조되는 컬럼 위치)
+    def _child_specs(self, meta) -> list[tuple]:
+        return [(child_table, tuple(child_columns), positions) for child_table, child_columns, positions in meta.referencing_tables]
+    
+    # record의 값으로 probe를 만들어 probes에 넣는다. NULL이 있는 외래키는 확인하지 않고,
+    # other가 주어지면 other와 값이 같은(바뀌지 않은) 외래키도 건너뛴다.
+    def _add_probes(self, specs, record, probes, other = None):
+        for table_name, columns, positions in specs:
+            values = [record[i] for i in positions]
+            if None in values:
+                continue
+            if other is not None and values == [other[i] for i in positions]:
+                continue
+            probes.add((table_name, columns, KeyCodec.encode_key(values)))
+    
+    def _probe(self, table_name, columns, encoded) -> bool:
+        """True if table has record whose columns have the encoded values"""
+        meta = self.get_table_metadata(table_name)
+        if meta.keyed_by_primary_key and columns == tuple(meta["primary_keys"]):
+            return bool(self.tables[table_name].exists(encoded, txn=self.current_txn))
         
+        for index_name, index_columns in meta.indexes.items():
+            if tuple(index_columns[:len(columns)]) == columns:
+                keys = self.index_scan(index_name, encoded)
+                found = next(keys, None) is not None
+                keys.close()
+                return found
         
+        # 맞는 인덱스가 없으면(이전 버전에서 만든 테이블) 테이블을 순회한다.
+        positions = [meta.column_index[col] for col in columns]
+        records = self.table_scan(table_name, False)
+        found = any(KeyCodec.encode_key([record[i] for i in positions]) == encoded for record in records)
+        records.close()
+        return found
+    
+    def parents_exist(self, probes) -> bool:
+        """True if every foreign key collected by table_insert_many / table_update references existing record"""
+        return all(self._probe(*probe) for probe in sorted(probes))
+    
+    def children_exist(self, probes) -> bool:
+        """True if some value collected by table_delete_where / table_update is still referenced"""
+        return any(self._probe(*probe) for probe in sorted(probes))
+    
     def table_exist(self, table_name):
         if table_name in self.tables:
             return True
@@ -0,0 +1,246 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from lark import Lark, Token, Tree, UnexpectedInput
+from lark.exceptions import VisitError
+from src import Exceptions, Profiler, RecordEvaluator
+
+# 리터럴을 '?'로 바꿔 캐시하는 문장의 종류
+CACHED_STATEMENTS = ("SELECT", "INSERT", "DELETE", "UPDATE")
+PARAMETERIZED_TOKENS = ("INT", "STR", "DATE")
+
+STATEMENT_CACHE_SIZE = 128
+
+# 트랜잭션 안에서 실행하지 않는 문장들. 메타데이터를 바꾸는 문장(DDL, ANALYZE)은 진행 중인 트랜잭션을 먼저 commit한다.
+DDL_STATEMENTS = ("create_table_query", "drop_table_query", "create_index_query", "drop_index_query", "analyze_query")
+NON_TRANSACTIONAL_STATEMENTS = DDL_STATEMENTS + ("begin_query", "commit_query", "rollback_query", "set_query",
+                                                 "explain_query", "describe_query", "desc_query", "show_tables_query")
+
+
+@dataclass
+class PreparedStatement:
+    statement: Tree         # select / insert / delete / update query. PARAM 토큰에는 0부터 번호가 붙어 있다.
+    parameter_count: int
+    run: object = None      # MyTransformer.prepare가 만든 실행 함수
+    schema_version: int = -1
+
+
+class Engine:
+    """
+    sql 명령을 파싱해 MyTransformer로 실행한다.
+
+    SELECT / INSERT / DELETE / UPDATE는 리터럴을 '?'로 바꾼 문장을 키로 하는 LRU 캐시에
+    파싱 트리와 이름 해석이 끝난 실행 함수를 저장해 두고, 같은 형태의 문장은 값만 바꿔 다시 실행한다.
+    테이블 메타데이터가 바뀌면(DatabaseHandler.schema_version) 이름 해석을 다시 한다.
+
+    PREPARE name AS ... / EXECUTE name (v1, v2) 와 prepare(), execute_prepared()로 이름 붙인 문장도 사용할 수 있다.
+
+    데이터를 읽고 쓰는 문장은 문장 단위 트랜잭션(DatabaseHandler.transaction) 안에서 실행되므로
+    실패한 문장의 변경은 모두 취소된다.
+
+    SET PROFILING = 1 이면 문장마다 단계별 실행 시간을 profiler에 기록한다. (SHOW PROFILE, src/Profiler.py)
+    """
+    def __init__(self, parser, transformer, cache_size = STATEMENT_CACHE_SIZE):
+        self.parser = parser
+        # 캐시 조회에서 문장을 토큰으로 나눌 때 쓰는 lexer 전용 Lark.
+        # Lark.lex()는 parser=None인 Lark에서만 lexer를 한 번 만들어 두고, 그 외에는 호출할 때마다 새로 만든다.
+        self.lexer = Lark(parser.source_grammar, parser=None, lexer="basic")
+        self.transformer = transformer
+        self.db_handler = transformer.db_handler
+        self.cache_size = cache_size
+
+        self.cache = OrderedDict()   # 정규화된 문장 -> PreparedStatement
+        self.prepared = {}           # 이름 -> PreparedStatement
+        self.profiler = Profiler.Profiler(self.db_handler)
+
+
+    def execute(self, command, params = None):
+        """
+        execute one sql command.
+        if params is given, '?' in command are replaced by params in order.
+        errors are raised as exceptions of src.Exceptions (or lark.UnexpectedInput for syntax error).
+        """
+        settings = self.transformer.settings
+        if not settings["PROFILING"]:
+            self._execute(command, params)
+            return
+
+        self.profiler.start(command)
+        self.transformer.profiler = self.profiler
+        error = None
+        try:
+            self._execute(command, params)
+        except UnexpectedInput:
+            error = "Syntax error"
+            raise
+        except Exception as e:
+            error = str(e)
+            raise
+        finally:
+            self.transformer.profiler = None
+            self.profiler.finish(settings["PROFILING_HISTORY_SIZE"], error)
+
+    def prepare(self, name, sql):
+        """prepare select / insert / delete / update statement with '?' parameters under name"""
+        if not sql.rstrip().endswith(";"):
+            sql += ";"
+
+        query = self._queries(self.parser.parse(sql))
+        if len(query) != 1 or query[0].data not in ("select_query", "insert_query", "delete_query", "update_tables_query"):
+            raise Exceptions.PrepareStatementError
+        self._prepare(name.upper(), query[0])
+
+    def execute_prepared(self, name, params = ()):
+        statement = self.prepared.get(name.upper())
+        if statement is None:
+            raise Exceptions.NoSuchPreparedStatement(name.upper())
+        self._run(statement, list(params), "Execute")
+
+
+    def _execute(self, command, params):
+        with self._phase("parse"):
+            cached = self._lookup(command, params)
+            tree = None if cached else self.parser.parse(command)
+        if cached:
+            statement, params = cached
+            self._run(statement, params, _statement_name(statement.statement))
+            return
+
+        with self._phase("execute"):
+            self._transform(tree)
+
+    def _phase(self, name):
+        return Profiler.phase(self.profiler, name)
+
+    # 문장을 정규화해 캐시에서 찾는 함수. 캐시할 수 없는 문장이면 None
+    def _lookup(self, command, params):
+        try:
+            tokens = list(self.lexer.lex(command))
+        except UnexpectedInput:
+            return None
+
+        if not tokens or tokens[0].type not in CACHED_STATEMENTS or [token.type for token in tokens].count("SEMICOLON") != 1:
+            return None
+
+        # '?'가 있으면 주어진 params를 사용하고, 없으면 리터럴을 파라미터로 바꾼다.
+        explicit = params is not None or any(token.type == "PARAM" for token in tokens)
+        parts = []
+        literals = []
+        for token in tokens:
+            if not explicit and token.type in PARAMETERIZED_TOKENS:
+                parts.append("?")
+                literals.append(token)
+            elif token.type == "STR":
+                parts.append(str(token))
+            else:
+                parts.append(token.upper())
+        key = " ".join(parts)
+
+        statement = self.cache.get(key)
+        if statement is None:
+            try:
+                query = self._queries(self.parser.parse(key))
+            except UnexpectedInput:
+                return None
+            statement = PreparedStatement(query[0], self._number_parameters(query[0]))
+
+            self.cache[key] = statement
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        else:
+            self.cache.move_to_end(key)
+
+        if explicit:
+            return statement, list(params or ())
+        return statement, [RecordEvaluator.parse_literal(token) for token in literals]
+
+    # command_name은 파라미터 개수가 맞지 않을 때 에러 메세지에 나오는 문장 이름
+    def _run(self, statement, params, command_name):
+        if len(params) != statement.parameter_count:
+            raise Exceptions.ParameterCountError(command_name)
+
+        # 테이블 정의가 바뀌었으면 이름 해석을 다시 한다.
+        if statement.schema_version != self.db_handler.schema_version:
+            with self._phase("resolve"):
+                self._resolve(statement)
+        with self._phase("execute"), self.db_handler.transaction():
+            statement.run(params)
+
+    def _prepare(self, name, query):
+        statement = PreparedStatement(query, self._number_parameters(query))
+        self._resolve(statement)
+        self.prepared[name] = statement
+
+    def _resolve(self, statement):
+        statement.run = self.transformer.prepare(statement.statement)
+        statement.schema_version = self.db_handler.schema_version
+
+
+    def _transform(self, tree):
+        # EXIT
+        if isinstance(tree.children[0], Token):
+            self._visit(tree)
+            return
+
+        for query in self._queries(tree):
+            if query.data == "prepare_query":
+                name = query.children[1].children[0].upper()
+                self._prepare(name, query.children[3].children[0])
+                print(f"DB_{self.transformer.id}> '{name}' statement is prepared")
+
+            elif query.data == "execute_query":
+                name = query.children[1].children[0].upper()
+                params = [RecordEvaluator.parse_literal(parameter.children[0]) for parameter in query.find_data("parameter")]
+                self.execute_prepared(name, params)
+
+            elif query.data == "show_profile_query":
+                self.profiler.discard()
+                query_id = None if query.children[4] is None else int(query.children[4])
+                self.transformer.prompt_out(*Profiler.format_profile(self.profiler.get(query_id)))
+
+            elif query.data == "show_profiles_query":
+                self.profiler.discard()
+                self.transformer.prompt_out(*Profiler.format_history(self.profiler.history))
+
+            elif query.data == "explain_query" and query.children[-1].data == "select_query":
+                # EXPLAIN [ANALYZE] SELECT. SELECT 트리를 MyTransformer로 변환하면 실행되므로 직접 넘긴다.
+                if any(query.scan_values(lambda token: isinstance(token, Token) and token.type == "PARAM")):
+                    raise Exceptions.ParameterCountError(_statement_name(query))
+                with self.db_handler.transaction():
+                    self.transformer.explain_select(query.children[-1].children, query.children[1] is not None)
+
+            elif query.data in NON_TRANSACTIONAL_STATEMENTS:
+                if query.data in DDL_STATEMENTS:
+                    self.db_handler.commit()
+                self._visit(query)
+
+            else:
+                if any(query.scan_values(lambda token: isinstance(token, Token) and token.type == "PARAM")):
+                    raise Exceptions.ParameterCountError(_statement_name(query))
+                with self.db_handler.transaction():
+                    self._visit(query)
+
+    def _visit(self, tree):
+        """transform tree with MyTransformer, raising original exception"""
+        try:
+            self.transformer.transform(tree)
+        except VisitError as e:
+            raise e.orig_exc
+
+    # command 파싱 트리에서 각 문장(select_query 등)의 트리
+    def _queries(self, tree):
+        return [query.children[0] for query in tree.children[0].children]
+
+    # PARAM 토큰을 나온 순서대로 0, 1, 2, ... 로 바꾸고 개수를 돌려주는 함수
+    def _number_parameters(self, tree, count = 0):
+        for i, child in enumerate(tree.children):
+            if isinstance(child, Tree):
+                count = self._number_parameters(child, count)
+            elif isinstance(child, Token) and child.type == "PARAM":
+                tree.children[i] = child.update(value=str(count))
+                count += 1
+        return count
+
+
+# 에러 메세지에 쓰는 문장 이름. select_query -> Select, update_tables_query -> Update
+def _statement_name(query):
+    return query.data.split("_")[0].capitalize()
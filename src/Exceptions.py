@@ -42,6 +42,18 @@ class DropReferencedTableError(Exception):
     def __init__(self, table_name):
         super().__init__(f"Drop table has failed: '{table_name}' is referenced by another table")
 
+class IndexExistenceError(Exception):
+    def __init__(self):
+        super().__init__("Create index has failed: index with the same name already exists")
+
+class IndexColumnExistenceError(Exception):
+    def __init__(self, column_name):
+        super().__init__(f"Create index has failed: '{column_name}' does not exist")
+
+class NoSuchIndex(Exception):
+    def __init__(self):
+        super().__init__("Drop index has failed: no such index")
+
 class SelectTableExistenceError(Exception):
     def __init__(self, table_name):
         super().__init__(f"Select has failed: '{table_name}' does not exist")
@@ -64,11 +76,58 @@ class InsertColumnNonNullableError(Exception):
         super().__init__(f"Insert has failed: '{column_name}' is not nullable")
 
 
+class InsertDuplicatePrimaryKeyError(Exception):
+    def __init__(self):
+        super().__init__("Insert has failed: primary key duplication")
+
+
+class ReferentialIntegrityError(Exception):
+    def __init__(self, command_name):
+        super().__init__(f"{command_name} has failed: referential integrity violation")
+
+
+class UpdateColumnExistenceError(Exception):
+    def __init__(self, column_name):
+        super().__init__(f"Update has failed: '{column_name}' does not exist")
+
+
+class UpdateTypeMismatchError(Exception):
+    def __init__(self):
+        super().__init__("Update has failed: types are not matched")
+
+
+class UpdateColumnNonNullableError(Exception):
+    def __init__(self, column_name):
+        super().__init__(f"Update has failed: '{column_name}' is not nullable")
+
+
+class UpdateDuplicatePrimaryKeyError(Exception):
+    def __init__(self):
+        super().__init__("Update has failed: primary key duplication")
+
+
 class SelectColumnResolveError(Exception):
     def __init__(self, column_name):
         super().__init__(f"Select has failed: fail to resolve '{column_name}'")
 
 
+class SelectLimitError(Exception):
+    def __init__(self):
+        super().__init__("Select has failed: LIMIT and OFFSET must be non-negative integers")
+
+class AggregateTypeError(Exception):
+    def __init__(self, function_name):
+        super().__init__(f"Select has failed: '{function_name}' requires int column")
+
+class GroupByError(Exception):
+    def __init__(self, column_name):
+        super().__init__(f"Select has failed: '{column_name}' must be in GROUP BY or used in aggregate function")
+
+class DistinctOrderByError(Exception):
+    def __init__(self):
+        super().__init__("Select has failed: ORDER BY column must be selected with DISTINCT")
+
+
 
 
 
@@ -87,6 +146,10 @@ class ColumnNotExist(Exception):
     def __init__(self, clause_name):
         super().__init__(f"{clause_name} clause trying to reference non existing column")
         
+class AggregateNotAllowed(Exception):
+    def __init__(self, clause_name):
+        super().__init__(f"{clause_name} clause cannot use aggregate functions")
+
 class AmbiguousReference(Exception):
     def __init__(self, clause_name):
         super().__init__(f"{clause_name} clause contains ambiguous column reference")   
@@ -101,4 +164,65 @@ class ReferenceColumnMatchError(Exception):
 
 class DuplicatedColumnNameError(Exception):
     def __init__(self):
-        super().__init__("Column name duplicated.")
\ No newline at end of file
+        super().__init__("Column name duplicated.")
+
+class PrepareStatementError(Exception):
+    def __init__(self):
+        super().__init__("Prepare has failed: only select, insert, delete and update can be prepared")
+
+class NoSuchPreparedStatement(Exception):
+    def __init__(self, statement_name):
+        super().__init__(f"Execute has failed: '{statement_name}' is not prepared")
+
+class ParameterCountError(Exception):
+    def __init__(self, command_name = "Execute"):
+        super().__init__(f"{command_name} has failed: number of parameters does not match")
+
+class LoadFileError(Exception):
+    def __init__(self, path):
+        super().__init__(f"Load data has failed: cannot read '{path}'")
+
+
+class ParallelScanError(Exception):
+    def __init__(self, message):
+        super().__init__(f"Select has failed: parallel scan worker failed ({message})")
+
+
+class NoSuchVariable(Exception):
+    def __init__(self, variable_name):
+        super().__init__(f"Set has failed: '{variable_name}' does not exist")
+
+class VariableValueError(Exception):
+    def __init__(self, variable_name):
+        super().__init__(f"Set has failed: invalid value for '{variable_name}'")
+
+
+class TransactionInProgressError(Exception):
+    def __init__(self):
+        super().__init__("Begin has failed: transaction is already in progress")
+
+class NoTransactionError(Exception):
+    def __init__(self, command_name):
+        super().__init__(f"{command_name} has failed: no transaction is in progress")
+
+class LockConflictError(Exception):
+    def __init__(self):
+        super().__init__("Statement has failed: data is locked by transaction of another session")
+
+
+class NoSuchProfile(Exception):
+    def __init__(self, query_id = None):
+        if query_id is None:
+            super().__init__("Show profile has failed: no statement is profiled")
+        else:
+            super().__init__(f"Show profile has failed: query {query_id} is not in profiling history")
+
+
+class ProtocolError(Exception):
+    def __init__(self, message):
+        super().__init__(f"Request has failed: {message}")
+
+class ServerError(Exception):
+    """error response of server, raised by Client"""
+    def __init__(self, message):
+        super().__init__(message)
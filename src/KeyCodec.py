@@ -0,0 +1,36 @@
+from datetime import date
+
+# Berkeley DB 키로 사용할 값들의 인코딩.
+# 여러 컬럼 값을 이어붙여도 각 값의 경계가 구분되고(prefix-free),
+# 바이트 순서가 값의 순서와 같아서 B-tree 인덱스의 범위 검색에도 그대로 쓸 수 있다.
+#   NULL  : 0x00
+#   INT   : 0x01 + 길이/부호 바이트 + 크기 (음수는 보수)
+#   DATE  : 0x01 + ordinal 4 bytes
+#   CHAR  : 0x01 + utf-8 (0x00 -> 0x00 0xFF) + 0x00 0x00
+
+NULL_MARK = b"\x00"
+VALUE_MARK = b"\x01"
+
+
+def encode_value(value) -> bytes:
+    """하나의 값을 순서를 보존하는 바이트열로 변환"""
+    if value is None:
+        return NULL_MARK
+
+    if isinstance(value, int):
+        magnitude = abs(value)
+        body = magnitude.to_bytes(max(1, (magnitude.bit_length() + 7) // 8), "big")
+        if value >= 0:
+            return VALUE_MARK + bytes([0x80 + len(body)]) + body
+        # 음수는 크기가 클수록 앞에 오도록 길이와 바이트를 모두 뒤집는다.
+        return VALUE_MARK + bytes([0x7F - len(body)]) + bytes(255 - b for b in body)
+
+    if isinstance(value, date):
+        return VALUE_MARK + value.toordinal().to_bytes(4, "big")
+
+    return VALUE_MARK + value.encode().replace(b"\x00", b"\x00\xff") + b"\x00\x00"
+
+
+def encode_key(values) -> bytes:
+    """여러 컬럼 값으로 키를 만든다"""
+    return b"".join(encode_value(value) for value in values)
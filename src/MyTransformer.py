@@ -1,9 +1,11 @@
 from __future__ import annotations
-from lark import Lark, UnexpectedInput, Transformer
+import csv
+import sys
+from lark import Lark, UnexpectedInput, Transformer, Tree
 from src.DatabaseHandler import DatabaseHandler
-from src import Exceptions, RecordEvaluator
+from src import Exceptions, RecordEvaluator, QueryPlanner, RecordCodec, Operators, Settings, ResultWriter, Profiler
 from datetime import date, datetime
-import uuid
+from time import perf_counter
 
 # MyTransformer class. lark 모듈의 Transformer 클래스를 상속받는다.
 class MyTransformer(Transformer):
@@ -12,12 +14,27 @@ class MyTransformer(Transformer):
         self.id = id
         # 데이터베이스를 통해 값을 읽고 쓸 때 모두 db_handler를 거친다.
         self.db_handler = db_handler
+        # SET 이름 = 값 으로 바꾸는 세션 변수
+        self.settings = Settings.Settings()
+        # SELECT, DELETE에서 레코드를 읽는 실행 계획을 만든다.
+        self.planner = QueryPlanner.QueryPlanner(db_handler, self.settings)
+        # SELECT 결과를 쓰는 ResultWriter. None이면 OUTPUT_FORMAT 형식으로 stdout에 출력한다.
+        self.result_writer = None
+        # 프로파일링 중인 문장을 실행하는 동안 Engine이 넣어 주는 Profiler. 아니면 None
+        self.profiler = None
+    
+
+    def use_session(self, settings, result_writer = None):
+        """run following statements with session variables of settings, writing SELECT results to result_writer"""
+        self.settings = self.planner.settings = settings
+        self.result_writer = result_writer
     
 
     # create query에서 외래키 관련 조건을 메타데이터에 업데이트 해주는 함수
     def update_referenced_by(self, referencing_table, referenced_table, referencing_column, referenced_columns):
         metadata = self.db_handler.get_table_metadata(referenced_table)
         if metadata:
+            metadata = metadata.to_metadata()
             tmp = {}
             tmp["referenced_columns"] = referenced_columns
             tmp["referencing_table"] = referencing_table
@@ -33,49 +50,20 @@ class MyTransformer(Transformer):
             
             if target_metadata:
             # `referenced_by` 목록에서 삭제된 테이블과 관련된 항목 제거
+                target_metadata = target_metadata.to_metadata()
                 target_metadata["referenced_by"] = [
                     ref for ref in target_metadata["referenced_by"]
-                    if ref["referencing_table"] != table_name or ref["referenced_columns"] != fk_table["fk_ref_columns"]
+                    if ref["referencing_table"] != table_name or ref["referenced_columns"] != list(fk_table["fk_ref_columns"])
                 ]
             
-            self.db_handler.metadata_put(target_table, target_metadata)
+                self.db_handler.metadata_put(target_table, target_metadata)
     
     # 데이터를 프롬프트에 출력할 때 형식을 맞춰주는 함수.
     def prompt_out(self, headers, data):
         """
         Print header and data to prompt
         """
-        
-        # for i in range(len(data)):
-        #     for j in range(len(data[i])):
-        #         if not data[i][j]:
-        #             data[i][j] = ""
-                    
-        L = len(data)
-        if headers:
-            widths = [len(header) for header in headers]
-        else:
-            widths = [20]
-            
-        for row in data:
-            widths = [max(width, len(str(cell))) for width, cell in zip(widths, row)]
-        widths = [(width + 9) // 10 * 10 for width in widths]
-        
-        separator = "-" * (sum(widths) + 10)
-        format_string = " | ".join(f"{{:<{width}}}" for width in widths)
-        
-        print(separator)
-        if headers:
-            print(format_string.format(*headers))
-        for row in data:
-            print(format_string.format(*row))
-        print(separator)
-        
-        
-        if L == 1:
-            print(f"{L} row in set")
-        else:
-            print(f"{L} rows in set")
+        ResultWriter.TableWriter(sys.stdout).write(headers, data)
     
     # desc, explain, describe query에서 공통적으로 사용.
     def _table_info_print(self, target_table):
@@ -117,30 +105,6 @@ class MyTransformer(Transformer):
 
     
 
-    def table_data_parser(self, val, val_type, flag = False):
-        '''
-            string 타입인 데이터들을 메타데이터의 각 column의 정의에 따라 데이터 타입을 바꿔주는 함수. 
-            flag는 DATE 타입을 string, date중 어떤 것으로 바꿀지 결정.
-        '''
-        if val == "NULL":
-            return None
-        
-        if val_type == "INT":
-            return int(val)
-        elif val_type == "DATE":
-            if flag:
-                return val
-            else:
-                res = datetime.strptime(val, '%Y-%m-%d').date()
-                return res
-        else:
-            res = val[1:-1]
-            max_length = int(val_type[5:-1])
-            if len(res) > max_length:
-                res = res[:max_length]
-                
-            return res
-        
     # 파싱트리에서 특정 토큰을 찾는 함수.
     def _find_tokens(self, data, token, upper = True, flag = False):
         """
@@ -179,7 +143,10 @@ class MyTransformer(Transformer):
          'foreign_keys':    [
                             {'fk_columns': ['C2'], 'fk_ref_table': 'table_name', 'fk_ref_columns': ['C2']}, 
                             {'fk_columns': ['C3'], 'fk_ref_table': 'table_name', 'fk_ref_columns': ['C3']}], 
-         'referenced_by':   [{'referenced_columns': ['C1'], 'referencing_table': 'OTHER_TABLE', 'referencing_column': ['OTHER_TABLE_COLUMN']}]
+         'referenced_by':   [{'referenced_columns': ['C1'], 'referencing_table': 'OTHER_TABLE', 'referencing_column': ['OTHER_TABLE_COLUMN']}],
+         'keyed_by_primary_key': True,  # records are stored with encoded primary key as key (uuid otherwise)
+         'indexes':         {'INDEX_NAME': ['C2', 'C3']},
+         'record_format':   1   # RecordCodec.FORMAT_VERSION, records of earlier version are stored in JSON
          }
         """
         
@@ -318,33 +285,88 @@ class MyTransformer(Transformer):
         metadata["primary_keys"] = primary_keys
         metadata["foreign_keys"] = foreign_keys
         metadata["referenced_by"] = referenced_by
+        metadata["keyed_by_primary_key"] = bool(primary_keys)
+        metadata["indexes"] = {}
+        metadata["record_format"] = RecordCodec.FORMAT_VERSION
         
         self.db_handler.open_table(table_name)
         self.db_handler.metadata_put(table_name, metadata)
+        # DELETE / UPDATE에서 참조하는 레코드를 찾을 수 있도록 외래키 컬럼마다 인덱스를 만든다.
+        self.db_handler.create_foreign_key_indexes(table_name)
         print(f"DB_{self.id}> '{table_name}' table is created")
     
     
-    def _cartesian_product(self, tables):
-        result = tables[0]
-        if len(tables) == 1:
-            return result
-        
-        for table in tables[1:]:
-            temp = []
-            for record1 in result:
-                for record2 in table:
-                    temp.append(record1 + record2)
-            result = temp
-        return result
-      
+    # PREPARE와 statement cache에서 사용하는 함수.
+    # 이름 해석과 제약조건 확인을 한 번만 하고, '?' 파라미터 값을 받아 실행하는 함수를 돌려준다.
+    def prepare(self, statement):
+        """
+        statement is parse tree of select / insert / delete / update query, whose PARAM tokens are numbered from 0.
+        return function params -> None which executes the statement.
+        """
+        preparers = {
+            "select_query": self._prepare_select,
+            "insert_query": self._prepare_insert,
+            "delete_query": self._prepare_delete,
+            "update_tables_query": self._prepare_update,
+        }
+        return preparers[statement.data](statement.children)
+
+
     def select_query(self, items):
-        select_clause = items[1].children
-        from_clause = list(items[2].children[0].find_data("referred_table"))    
-        join_clause = None if not items[2].children[1] else items[2].children[1]
-        where_clause = None if not items[2].children[2] else items[2].children[2]
-        order_by_clause = None if not items[2].children[3] else items[2].children[3]
+        with Profiler.phase(self.profiler, "resolve"):
+            run = self._prepare_select(items)
+        run([])
+
+    def _prepare_select(self, items):
+        column_header, build_plan = self._select_plan(items)
+        
+        # 결과는 SET OUTPUT_FORMAT으로 고른 형식으로, 실행 계획에서 만들어지는 대로 출력한다.
+        def run(params):
+            writer = self.result_writer or ResultWriter.create(self.settings["OUTPUT_FORMAT"], sys.stdout)
+            if self.profiler is None:
+                writer.write(column_header, build_plan(params))
+                return
+            
+            # 프로파일링 중이면 실행 계획 생성, 연산자들, 출력을 각각 한 단계로 기록한다.
+            with self.profiler.phase("plan"):
+                plan = build_plan(params)
+            self.profiler.run_plan(plan, lambda plan: writer.write(column_header, plan))
+        return run
+    
+    def explain_select(self, items, analyze = False):
+        """
+        EXPLAIN [ANALYZE] SELECT. print operator tree of the select plan.
+        with ANALYZE, the query is run and actual rows, loops and time of each operator are printed.
+        """
+        _, build_plan = self._select_plan(items)
+        plan = build_plan([])
+        
+        if analyze:
+            Operators.measure(plan)
+            start = perf_counter()
+            row_count = sum(1 for _ in plan)
+            elapsed = perf_counter() - start
+        
+        for line in Operators.explain(plan):
+            print(line)
+        if analyze:
+            print(f"{row_count} {'row' if row_count == 1 else 'rows'} in set, execution time: {elapsed * 1000:.3f} ms")
+    
+    # SELECT의 이름 해석을 하고 (헤더, params -> 실행 계획 함수)를 돌려주는 함수.
+    def _select_plan(self, items):
+        distinct = items[1] is not None
+        select_clause = items[2].children
+        table_expression = items[3].children
+        from_clause = list(table_expression[0].find_data("referred_table"))    
+        join_clause = None if not table_expression[1] else table_expression[1]
+        where_clause = None if not table_expression[2] else table_expression[2]
+        group_by_clause = None if not table_expression[3] else table_expression[3]
+        having_clause = None if not table_expression[4] else table_expression[4]
+        order_by_clause = None if not table_expression[5] else table_expression[5]
+        limit_clause = None if not table_expression[6] else table_expression[6]
 
-        select_info = []
+        select_info = []    # 'TABLE.COLUMN' 또는 집계 함수 (함수 이름, 'TABLE.COLUMN' | None)
+        select_alias = []
         
         from_info = []
         join_info = []
@@ -375,205 +397,374 @@ class MyTransformer(Transformer):
 
         if not select_clause:
             for table_name in (from_info + join_info):
-                for col_name in self.db_handler.get_table_metadata(table_name)["column_order"]:
-                    select_info.append(f"{table_name}.{col_name}")
+                select_info += self.db_handler.get_table_metadata(table_name).full_names
+            select_alias = [None] * len(select_info)
         else:
-            for select_condition in select_clause:
-                a = select_condition.children
-                table_name = None if not a[0] else a[0].children[0].value.upper()
-                column_name = None if not a[1] else a[1].children[0].value.upper()
-                
-                
-                if table_name:
-                    if (table_name not in from_info) and (table_name not in join_info):
-                        raise Exceptions.SelectColumnResolveError(column_name)
-                    elif column_name not in self.db_handler.get_table_metadata(table_name)["columns"]:
-                        raise Exceptions.SelectColumnResolveError(column_name)
-                    
+            for select_item in select_clause:
+                a = select_item.children
+                if select_item.data == "aggregate_column":
+                    select_info.append(self._aggregate_key(a[0], from_info + join_info))
+                    select_alias.append(None if not a[2] else a[2].children[0].value.upper())
                 else:
-                    for key in (from_info + join_info):
-                        value = self.db_handler.get_table_metadata(key)
-                        if column_name in value["columns"]:
-                            if table_name:
-                                raise Exceptions.SelectColumnResolveError(column_name)
-                            table_name = key
-                    if not table_name:
-                        raise Exceptions.SelectColumnResolveError(column_name)
-                select_info.append(table_name + "." + column_name)
+                    select_info.append(self._resolve_select_column(a[0], a[1], from_info + join_info))
+                    select_alias.append(None)
             
 
         if order_by_clause:
-            table_name = None if not order_by_clause.children[2] else order_by_clause.children[2].children[0].value.upper()
-            column_name = order_by_clause.children[3].children[0].value.upper()
-            order = "ASC" if not order_by_clause.children[4] else order_by_clause.children[4].value.upper()
-            
-            if table_name:
-                if (table_name not in from_info) and (table_name not in join_info):
-                    raise Exceptions.ColumnNotExist("Order by")
-                elif column_name not in self.db_handler.get_table_metadata(table_name)["columns"]:
-                    raise Exceptions.ColumnNotExist("Order by")
+            a = order_by_clause.children
+            if len(a) == 4:    # ORDER BY aggregate
+                order_by_info.append(self._aggregate_key(a[2], from_info + join_info))
             else:
-                for key in (from_info + join_info):
-                    value = self.db_handler.get_table_metadata(key)
-                    if column_name in value["columns"]:
-                        if table_name:
-                            raise Exceptions.AmbiguousReference("Order by")
-                        table_name = key
-                if not table_name:
-                    raise Exceptions.ColumnNotExist("Order by")
-                
-            order_by_info.append(table_name + "." + column_name)
+                order_by_info.append(self._resolve_clause_column(a[2], a[3], from_info + join_info, "Order by"))
+            order = "ASC" if not a[-1] else a[-1].value.upper()
             order_by_info.append(order)
         ###
         
         
         
-        # FROM operation, cartesian product
-        tmp = []
-        for t in from_info:
-            tmp.append(self.db_handler.table_get_all(t, flag=False))
-            
-        result_table = self._cartesian_product(tmp)
+        # 컬럼 배치를 정하고 JOIN, WHERE 조건을 먼저 컴파일한다.
         result_column = []
-        
         for table_name in from_info:
-            for column_name in self.db_handler.get_table_metadata(table_name)["column_order"]:
-                result_column.append(table_name + "." + column_name)
-        
-        # from연산 완료 결과-> from_where_result
-        
+            result_column += self.db_handler.get_table_metadata(table_name).full_names
         
-        # JOIN operation. do cartesian product and check ON condition
+        table_list = list(from_info)
+        join_steps = []
         for join_table, join_condition in zip(join_info, join_conditions):
-            result_table = self._cartesian_product([result_table, self.db_handler.table_get_all(join_table, flag=False)])
-            from_info.append(join_table)
-            for column_name in self.db_handler.get_table_metadata(join_table)["column_order"]:
-                result_column.append(join_table + "." + column_name)
-            recordEvaluator = RecordEvaluator.RecordEvaluator(result_column, from_info, join_condition, "Join")
-            result_table = list(filter(recordEvaluator.evaluate_record, result_table))
-        # JOIN END
-        
+            join_column = list(self.db_handler.get_table_metadata(join_table).full_names)
+            
+            left_column = list(result_column)
+            table_list.append(join_table)
+            result_column += join_column
+            recordEvaluator = RecordEvaluator.RecordEvaluator(result_column, table_list, join_condition, "Join")
+            join_steps.append((join_table, left_column, join_column, list(result_column), recordEvaluator))
         
-        # WHERE operation
+        whereEvaluator = None
         if where_clause:
-            recordEvaluator = RecordEvaluator.RecordEvaluator(result_column, from_info, where_clause, "Where")
-            result_table = list(filter(recordEvaluator.evaluate_record, result_table))
-
-        # WHERE operation end
-        
-        # order by
+            whereEvaluator = RecordEvaluator.RecordEvaluator(result_column, table_list, where_clause, "Where")
+        
+        # GROUP BY, HAVING, 집계 함수가 있으면 레코드를 (그룹 컬럼들, 집계 값들)로 모은 뒤
+        # HAVING, ORDER BY, 선택한 컬럼은 모은 레코드에서 찾는다.
+        aggregation = None
+        havingEvaluator = None
+        aggregated = group_by_clause or having_clause or any(type(info) == tuple for info in select_info + order_by_info[:1])
+        if aggregated:
+            group_info = []
+            if group_by_clause:
+                for group_column in group_by_clause.children[2:]:
+                    a = group_column.children
+                    group_info.append(self._resolve_clause_column(a[0], a[1], table_list, "Group by"))
+            
+            aggregates = [info for info in select_info + order_by_info[:1] if type(info) == tuple]
+            if having_clause:
+                aggregates += [self._aggregate_key(aggregate, table_list) for aggregate in having_clause.find_data("aggregate")]
+            aggregates = list(dict.fromkeys(aggregates))
+            
+            # 모은 레코드의 컬럼 이름. 집계 값은 'SUM(T.X)' 형태의 이름으로 HAVING에서 참조한다.
+            aggregated_column = group_info + [self._aggregate_text(key, full = True) for key in aggregates]
+            
+            def aggregated_index(info):
+                if type(info) == tuple:
+                    return len(group_info) + aggregates.index(info)
+                if info not in group_info:
+                    raise Exceptions.GroupByError(info.split('.')[1])
+                return group_info.index(info)
+            
+            if having_clause:
+                havingEvaluator = RecordEvaluator.RecordEvaluator(
+                    aggregated_column, table_list, having_clause, "Having",
+                    lambda aggregate: aggregated_column[aggregated_index(self._aggregate_key(aggregate, table_list))])
+            
+            aggregation = ([result_column.index(full_name) for full_name in group_info],
+                           [(function, None if full_name is None else result_column.index(full_name)) for function, full_name in aggregates])
+            column_position = aggregated_index
+        else:
+            column_position = result_column.index
         
+        order_by = None
         if order_by_info:
-            sort_idx = result_column.index(order_by_info[0])
-            result_table.sort(key=lambda x: x[sort_idx] if x[sort_idx] is not None else float('-inf'), reverse=(order.upper() == 'DESC'))
-    
-        # order by done
+            order_by = (column_position(order_by_info[0]), order_by_info[1] == "DESC")
         
-    
-        # Project operation
+        # LIMIT count [OFFSET offset]
+        limit = None
+        if limit_clause:
+            limit = [self._value_operand(value.children[0]) for value in limit_clause.children if isinstance(value, Tree)]
+        
+        # Project
         column_indices = []
         for i in select_info:
-            column_indices.append(result_column.index(i))
-            
-        result_table = [[row[i] for i in column_indices] for row in result_table]
+            column_indices.append(column_position(i))
         
-        # project done
+        if distinct and order_by and order_by[0] not in column_indices:
+            raise Exceptions.DistinctOrderByError
         
-        ### DONE
-        column_names = [name.split('.')[1] for name in select_info]
+        column_names = [name.split('.')[1] for name in select_info if type(name) == str]
         duplicates = set(col for col in column_names if column_names.count(col) > 1)
 
         # generate header
         column_header = []
-        for full_name in select_info:
+        for full_name, alias in zip(select_info, select_alias):
+            if type(full_name) == tuple:
+                column_header.append(alias or self._aggregate_text(full_name))
+                continue
             table_name, col_name = full_name.split('.')
             if col_name in duplicates:
                 column_header.append(full_name) 
             else:
                 column_header.append(col_name) 
         
-        for i in range(len(result_table)):
-            for j in range(len(result_table[i])):
-                if type(result_table[i][j]) == date:
-                    result_table[i][j] = result_table[i][j].strftime("%Y-%m-%d")
-                if not result_table[i][j]:
-                    result_table[i][j] = "NULL"
-        
-        self.prompt_out(column_header, result_table)
+        def build_plan(params):
+            steps = [step[:4] + (step[4].bind(params),) for step in join_steps]
+            evaluator = whereEvaluator.bind(params) if whereEvaluator else None
+            
+            limit_values = None
+            if limit:
+                limit_values = [params[value] if kind == "param" else value for kind, value in limit]
+                if any(type(value) != int or value < 0 for value in limit_values):
+                    raise Exceptions.SelectLimitError
+                if len(limit_values) == 1:
+                    limit_values.append(0)
+            
+            aggregation_values = None
+            if aggregation:
+                aggregation_values = aggregation + (havingEvaluator.bind(params) if havingEvaluator else None,)
+            
+            # scan, join, filter, aggregate, sort, project 연산자로 이루어진 실행 계획. 레코드는 출력할 때 하나씩 생성된다.
+            return self.planner.plan_select(from_info, steps, evaluator, order_by, column_indices, limit_values, aggregation_values, distinct)
+        return column_header, build_plan
+    
+    # SELECT 목록의 [table_name.]column_name을 'TABLE.COLUMN'으로 해석하는 함수.
+    def _resolve_select_column(self, table_node, column_node, table_list) -> str:
+        table_name = None if not table_node else table_node.children[0].value.upper()
+        column_name = None if not column_node else column_node.children[0].value.upper()
+        
+        if table_name:
+            if table_name not in table_list:
+                raise Exceptions.SelectColumnResolveError(column_name)
+            elif column_name not in self.db_handler.get_table_metadata(table_name)["columns"]:
+                raise Exceptions.SelectColumnResolveError(column_name)
+        else:
+            for key in table_list:
+                value = self.db_handler.get_table_metadata(key)
+                if column_name in value["columns"]:
+                    if table_name:
+                        raise Exceptions.SelectColumnResolveError(column_name)
+                    table_name = key
+            if not table_name:
+                raise Exceptions.SelectColumnResolveError(column_name)
+        return table_name + "." + column_name
+    
+    # ORDER BY, GROUP BY의 [table_name.]column_name을 'TABLE.COLUMN'으로 해석하는 함수.
+    def _resolve_clause_column(self, table_node, column_node, table_list, clause_name) -> str:
+        table_name = None if not table_node else table_node.children[0].value.upper()
+        column_name = column_node.children[0].value.upper()
+        
+        if table_name:
+            if table_name not in table_list:
+                raise Exceptions.ColumnNotExist(clause_name)
+            elif column_name not in self.db_handler.get_table_metadata(table_name)["columns"]:
+                raise Exceptions.ColumnNotExist(clause_name)
+        else:
+            for key in table_list:
+                value = self.db_handler.get_table_metadata(key)
+                if column_name in value["columns"]:
+                    if table_name:
+                        raise Exceptions.AmbiguousReference(clause_name)
+                    table_name = key
+            if not table_name:
+                raise Exceptions.ColumnNotExist(clause_name)
+        return table_name + "." + column_name
+    
+    # 집계 함수를 (함수 이름, 'TABLE.COLUMN')으로 해석하는 함수. COUNT(*)는 ("COUNT", None)
+    def _aggregate_key(self, aggregate, table_list) -> tuple:
+        a = aggregate.children
+        if len(a) == 3:
+            return ("COUNT", None)
+        
+        function = a[0].children[0].value.upper()
+        full_name = self._resolve_select_column(a[2], a[3], table_list)
+        table_name, col_name = full_name.split('.')
+        if function in ("SUM", "AVG") and self.db_handler.get_table_metadata(table_name)["columns"][col_name]["data_type"] != "INT":
+            raise Exceptions.AggregateTypeError(function)
+        return (function, full_name)
+    
+    # 헤더에 표시할 집계 함수 이름. full이면 컬럼을 'TABLE.COLUMN'으로 표시한다.
+    def _aggregate_text(self, key, full = False) -> str:
+        function, full_name = key
+        if full_name is None:
+            return f"{function}(*)"
+        return f"{function}({full_name if full else full_name.split('.')[1]})"
         
         
         
         
-    def insert_query(self, items):  
+    def insert_query(self, items):
+        self._prepare_insert(items)([])
+
+    def _prepare_insert(self, items):
         table_name = items[2].children[0].value.upper()
-        col_name = self._find_tokens(items[3], "column_name")   
-        values, values_type = self._find_tokens(items[5], "value", upper=False, flag=True)
+        col_name = self._find_tokens(items[3], "column_name")
+        rows = [[self._value_operand(value.children[0]) for value in value_list.children if isinstance(value, Tree)] for value_list in items[5:]]
         table_metadata = self.db_handler.get_table_metadata(table_name)
         
-        if not col_name:
-            col_name = table_metadata["column_order"]
-        
         
         ## 제약조건 확인 시작
         # 삽입할 테이블이 존재하지 않을 경우
         if not table_metadata:
             raise Exceptions.NoSuchTable("insert")
         
+        positions = self._insert_columns(table_metadata, col_name, [len(values) for values in rows])
+        plan = self._insert_plan(table_metadata)
+        
+        # 각 행에서 테이블의 각 컬럼에 들어갈 값
+        rows = [[("value", None) if i is None else values[i] for i in positions] for values in rows]
+        
+        def run(params):
+            # 모든 행을 먼저 확인하므로 값이 잘못된 행이 있으면 아무 행도 삽입되지 않는다.
+            records = []
+            for values in rows:
+                record = [params[value] if kind == "param" else value for kind, value in values]
+                records.append(self._inserthelper(record, plan))
+            
+            parents = set()
+            inserted_count = self.db_handler.table_insert_many(table_name, records, parents)
+            if inserted_count is None:
+                raise Exceptions.InsertDuplicatePrimaryKeyError
+            if not self.db_handler.parents_exist(parents):
+                raise Exceptions.ReferentialIntegrityError("Insert")
+            self._inserted_print(inserted_count)
+        return run
+    
+    def load_data_query(self, items):
+        """
+        LOAD DATA 'file' INTO TABLE table [(columns)]
+        each line of csv file is one record. empty field or NULL is inserted as null.
+        """
+        path = RecordEvaluator.parse_literal(items[2])
+        table_name = items[5].children[0].value.upper()
+        col_name = self._find_tokens(items[6], "column_name")
+        table_metadata = self.db_handler.get_table_metadata(table_name)
+        
+        if not table_metadata:
+            raise Exceptions.NoSuchTable("load data")
+        
+        positions = self._insert_columns(table_metadata, col_name, [])
+        plan = self._insert_plan(table_metadata)
+        field_count = len(col_name) if col_name else len(positions)
+        
+        try:
+            file = open(path, newline="")
+        except OSError:
+            raise Exceptions.LoadFileError(path)
+        
+        def records():
+            for fields in csv.reader(file):
+                if not fields:
+                    continue
+                if len(fields) != field_count:
+                    raise Exceptions.InsertTypeMismatchError
+                
+                record = [None if i is None else self._csv_value(fields[i], kind) for i, (_, kind, _, _) in zip(positions, plan)]
+                yield self._inserthelper(record, plan)
+        
+        # 레코드는 파일을 읽으면서 하나씩 만들어진다. 중간에 실패하면 이 문장에서 삽입한 레코드는 모두 삭제된다.
+        parents = set()
+        with file:
+            inserted_count = self.db_handler.table_insert_many(table_name, records(), parents)
+        if inserted_count is None:
+            raise Exceptions.InsertDuplicatePrimaryKeyError
+        if not self.db_handler.parents_exist(parents):
+            raise Exceptions.ReferentialIntegrityError("Load data")
+        self._inserted_print(inserted_count)
+    
+    def _inserted_print(self, inserted_count):
+        self._profile_rows(inserted_count)
+        if inserted_count == 1:
+            print(f"DB_{self.id}> 1 row inserted")
+        else:
+            print(f"DB_{self.id}> {inserted_count} rows inserted")
+    
+    # 프로파일링 중이면 삽입, 삭제, 수정한 레코드 수를 execute 단계의 ROWS_OUT으로 기록한다.
+    def _profile_rows(self, count):
+        if self.profiler is not None:
+            self.profiler.set_rows(rows_out=count)
+    
+    # INSERT 값 토큰을 ("value", 값) 또는 ("param", 파라미터 번호)로 변환하는 함수.
+    def _value_operand(self, token):
+        if token.type == "PARAM":
+            return ("param", int(token))
+        return ("value", RecordEvaluator.parse_literal(token))
+    
+    # INSERT / LOAD DATA에서 지정한 컬럼들을 확인하는 함수.
+    def _insert_columns(self, table_metadata, col_name, value_counts) -> list:
+        """
+        value_counts is number of values in each row.
+        return position of value in a row for each column of table, None if column is not given.
+        """
+        if not col_name:
+            col_name = table_metadata["column_order"]
         
         # 지정된 컬럼과 값의 개수가 다른 경우
         # 컬럼을 명시하지 않았는데, 입력 값 개수와 해당 테이블의 attribute 수가 다른 경우
-        if len(col_name) != len(values):
-            raise Exceptions.InsertTypeMismatchError
-        else:
-            if len(set(col_name)) != len(values):
-                raise Exceptions.DuplicatedColumnNameError
+        for value_count in value_counts:
+            if len(col_name) != value_count:
+                raise Exceptions.InsertTypeMismatchError
+        if len(set(col_name)) != len(col_name):
+            raise Exceptions.DuplicatedColumnNameError
         
         for col in col_name:
             # 존재하지 않는 column에 값을 삽입하는 경우
             if col not in table_metadata["columns"]:
                 raise Exceptions.InsertColumnExistenceError(col) 
-
-        inserting_value = self._inserthelper(col_name, values, values_type, table_metadata["column_order"], table_metadata)
         
-        key_value = str(uuid.uuid4())
-        self.db_handler.table_put(table_name, key_value, inserting_value)
-        print(f"DB_{self.id}> 1 row inserted")
-        
-        
-    # 테이블에 insert 할 때 value 값 리스트를 만드는 함수.
-    def _inserthelper(self, col_name: list, values: list, values_type: list, col_order: list, table_metadata) -> list[int | str | datetime.date]:
-        result = [None for _ in range(len(col_order))]
-
-        for idx in range(len(col_order)):
-            for i, col in enumerate(col_name):
-                if col_order[idx] == col:
-                    
-                    if (values_type[i] == "STR" and table_metadata["columns"][col]["data_type"][0] == "C"):
-                        result[idx] = self.table_data_parser(values[i], table_metadata["columns"][col]["data_type"], True)
-                    
-                    elif (values_type[i] == table_metadata["columns"][col]["data_type"]):
-                        result[idx] = self.table_data_parser(values[i], values_type[i], True)
-
-                    # null 값을 삽입하려는 경우
-                    elif (values_type[i] == "NULL"):
-                        if (table_metadata["columns"][col]["not_null"]):
-                            raise Exceptions.InsertColumnNonNullableError(col_order[idx])
-                        else:
-                            pass
-                    
-                        
-                    
-                    # 지정된 컬럼과 값의 타입이 맞지 않는 경우
-                    else:
-                        raise Exceptions.InsertTypeMismatchError
-                    
-                    break
-                        
+        return [col_name.index(col) if col in col_name else None for col in table_metadata["column_order"]]
+    
+    # 컬럼마다 (이름, 타입 종류, not null 여부, CHAR 길이). 행마다 메타데이터를 다시 찾지 않도록 미리 만든다.
+    def _insert_plan(self, table_metadata) -> list[tuple]:
+        plan = []
+        for col, data_type in zip(table_metadata["column_order"], table_metadata.data_types):
+            length = int(data_type[5:-1]) if data_type[0] == "C" else None
+            plan.append((col, data_type[0], table_metadata["columns"][col]["not_null"], length))
+        return plan
+        
+    # 테이블에 insert 할 때 값들의 타입, null 여부를 확인하고 저장할 레코드를 만드는 함수.
+    def _inserthelper(self, values: list, plan) -> list[int | str | date]:
+        result = [None] * len(values)
+        
+        for idx, ((col, kind, not_null, length), value) in enumerate(zip(plan, values)):
+            # null 값을 삽입하려는 경우
+            if value is None:
+                if not_null:
+                    raise Exceptions.InsertColumnNonNullableError(col)
+            
+            elif kind == "C" and type(value) == str:
+                result[idx] = value[:length]
+            
+            elif kind == "I" and type(value) == int:
+                # INT는 8 bytes로 저장되므로 범위를 벗어나면 저장할 수 없다.
+                if not (RecordCodec.INT_MIN <= value <= RecordCodec.INT_MAX):
+                    raise Exceptions.InsertTypeMismatchError
+                result[idx] = value
+            
+            elif kind == "D" and type(value) == date:
+                result[idx] = value
+            
+            # 지정된 컬럼과 값의 타입이 맞지 않는 경우
             else:
-                # null 여부
-                if table_metadata["columns"][col_order[idx]]["not_null"]:
-                    raise Exceptions.InsertColumnNonNullableError(col_order[idx])
+                raise Exceptions.InsertTypeMismatchError
         return result
+    
+    # csv 필드를 컬럼 타입의 값으로 변환하는 함수.
+    def _csv_value(self, field, kind):
+        if field == "" or field.upper() == "NULL":
+            return None
+        try:
+            if kind == "I":
+                return int(field)
+            elif kind == "D":
+                return datetime.strptime(field, '%Y-%m-%d').date()
+        except ValueError:
+            raise Exceptions.InsertTypeMismatchError
+        return field
 
         
     def drop_table_query(self, items):
@@ -596,6 +787,51 @@ class MyTransformer(Transformer):
         else:
             raise Exceptions.NoSuchTable("drop table")
     
+    # 인덱스를 가진 테이블 이름을 찾는 함수. 없으면 None
+    def _find_index_table(self, index_name):
+        for [table_name] in self.db_handler.get_table_list():
+            if index_name in self.db_handler.get_table_metadata(table_name).indexes:
+                return table_name
+        return None
+    
+    def create_index_query(self, items):
+        index_name = items[2].children[0].value.upper()
+        table_name = items[4].children[0].value.upper()
+        columns = self._find_tokens(items[5], "column_name")
+        table_metadata = self.db_handler.get_table_metadata(table_name)
+        
+        if not table_metadata:
+            raise Exceptions.NoSuchTable("create index")
+        
+        if self._find_index_table(index_name):
+            raise Exceptions.IndexExistenceError
+        
+        if len(set(columns)) != len(columns):
+            raise Exceptions.DuplicatedColumnNameError
+        
+        for col in columns:
+            if col not in table_metadata["columns"]:
+                raise Exceptions.IndexColumnExistenceError(col)
+        
+        table_metadata = table_metadata.to_metadata()
+        table_metadata.setdefault("indexes", {})[index_name] = columns
+        self.db_handler.metadata_put(table_name, table_metadata)
+        self.db_handler.create_index(table_name, index_name, columns)
+        print(f"DB_{self.id}> '{index_name}' index is created")
+    
+    def drop_index_query(self, items):
+        index_name = items[2].children[0].value.upper()
+        table_name = self._find_index_table(index_name)
+        
+        if not table_name:
+            raise Exceptions.NoSuchIndex
+        
+        table_metadata = self.db_handler.get_table_metadata(table_name).to_metadata()
+        del table_metadata["indexes"][index_name]
+        self.db_handler.metadata_put(table_name, table_metadata)
+        self.db_handler.delete_index(table_name, index_name)
+        print(f"DB_{self.id}> '{index_name}' index is dropped")
+    
     def explain_query(self, items):
         target_table = items[1].children[0].upper()
         if not self.db_handler.table_exist(target_table):
@@ -623,44 +859,167 @@ class MyTransformer(Transformer):
     
     
     def delete_query(self, items):
+        self._prepare_delete(items)([])
+
+    def _prepare_delete(self, items):
         table_name = items[2].children[0].value.upper()
         table_metadata = self.db_handler.get_table_metadata(table_name)
         
         if not table_metadata:
             raise Exceptions.NoSuchTable("delete")
         
-        meta_column_name  = [table_name + "." + item for item in table_metadata["column_order"]]
+        meta_column_name  = list(table_metadata.full_names)
         
         where_clause = items[3]
-    
-        if not where_clause:
-            deleted_count = self.db_handler.table_delete_all(table_name)
-        
-        else:
-            records = self.db_handler.table_get_all(table_name)
-            table_list = [table_name]
+        table_list = [table_name]
+        whereEvaluator = None
+        if where_clause:
             whereEvaluator = RecordEvaluator.RecordEvaluator(meta_column_name, table_list, where_clause, "Where")
+        
+        def run(params):
+            # 삭제된 레코드를 참조하는 레코드가 남아 있으면 문장 전체가 취소된다.
+            children = set()
+            if not whereEvaluator:
+                deleted_count = self.db_handler.table_delete_all(table_name, children)
             
-            delete_list = []
-            for key, record in records:
-                if whereEvaluator.evaluate_record(record):
-                    delete_list.append(key)
-
-            deleted_count = len(delete_list)
+            else:
+                # 커서 하나로 테이블을 한 번 순회하며 조건을 만족하는 레코드를 바로 삭제한다.
+                evaluator = whereEvaluator.bind(params)
+                keys = self.planner.candidate_keys(table_name, RecordEvaluator.conjuncts(evaluator.condition), table_list)
+                deleted_count = self.db_handler.table_delete_where(table_name, evaluator.evaluate, keys, children)
             
-            for key in delete_list:
-                self.db_handler.table_delete(table_name, key)
+            if self.db_handler.children_exist(children):
+                raise Exceptions.ReferentialIntegrityError("Delete")
+            
+            self._profile_rows(deleted_count)
+            if deleted_count == 1:
+                print(f"DB_{self.id}> 1 row deleted")
+            else:
+                print(f"DB_{self.id}> {deleted_count} rows deleted")
+        return run
+
+    
+    def analyze_query(self, items):
+        """ANALYZE [table]. without table, every table is analyzed"""
+        if items[1]:
+            table_name = items[1].children[0].value.upper()
+            if not self.db_handler.table_exist(table_name):
+                raise Exceptions.NoSuchTable("analyze")
+            table_names = [table_name]
+        else:
+            table_names = [table_name for [table_name] in self.db_handler.get_table_list()]
+        
+        for table_name in table_names:
+            self.db_handler.analyze_table(table_name)
+            print(f"DB_{self.id}> '{table_name}' table is analyzed")
+    
+    def set_query(self, items):
+        name = items[1].children[0].value.upper()
+        token = items[3].children[0]
+        value = token.value
+        if token.type in ("INT", "STR"):
+            value = RecordEvaluator.parse_literal(token)
+        
+        value = self.settings.set(name, value)
+        print(f"DB_{self.id}> '{name}' is set to {value}")
+    
+    def begin_query(self, items):
+        if not self.db_handler.begin():
+            raise Exceptions.TransactionInProgressError
+        print(f"DB_{self.id}> transaction is started")
+    
+    def commit_query(self, items):
+        if not self.db_handler.commit():
+            raise Exceptions.NoTransactionError("Commit")
+        print(f"DB_{self.id}> transaction is committed")
+    
+    def rollback_query(self, items):
+        if not self.db_handler.rollback():
+            raise Exceptions.NoTransactionError("Rollback")
+        print(f"DB_{self.id}> transaction is rolled back")
+    
+    def update_tables_query(self, items):
+        self._prepare_update(items)([])
+
+    def _prepare_update(self, items):
+        table_name = items[1].children[0].value.upper()
+        table_metadata = self.db_handler.get_table_metadata(table_name)
         
+        if not table_metadata:
+            raise Exceptions.NoSuchTable("update")
+        
+        # SET 컬럼 = 값
+        assignments = []
+        for assignment in items[2].find_data("assignment"):
+            col = assignment.children[0].children[0].value.upper()
+            value = assignment.children[2].children[0]
+            token = value.children[0] if isinstance(value, Tree) else value
+            
+            if col not in table_metadata["columns"]:
+                raise Exceptions.UpdateColumnExistenceError(col)
+            if col in [c for c, _ in assignments]:
+                raise Exceptions.DuplicatedColumnNameError
+            assignments.append((col, self._value_operand(token)))
         
+        plan = self._insert_plan(table_metadata)
         
-        if deleted_count == 1:
-            print(f"DB_{self.id}> 1 row deleted")
-        else:
-            print(f"DB_{self.id}> {deleted_count} rows deleted")
-
+        where_clause = items[3]
+        table_list = [table_name]
+        whereEvaluator = None
+        if where_clause:
+            whereEvaluator = RecordEvaluator.RecordEvaluator(list(table_metadata.full_names), table_list, where_clause, "Where")
+        
+        def run(params):
+            # 새 값은 문장마다 한 번만 확인한다.
+            new_values = []
+            for col, (kind, value) in assignments:
+                position = table_metadata.column_index[col]
+                new_values.append((position, self._updatehelper(params[value] if kind == "param" else value, plan[position])))
+            
+            keys = None
+            predicate = None
+            if whereEvaluator:
+                evaluator = whereEvaluator.bind(params)
+                predicate = evaluator.evaluate
+                keys = self.planner.candidate_keys(table_name, RecordEvaluator.conjuncts(evaluator.condition), table_list)
+            
+            def update(record):
+                if predicate and not predicate(record):
+                    return None
+                new_record = list(record)
+                for position, value in new_values:
+                    new_record[position] = value
+                return new_record
+            
+            parents, children = set(), set()
+            updated_count = self.db_handler.table_update(table_name, update, keys, parents, children)
+            if updated_count is None:
+                raise Exceptions.UpdateDuplicatePrimaryKeyError
+            if not self.db_handler.parents_exist(parents) or self.db_handler.children_exist(children):
+                raise Exceptions.ReferentialIntegrityError("Update")
+            
+            self._profile_rows(updated_count)
+            if updated_count == 1:
+                print(f"DB_{self.id}> 1 row updated")
+            else:
+                print(f"DB_{self.id}> {updated_count} rows updated")
+        return run
     
-    def update_tables_query(self, items):
-        print(f"DB_{self.id}> '{items[0]}' requested")
+    # UPDATE할 값의 타입, null 여부를 확인하는 함수. plan_entry는 _insert_plan의 한 컬럼
+    def _updatehelper(self, value, plan_entry):
+        col, kind, not_null, length = plan_entry
+        
+        if value is None:
+            if not_null:
+                raise Exceptions.UpdateColumnNonNullableError(col)
+            return None
+        elif kind == "C" and type(value) == str:
+            return value[:length]
+        elif kind == "I" and type(value) == int and RecordCodec.INT_MIN <= value <= RecordCodec.INT_MAX:
+            return value
+        elif kind == "D" and type(value) == date:
+            return value
+        raise Exceptions.UpdateTypeMismatchError
     
     def EXIT(self, items):
         self.db_handler.close()
@@ -0,0 +1,649 @@
+import heapq
+import pickle
+import tempfile
+from itertools import chain, islice
+from time import perf_counter, process_time
+from src import ParallelScanner
+
+# SELECT 실행 계획을 이루는 연산자들.
+# 연산자를 순회하면 자식 연산자에서 레코드를 하나씩 당겨와(pull) 처리한 결과를 하나씩 내보낸다.
+# 정렬, hash join의 build 쪽처럼 상태가 필요한 연산자만 레코드를 모아 둔다.
+
+
+class Operator:
+    """base class of plan operators. iterating an operator yields records"""
+    name = "Operator"
+
+    def __init__(self, *children):
+        self.children = list(children)
+        self.detail = ""      # EXPLAIN에 함께 표시할 내용 (조건, 컬럼 등). QueryPlanner가 채운다.
+        self.actual = None    # EXPLAIN ANALYZE, 프로파일링에서 측정한 실제 실행 결과
+
+    def __iter__(self):
+        if self.actual is None:
+            return self.records()
+        if self.actual.counter is not None:
+            return self._profiled_records()
+        return self._measured_records()
+
+    def records(self):
+        raise NotImplementedError
+
+    def describe(self) -> str:
+        """one line description of operator shown by EXPLAIN"""
+        return f"{self.name}: {self.detail}" if self.detail else self.name
+
+    # 실행 횟수, 내보낸 레코드 수, 걸린 시간을 잰다. 시간은 자식 연산자의 시간을 포함한다.
+    def _measured_records(self):
+        actual = self.actual
+        actual.loops += 1
+        records = iter(self.records())
+        while True:
+            start = perf_counter()
+            try:
+                record = next(records)
+            except StopIteration:
+                actual.time += perf_counter() - start
+                return
+            actual.time += perf_counter() - start
+            actual.rows += 1
+            yield record
+
+    # 프로파일링할 때는 CPU 시간과 읽은 바이트 수도 잰다.
+    def _profiled_records(self):
+        actual = self.actual
+        counter = actual.counter
+        actual.loops += 1
+        records = iter(self.records())
+        while True:
+            start, cpu_start, read_start = perf_counter(), process_time(), counter()
+            try:
+                record = next(records)
+            except StopIteration:
+                record = StopIteration
+            actual.time += perf_counter() - start
+            actual.cpu_time += process_time() - cpu_start
+            actual.bytes_read += counter() - read_start
+            if record is StopIteration:
+                return
+            actual.rows += 1
+            yield record
+
+
+class ActualStatistics:
+    """actual loops, rows and time (seconds) of operator measured by EXPLAIN ANALYZE or Profiler"""
+    def __init__(self, counter = None):
+        self.loops = 0
+        self.rows = 0
+        self.time = 0.0
+        # 프로파일링할 때만 잰다. counter는 지금까지 읽은 바이트 수를 돌려주는 함수
+        self.counter = counter
+        self.cpu_time = 0.0
+        self.bytes_read = 0
+
+
+def measure(plan, counter = None):
+    """
+    make every operator in plan record ActualStatistics when it runs.
+    with counter (function returning bytes read so far), cpu time and bytes read are also recorded.
+    """
+    plan.actual = ActualStatistics(counter)
+    for child in plan.children:
+        measure(child, counter)
+
+
+def explain(plan, depth = 0) -> list[str]:
+    """lines of operator tree. with measured plan, actual statistics are shown"""
+    line = plan.describe()
+    if depth:
+        line = "  " * depth + "-> " + line
+
+    if plan.actual is not None:
+        if plan.actual.loops:
+            line += f" (actual rows={plan.actual.rows} loops={plan.actual.loops} time={plan.actual.time * 1000:.3f} ms)"
+        else:
+            line += " (never executed)"
+
+    lines = [line]
+    for child in plan.children:
+        lines += explain(child, depth + 1)
+    return lines
+
+
+class TableScan(Operator):
+    """full scan of table with Berkeley DB cursor"""
+    name = "Table Scan"
+
+    def __init__(self, db_handler, table_name, with_key = False):
+        super().__init__()
+        self.db_handler = db_handler
+        self.table_name = table_name
+        self.with_key = with_key
+
+    def records(self):
+        return self.db_handler.table_scan(self.table_name, self.with_key)
+
+    def describe(self):
+        return f"{self.name} on {self.table_name}"
+
+
+class ParallelScan(Operator):
+    """
+    full scan of table by worker processes (src/ParallelScanner.py), which also check condition.
+    if sort is set, records are sorted by workers and merged.
+    """
+    name = "Parallel Table Scan"
+
+    def __init__(self, db_handler, table_name, workers, condition = None):
+        super().__init__()
+        self.db_handler = db_handler
+        self.table_name = table_name
+        self.workers = workers
+        self.condition = condition
+        self.sort = None    # (컬럼 위치, 내림차순 여부)
+        self.keep = None    # 정렬할 때 worker마다 남길 레코드 수 (ORDER BY ... LIMIT)
+
+    def records(self):
+        return ParallelScanner.scan(self.db_handler, self.table_name, self.workers, self.condition, self.sort, self.keep)
+
+    def describe(self):
+        text = f"{self.name} on {self.table_name} ({self.workers} workers)"
+        return f"{text}: {self.detail}" if self.detail else text
+
+
+class KeyLookup(Operator):
+    """read one record by primary key"""
+    name = "Primary Key Lookup"
+
+    def __init__(self, db_handler, table_name, key, with_key = False):
+        super().__init__()
+        self.db_handler = db_handler
+        self.table_name = table_name
+        self.key = key
+        self.with_key = with_key
+
+    def records(self):
+        record = self.db_handler.table_get(self.table_name, self.key)
+        if record is not None:
+            yield (self.key, record) if self.with_key else record
+
+    def describe(self):
+        return f"{self.name} on {self.table_name}"
+
+
+class IndexScan(Operator):
+    """read records whose keys are found in range of index"""
+    name = "Index Scan"
+
+    def __init__(self, db_handler, table_name, index_name, prefix, lower, upper, with_key = False):
+        super().__init__()
+        self.db_handler = db_handler
+        self.table_name = table_name
+        self.index_name = index_name
+        self.prefix = prefix
+        self.lower = lower
+        self.upper = upper
+        self.with_key = with_key
+
+    def records(self):
+        for key in self.db_handler.index_scan(self.index_name, self.prefix, self.lower, self.upper):
+            record = self.db_handler.table_get(self.table_name, key)
+            if record is not None:
+                yield (key, record) if self.with_key else record
+
+    def describe(self):
+        text = f"{self.name} using {self.index_name} on {self.table_name}"
+        return f"{text}: {self.detail}" if self.detail else text
+
+
+class Filter(Operator):
+    name = "Filter"
+
+    def __init__(self, child, predicate):
+        super().__init__(child)
+        self.predicate = predicate
+
+    # LIMIT이 순회를 멈추면 자식의 커서도 바로 닫히도록 generator로 내보낸다.
+    def records(self):
+        records = iter(self.children[0])
+        predicate = self.predicate
+        try:
+            for record in records:
+                if predicate(record):
+                    yield record
+        finally:
+            if hasattr(records, "close"):
+                records.close()
+
+
+class NestedLoopJoin(Operator):
+    """
+    cartesian product of two inputs, filtered by predicate if given.
+    right input is read once and kept in memory.
+    """
+    name = "Nested Loop Join"
+
+    def __init__(self, left, right, predicate = None):
+        super().__init__(left, right)
+        self.predicate = predicate
+
+    def records(self):
+        right_records = list(self.children[1])
+        predicate = self.predicate
+
+        for record in self.children[0]:
+            for match in right_records:
+                joined = record + match
+                if predicate is None or predicate(joined):
+                    yield joined
+
+
+class HashJoin(Operator):
+    """
+    equi-join of two inputs. hash table is built on the smaller input,
+    output keeps the order of cartesian product (left record first).
+    NULL never matches, same as '=' evaluation in RecordEvaluator.
+
+    lookup(key) can be given to find right records by primary key or index.
+    it is used instead of reading right input when left input has less records than lookup_limit().
+    """
+    name = "Hash Join"
+
+    def __init__(self, left, right, left_keys, right_keys, lookup = None, lookup_limit = None):
+        super().__init__(left, right)
+        self.left_keys = left_keys
+        self.right_keys = right_keys
+        self.lookup = lookup
+        self.lookup_limit = lookup_limit
+
+    def records(self):
+        left = iter(self.children[0])
+
+        if self.lookup is not None:
+            limit = self.lookup_limit()
+            buffered = list(islice(left, limit))
+            if len(buffered) < limit:
+                yield from self._probe_lookup(buffered)
+                return
+            left = chain(buffered, left)
+
+        right_records = list(self.children[1])
+        buffered = list(islice(left, len(right_records) + 1))
+        if len(buffered) <= len(right_records):
+            yield from self._build_left(buffered, right_records)
+        else:
+            yield from self._build_right(chain(buffered, left), right_records)
+
+    def _probe_lookup(self, left_records):
+        left_keys, right_keys = self.left_keys, self.right_keys
+        matches = {}
+
+        for record in left_records:
+            key = tuple(record[k] for k in left_keys)
+            if None in key:
+                continue
+
+            if key not in matches:
+                matches[key] = [match for match in self.lookup(key) if tuple(match[k] for k in right_keys) == key]
+
+            for match in matches[key]:
+                yield record + match
+
+    # 작은 왼쪽 입력의 키로 hash table을 만들고, 오른쪽을 한 번 읽어 키마다 맞는 레코드를 모아 둔다.
+    # 결과는 왼쪽 레코드 순서대로 바로 내보내므로, 결과 전체를 모아 정렬하지 않는다.
+    def _build_left(self, left_records, right_records):
+        left_keys, right_keys = self.left_keys, self.right_keys
+        matches = {}
+        for record in left_records:
+            key = tuple(record[k] for k in left_keys)
+            if None not in key:
+                matches[key] = []
+
+        for record in right_records:
+            bucket = matches.get(tuple(record[k] for k in right_keys))
+            if bucket is not None:
+                bucket.append(record)
+
+        for record in left_records:
+            for match in matches.get(tuple(record[k] for k in left_keys), ()):
+                yield record + match
+
+    def _build_right(self, left_records, right_records):
+        buckets = {}
+        for record in right_records:
+            key = tuple(record[k] for k in self.right_keys)
+            if None not in key:
+                buckets.setdefault(key, []).append(record)
+
+        left_keys = self.left_keys
+        for record in left_records:
+            key = tuple(record[k] for k in left_keys)
+            if None not in key:
+                for match in buckets.get(key, ()):
+                    yield record + match
+
+
+class Sort(Operator):
+    """
+    sort by one column. NULL is the smallest value.
+
+    if buffer_rows is given and input has more records, it is sorted externally:
+    sorted runs of buffer_rows records are written to temporary files and merged with k-way merge,
+    so at most buffer_rows records are kept in memory. result is the same as in-memory (stable) sort.
+    """
+    name = "Sort"
+
+    def __init__(self, child, index, descending = False, buffer_rows = None):
+        super().__init__(child)
+        self.index = index
+        self.descending = descending
+        self.buffer_rows = buffer_rows
+        self.spilled_runs = 0   # 임시 파일에 쓴 run 수
+
+    def records(self):
+        i = self.index
+        key = lambda record: (record[i] is not None, record[i])
+        buffer_rows = self.buffer_rows
+
+        runs = []
+        try:
+            buffered = []
+            for record in self.children[0]:
+                buffered.append(record)
+                if buffer_rows and len(buffered) >= buffer_rows:
+                    buffered.sort(key=key, reverse=self.descending)
+                    runs.append(_write_run(buffered))
+                    self.spilled_runs += 1
+                    buffered = []
+            buffered.sort(key=key, reverse=self.descending)
+
+            if not runs:
+                yield from buffered
+                return
+
+            # 한 번에 병합하는 파일 수를 제한한다. 앞쪽 run들을 먼저 병합해도 같은 값의 순서는 유지된다.
+            while len(runs) + 1 > MERGE_FAN_IN:
+                merged = _write_run(heapq.merge(*[_read_run(run) for run in runs[:MERGE_FAN_IN]], key=key, reverse=self.descending))
+                for run in runs[:MERGE_FAN_IN]:
+                    run.close()
+                runs[:MERGE_FAN_IN] = [merged]
+
+            yield from heapq.merge(*[_read_run(run) for run in runs], buffered, key=key, reverse=self.descending)
+        finally:
+            for run in runs:
+                run.close()
+
+    def describe(self):
+        text = super().describe()
+        if self.spilled_runs:
+            text += f" (external: {self.spilled_runs} runs)"
+        return text
+
+
+# 외부 정렬의 run 파일. 레코드 SPILL_BATCH개씩 pickle로 저장한다.
+MERGE_FAN_IN = 64
+SPILL_BATCH = 1000
+
+def _write_run(records):
+    file = tempfile.TemporaryFile()
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= SPILL_BATCH:
+            pickle.dump(batch, file, pickle.HIGHEST_PROTOCOL)
+            batch = []
+    if batch:
+        pickle.dump(batch, file, pickle.HIGHEST_PROTOCOL)
+    file.seek(0)
+    return file
+
+def _read_run(file):
+    while True:
+        try:
+            batch = pickle.load(file)
+        except EOFError:
+            return
+        yield from batch
+
+
+class TopN(Operator):
+    """
+    ORDER BY ... LIMIT. keeps only offset + count records in a heap, O(n log k) time and O(k) memory.
+    result is the same as Sort followed by Limit.
+    """
+    name = "Top-N Sort"
+
+    def __init__(self, child, index, descending, count, offset = 0):
+        super().__init__(child)
+        self.index = index
+        self.descending = descending
+        self.count = count
+        self.offset = offset
+
+    def records(self):
+        i = self.index
+        select = heapq.nlargest if self.descending else heapq.nsmallest
+        result = select(self.offset + self.count, self.children[0], key=lambda record: (record[i] is not None, record[i]))
+        yield from result[self.offset:]
+
+
+class Limit(Operator):
+    """
+    LIMIT without ORDER BY. stops reading child as soon as enough records are produced,
+    closing cursors of the scans below.
+    """
+    name = "Limit"
+
+    def __init__(self, child, count, offset = 0):
+        super().__init__(child)
+        self.count = count
+        self.offset = offset
+
+    def records(self):
+        records = iter(self.children[0])
+        try:
+            yield from islice(records, self.offset, self.offset + self.count)
+        finally:
+            if hasattr(records, "close"):
+                records.close()
+
+
+# 집계 함수: 이름 -> (초기 상태, 상태에 NULL이 아닌 값 하나를 반영하는 함수, 상태에서 결과를 만드는 함수)
+# COUNT(*)는 모든 레코드를 센다. 값이 하나도 없으면 COUNT는 0, 나머지는 NULL이다.
+AGGREGATE_FUNCTIONS = {
+    "COUNT": (0, lambda state, value: state + 1, lambda state: state),
+    "SUM": (None, lambda state, value: value if state is None else state + value, lambda state: state),
+    "MIN": (None, lambda state, value: value if state is None or value < state else state, lambda state: state),
+    "MAX": (None, lambda state, value: value if state is None or value > state else state, lambda state: state),
+    "AVG": ((0, 0), lambda state, value: (state[0] + value, state[1] + 1), lambda state: state[0] / state[1] if state[1] else None),
+}
+
+# 해시 테이블이 가득 찼을 때 나머지 레코드를 나눠 쓰는 임시 파일 수
+SPILL_PARTITIONS = 16
+
+
+class HashAggregate(Operator):
+    """
+    GROUP BY and aggregate functions with hash table of groups.
+    aggregates are (function, column index), index is None for COUNT(*).
+    output records are group values followed by aggregate values, in order of first appearance of groups.
+    without group columns, one record is produced even for empty input.
+
+    if buffer_groups is given, at most buffer_groups groups are kept in memory.
+    records of other groups are written to SPILL_PARTITIONS temporary files by hash of group values,
+    and each file is aggregated after the groups in memory are produced.
+    """
+    name = "Hash Aggregate"
+
+    def __init__(self, child, group_indices, aggregates, buffer_groups = None):
+        super().__init__(child)
+        self.group_indices = group_indices
+        self.aggregates = aggregates
+        self.buffer_groups = buffer_groups
+        self.spilled_partitions = 0
+
+    def records(self):
+        produced = False
+        for record in self._aggregate(self.children[0], 0):
+            produced = True
+            yield record
+
+        if not produced and not self.group_indices:
+            yield [AGGREGATE_FUNCTIONS[function][2](AGGREGATE_FUNCTIONS[function][0]) for function, _ in self.aggregates]
+
+    def _aggregate(self, records, depth):
+        group_indices = self.group_indices
+        initial = [AGGREGATE_FUNCTIONS[function][0] for function, _ in self.aggregates]
+        updates = [(j, index, AGGREGATE_FUNCTIONS[function][1]) for j, (function, index) in enumerate(self.aggregates)]
+        results = [AGGREGATE_FUNCTIONS[function][2] for function, _ in self.aggregates]
+
+        groups = {}
+        spill = None
+        try:
+            for record in records:
+                key = tuple([record[i] for i in group_indices])
+                states = groups.get(key)
+                if states is None:
+                    if self.buffer_groups and len(groups) >= self.buffer_groups:
+                        if spill is None:
+                            spill = _SpillFiles(depth)
+                        spill.add(key, record)
+                        continue
+                    states = groups[key] = list(initial)
+
+                for j, index, update in updates:
+                    value = True if index is None else record[index]
+                    if value is not None:
+                        states[j] = update(states[j], value)
+
+            for key, states in groups.items():
+                yield list(key) + [result(state) for result, state in zip(results, states)]
+            groups = None
+
+            if spill is not None:
+                for file in spill.files():
+                    self.spilled_partitions += 1
+                    yield from self._aggregate(_read_run(file), depth + 1)
+        finally:
+            if spill is not None:
+                spill.close()
+
+    def describe(self):
+        text = super().describe()
+        if self.spilled_partitions:
+            text += f" (spilled: {self.spilled_partitions} partitions)"
+        return text
+
+
+class HashDistinct(Operator):
+    """
+    SELECT DISTINCT. each record is produced at its first appearance, kept in hash set.
+    if buffer_rows is given and there are more distinct records, they are spilled like HashAggregate.
+    """
+    name = "Hash Distinct"
+
+    def __init__(self, child, buffer_rows = None):
+        super().__init__(child)
+        self.buffer_rows = buffer_rows
+        self.spilled_partitions = 0
+
+    def records(self):
+        return self._distinct(self.children[0], 0)
+
+    def _distinct(self, records, depth):
+        seen = set()
+        spill = None
+        try:
+            for record in records:
+                key = tuple(record)
+                if key in seen:
+                    continue
+                if self.buffer_rows and len(seen) >= self.buffer_rows:
+                    if spill is None:
+                        spill = _SpillFiles(depth)
+                    spill.add(key, record)
+                    continue
+                seen.add(key)
+                yield record
+            seen = None
+
+            if spill is not None:
+                for file in spill.files():
+                    self.spilled_partitions += 1
+                    yield from self._distinct(_read_run(file), depth + 1)
+        finally:
+            if spill is not None:
+                spill.close()
+
+    def describe(self):
+        text = super().describe()
+        if self.spilled_partitions:
+            text += f" (spilled: {self.spilled_partitions} partitions)"
+        return text
+
+
+class _SpillFiles:
+    """
+    SPILL_PARTITIONS temporary files, records are distributed by hash of key.
+    depth is mixed into hash, so that records spilled together are split again when spilled from a partition.
+    """
+    def __init__(self, depth):
+        self.depth = depth
+        self.batches = [[] for _ in range(SPILL_PARTITIONS)]
+        self.partitions = [None] * SPILL_PARTITIONS   # 레코드를 처음 쓸 때 만든다.
+
+    def add(self, key, record):
+        i = hash((self.depth, key)) % SPILL_PARTITIONS
+        self.batches[i].append(record)
+        if len(self.batches[i]) >= SPILL_BATCH:
+            self._flush(i)
+
+    def _flush(self, i):
+        if self.partitions[i] is None:
+            self.partitions[i] = tempfile.TemporaryFile()
+        pickle.dump(self.batches[i], self.partitions[i], pickle.HIGHEST_PROTOCOL)
+        self.batches[i] = []
+
+    def files(self):
+        """files with records, positioned at the start"""
+        for i, batch in enumerate(self.batches):
+            if batch:
+                self._flush(i)
+        for file in self.partitions:
+            if file is not None:
+                file.seek(0)
+                yield file
+
+    def close(self):
+        for file in self.partitions:
+            if file is not None:
+                file.close()
+
+
+class TableCount(Operator):
+    """COUNT(*) of whole table from Berkeley DB statistics, without reading records"""
+    name = "Table Count"
+
+    def __init__(self, db_handler, table_name):
+        super().__init__()
+        self.db_handler = db_handler
+        self.table_name = table_name
+
+    def records(self):
+        yield [self.db_handler.table_count(self.table_name)]
+
+    def describe(self):
+        return f"{self.name} on {self.table_name} (Berkeley DB statistics)"
+
+
+class Project(Operator):
+    name = "Project"
+
+    def __init__(self, child, indices):
+        super().__init__(child)
+        self.indices = indices
+
+    def records(self):
+        indices = self.indices
+        for record in self.children[0]:
+            yield [record[i] for i in indices]
@@ -0,0 +1,153 @@
+import heapq
+import multiprocessing
+import queue as queue_module
+from itertools import chain, islice
+from berkeleydb import db
+from src import Exceptions, RecordEvaluator
+from src.TableSchema import TableSchema
+
+# 큰 테이블의 전체 순회를 여러 worker 프로세스로 나눠 실행한다. (SET PARALLEL_WORKERS, PARALLEL_SCAN_MIN_ROWS)
+#
+# 테이블은 hash DB라서 키의 크기 순서로 나눌 수 없으므로, ANALYZE가 표본에서 고른 레코드 키들(scan_keys)을
+# cursor 순서에서의 경계로 삼아 테이블을 구간들로 나눈다. 구간은 경계 키에서 시작해 다음 경계 키 앞에서 끝나고,
+# 첫 번째 구간은 테이블의 처음에서 시작한다. worker는 구간들을 번갈아 맡아, 경계 키로 cursor를 옮긴 뒤(DB_SET)
+# 자기 구간의 레코드만 읽는다. 경계 키가 ANALYZE 후에 삭제되었으면 그 구간은 앞 구간을 읽는 worker가 읽는다.
+# 결과는 worker 순서대로 이어 붙이므로 레코드 순서는 한 프로세스로 순회할 때와 다르다.
+# ORDER BY가 있으면 worker가 자기 레코드들을 정렬해 보내고 부모가 병합한다.
+#
+# worker는 spawn으로 만든다. 부모에 다른 스레드(Server의 executor 등)가 있어도 그 스레드가 잡고 있던 lock이나
+# 환경 상태를 물려받지 않는다. worker는 부모의 DB 핸들은 쓰지 않고 데이터베이스 환경에 새로 join해
+# 테이블을 읽기 전용으로 연다. spawn은 부모의 main 모듈을 다시 import하므로 run.py는 import할 때 환경을 열지 않는다.
+# 부모의 트랜잭션에서 쓴 값은 worker가 볼 수 없으므로 BEGIN한 트랜잭션 안에서는 사용하지 않는다. (QueryPlanner)
+
+# worker가 한 번에 보내는 레코드 수. 이만큼 읽을 때마다 부모가 중단을 요청했는지 확인한다.
+RESULT_BATCH = 1000
+
+_context = multiprocessing.get_context("spawn")
+
+
+def partitions(scan_keys, workers) -> list[list]:
+    """start keys of segments read by each worker. None is the segment starting at first record of table"""
+    starts = [None, *scan_keys]
+    workers = max(1, min(workers, len(starts)))
+    return [starts[i::workers] for i in range(workers)]
+
+
+def scan(db_handler, table_name, workers, condition = None, sort = None, keep = None):
+    """
+    generate records of table satisfying condition (resolved condition of RecordEvaluator, or None).
+    sort is (column index, descending): records are generated in the order of Sort.
+    keep limits number of records sorted in each worker, for ORDER BY with LIMIT.
+    """
+    meta = db_handler.get_table_metadata(table_name)
+    scan_keys = meta.statistics.scan_keys
+    stop = _context.Event()
+    processes = []
+    try:
+        results = []
+        for starts in partitions(scan_keys, workers):
+            queue = _context.Queue()
+            process = _context.Process(
+                target=_scan_partition, daemon=True,
+                args=(db_handler.env_path, db_handler.db_file, table_name, meta.to_metadata(),
+                      starts, scan_keys, condition, sort, keep, stop, queue),
+            )
+            process.start()
+            processes.append(process)
+            results.append(_receive(queue, process))
+
+        if sort is None:
+            yield from chain.from_iterable(results)
+        else:
+            i, descending = sort
+            yield from heapq.merge(*results, key=lambda record: (record[i] is not None, record[i]), reverse=descending)
+
+    # LIMIT 등으로 중간에 멈추면 worker에게 중단을 알린다. 강제 종료는 환경의 lock을 남길 수 있어 마지막 수단이다.
+    finally:
+        stop.set()
+        for process in processes:
+            process.join(5)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+
+
+def _receive(queue, process):
+    while True:
+        try:
+            kind, value = queue.get(timeout=1)
+        except queue_module.Empty:
+            if not process.is_alive() and queue.empty():
+                raise Exceptions.ParallelScanError(f"worker exited with code {process.exitcode}")
+            continue
+
+        if kind == "rows":
+            yield from value
+        elif kind == "done":
+            return
+        else:
+            raise Exceptions.ParallelScanError(value)
+
+
+# worker 프로세스에서 실행된다.
+def _scan_partition(env_path, db_file, table_name, metadata, starts, scan_keys, condition, sort, keep, stop, queue):
+    try:
+        env = db.DBEnv()
+        env.open(env_path, db.DB_JOINENV)
+        table_db = db.DB(env)
+        table_db.open(db_file, table_name, db.DB_HASH, db.DB_RDONLY)
+        cursor = table_db.cursor()
+        try:
+            meta = TableSchema(table_name, metadata)
+            records = _partition_records(cursor, starts, set(scan_keys), meta.codec.decode, stop)
+            if condition is not None:
+                column_index = {name: i for i, name in enumerate(meta.full_names)}
+                records = filter(RecordEvaluator.compile_condition(condition, column_index), records)
+
+            if sort is not None:
+                i, descending = sort
+                key = lambda record: (record[i] is not None, record[i])
+                if keep is not None:
+                    records = (heapq.nlargest if descending else heapq.nsmallest)(keep, records, key=key)
+                else:
+                    records = sorted(records, key=key, reverse=descending)
+
+            records = iter(records)
+            while batch := list(islice(records, RESULT_BATCH)):
+                if stop.is_set():
+                    break
+                queue.put(("rows", batch))
+        finally:
+            cursor.close()
+            table_db.close()
+            env.close()
+    except Exception as e:
+        queue.put(("error", str(e)))
+        return
+
+    # 중단된 경우 부모가 읽지 않는 데이터 때문에 종료가 막히지 않게 한다.
+    if stop.is_set():
+        queue.cancel_join_thread()
+    else:
+        queue.put(("done", None))
+
+
+# starts의 각 경계 키에서 다음 경계 키(boundaries) 앞까지 읽는다.
+def _partition_records(cursor, starts, boundaries, decode, stop):
+    read = 0
+    for start in starts:
+        if start is None:
+            entry = cursor.first()
+            if entry is not None and entry[0] in boundaries:
+                continue
+        else:
+            entry = cursor.set(start)
+
+        while entry is not None:
+            read += 1
+            if read % RESULT_BATCH == 0 and stop.is_set():
+                return
+            yield decode(entry[1])
+            entry = cursor.next()
+            if entry is not None and entry[0] in boundaries:
+                break
@@ -0,0 +1,210 @@
+import sys
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field, asdict
+from time import perf_counter, process_time
+from src import Exceptions, Operators
+
+# SET PROFILING = 1 이면 Engine이 실행하는 문장마다 단계별 실행 시간을 기록한다.
+# SHOW PROFILES로 최근 문장들을, SHOW PROFILE [FOR QUERY n]으로 한 문장의 단계들을 볼 수 있고,
+# Profiler.add_hook으로 등록한 함수는 문장이 끝날 때마다 QueryProfile을 받는다.
+#
+# 단계
+#   parse   : statement cache 조회와 파싱
+#   resolve : 이름 해석과 제약조건 확인 (캐시된 문장은 테이블 정의가 바뀌었을 때만)
+#   plan    : SELECT 실행 계획 생성
+#   연산자   : SELECT 실행 계획의 연산자마다 한 단계. 자식 연산자부터 데이터가 흐르는 순서로 나온다.
+#   output  : SELECT 결과의 형식 변환과 출력
+#   execute : 위 단계에 속하지 않는 실행 시간. INSERT / DELETE / UPDATE 등의 실행과 COMMIT
+# 단계의 시간과 읽은 바이트 수는 안쪽 단계를 뺀 값이므로, 단계들을 더하면 문장 전체와 거의 같다.
+# 연산자 단계는 EXPLAIN ANALYZE처럼 레코드마다 시간을 재므로 프로파일링 중에는 SELECT가 느려진다.
+# 읽은 바이트 수는 DatabaseHandler.bytes_read로 세며, ParallelScan worker 프로세스가 읽은 양은 포함되지 않는다.
+
+
+@dataclass
+class Phase:
+    name: str
+    wall: float = 0.0       # 초
+    cpu: float = 0.0        # 초. 이 프로세스의 CPU 시간
+    rows_in: int = None
+    rows_out: int = None
+    bytes_read: int = 0
+
+
+@dataclass
+class QueryProfile:
+    query_id: int
+    statement: str
+    phases: list = field(default_factory=list)
+    wall: float = 0.0
+    cpu: float = 0.0
+    bytes_read: int = 0
+    error: str = None       # 실패한 문장의 에러 메세지
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class Profiler:
+    """
+    records phases of statements run by Engine while PROFILING is set,
+    keeping profiles of last PROFILING_HISTORY_SIZE statements.
+    """
+    def __init__(self, db_handler, history_size = 15):
+        self.db_handler = db_handler
+        self.history = deque(maxlen=history_size)
+        self.hooks = []
+        self.last_query_id = 0
+        self.current = None     # 기록 중인 QueryProfile
+        self._keep = True
+        self._stack = []        # 열려 있는 단계마다 [Phase, 안쪽 단계의 wall, cpu, bytes 합]
+
+    def add_hook(self, hook):
+        """hook(QueryProfile) is called after each profiled statement, also for failed one"""
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook):
+        self.hooks.remove(hook)
+
+    def get(self, query_id = None) -> QueryProfile:
+        """profile of query_id, or of last profiled statement"""
+        if query_id is None:
+            if not self.history:
+                raise Exceptions.NoSuchProfile()
+            return self.history[-1]
+        for profile in self.history:
+            if profile.query_id == query_id:
+                return profile
+        raise Exceptions.NoSuchProfile(query_id)
+
+
+    def start(self, statement):
+        self.last_query_id += 1
+        self.current = QueryProfile(self.last_query_id, " ".join(statement.split()))
+        self._stack = []
+        self._keep = True
+        self._start = self._now()
+
+    def discard(self):
+        """do not keep current profile. used by SHOW PROFILE, not to push profiles it shows out of history"""
+        self._keep = False
+
+    def finish(self, history_size, error = None):
+        profile = self.current
+        if profile is None:
+            return
+        self.current = None
+        if not self._keep:
+            self.last_query_id -= 1
+            return
+
+        profile.wall, profile.cpu, profile.bytes_read = (end - start for end, start in zip(self._now(), self._start))
+        profile.error = error
+        if self.history.maxlen != history_size:
+            self.history = deque(self.history, maxlen=history_size)
+        self.history.append(profile)
+
+        # 외부로 내보내는 함수의 실패가 문장의 결과를 바꾸지 않게 한다.
+        for hook in self.hooks:
+            try:
+                hook(profile)
+            except Exception as e:
+                print(f"profiling hook has failed: {e}", file=sys.stderr)
+
+    @contextmanager
+    def phase(self, name):
+        """measure block as phase name. yields the Phase to set rows_in / rows_out"""
+        frame = [Phase(name), 0.0, 0.0, 0]
+        self._stack.append(frame)
+        start = self._now()
+        try:
+            yield frame[0]
+        finally:
+            self._stack.pop()
+            self._add(frame[0], [end - start for end, start in zip(self._now(), start)], frame[1:])
+
+    def set_rows(self, rows_in = None, rows_out = None):
+        """set rows of innermost open phase"""
+        if self._stack:
+            phase = self._stack[-1][0]
+            phase.rows_in = rows_in if rows_in is not None else phase.rows_in
+            phase.rows_out = rows_out if rows_out is not None else phase.rows_out
+
+    def run_plan(self, plan, write) -> int:
+        """run SELECT plan by write(plan), recording each operator and output as phases"""
+        Operators.measure(plan, lambda: self.db_handler.bytes_read)
+        with self.phase("output") as output:
+            count = write(plan)
+            for operator in self._operators(plan):
+                self._add(*self._operator_phase(operator))
+        output.rows_in, output.rows_out = plan.actual.rows, count
+        return count
+
+
+    def _now(self):
+        return perf_counter(), process_time(), self.db_handler.bytes_read
+
+    # 단계를 기록하고, 안쪽 단계를 뺀 값을 열려 있는 모든 바깥 단계의 안쪽 합에 더한다.
+    # total, inner는 (wall, cpu, bytes)로, 안쪽 단계를 포함한 값과 안쪽 단계들의 합
+    def _add(self, phase, total, inner):
+        values = [value - inner_value for value, inner_value in zip(total, inner)]
+        phase.wall, phase.cpu, phase.bytes_read = values
+        self.current.phases.append(phase)
+        for outer in self._stack:
+            for i, value in enumerate(values, 1):
+                outer[i] += value
+
+    # 자식 연산자부터 순회
+    def _operators(self, plan):
+        for child in plan.children:
+            yield from self._operators(child)
+        yield plan
+
+    @staticmethod
+    def _operator_phase(operator):
+        actual = operator.actual
+        children = [child.actual for child in operator.children]
+        name = operator.name
+        if hasattr(operator, "table_name"):
+            name += f" on {operator.table_name}"
+
+        phase = Phase(name, rows_out=actual.rows)
+        if children:
+            phase.rows_in = sum(child.rows for child in children)
+        total = (actual.time, actual.cpu_time, actual.bytes_read)
+        inner = [sum(values) for values in zip(*((child.time, child.cpu_time, child.bytes_read) for child in children))] or [0.0, 0.0, 0]
+        return phase, total, inner
+
+
+def phase(profiler, name):
+    """profiler.phase(name), or nothing if statement is not profiled"""
+    if profiler is None or profiler.current is None:
+        return nullcontext()
+    return profiler.phase(name)
+
+
+def format_profile(profile) -> tuple[list, list]:
+    """(headers, rows) of SHOW PROFILE"""
+    headers = ["PHASE", "WALL_MS", "CPU_MS", "ROWS_IN", "ROWS_OUT", "BYTES_READ"]
+    rows = [_phase_row(item) for item in profile.phases]
+    rows.append(_phase_row(Phase("total", profile.wall, profile.cpu, bytes_read=profile.bytes_read)))
+    return headers, rows
+
+
+def format_history(history) -> tuple[list, list]:
+    """(headers, rows) of SHOW PROFILES"""
+    headers = ["QUERY_ID", "WALL_MS", "STATUS", "QUERY"]
+    rows = [[profile.query_id, f"{profile.wall * 1000:.3f}", "ERROR" if profile.error else "OK", profile.statement]
+            for profile in history]
+    return headers, rows
+
+
+def _phase_row(phase):
+    return [
+        phase.name,
+        f"{phase.wall * 1000:.3f}",
+        f"{phase.cpu * 1000:.3f}",
+        "-" if phase.rows_in is None else phase.rows_in,
+        "-" if phase.rows_out is None else phase.rows_out,
+        phase.bytes_read,
+    ]
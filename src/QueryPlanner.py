@@ -0,0 +1,522 @@
+from datetime import date
+from src import KeyCodec, RecordEvaluator, Statistics
+from src.Operators import (TableScan, ParallelScan, KeyLookup, IndexScan, Filter, NestedLoopJoin, HashJoin, Sort, TopN, Limit, Project,
+                           HashAggregate, HashDistinct, TableCount)
+
+
+class QueryPlanner:
+    """
+    SELECT / DELETE 에서 레코드를 읽는 방법(실행 계획)을 정한다.
+    이름 해석과 조건 컴파일은 MyTransformer, RecordEvaluator가 끝낸 상태로 넘겨받는다.
+    """
+    def __init__(self, db_handler, settings):
+        self.db_handler = db_handler
+        self.settings = settings
+
+
+    def plan_select(self, from_tables, join_steps, where_evaluator, order_by, select_indices, limit = None, aggregation = None, distinct = False):
+        """
+        from_tables:    tables in FROM clause
+        join_steps:     (join_table, left_column, join_column, step_column, evaluator) for each JOIN,
+                        left_column / step_column are columns of records before / after the join
+        where_evaluator: RecordEvaluator of WHERE clause or None
+        order_by:       (column index, descending) or None
+        select_indices: column index of each selected column
+        limit:          (count, offset) or None
+        aggregation:    (group_indices, aggregates, having_evaluator) for GROUP BY and aggregate functions, or None.
+                        aggregates are (function, column index or None for COUNT(*)).
+                        group_indices and aggregates refer to joined records, and then
+                        order_by, select_indices and HAVING refer to aggregated records (group values + aggregate values)
+        distinct:       SELECT DISTINCT. order_by column must be one of select_indices
+        """
+        # WHERE, JOIN, GROUP BY가 없는 COUNT(*)는 레코드를 읽지 않고 Berkeley DB 통계로 센다.
+        if aggregation and len(from_tables) == 1 and not join_steps and not where_evaluator \
+                and not aggregation[0] and aggregation[1] == [("COUNT", None)]:
+            plan = TableCount(self.db_handler, from_tables[0])
+            columns = ["COUNT(*)"]
+        else:
+            plan, columns, position = self._plan_from(from_tables, join_steps, where_evaluator)
+
+            # 테이블 순서가 바뀌었으면 컬럼 위치를 바꿔 준다.
+            if position and aggregation:
+                group_indices, aggregates, having = aggregation
+                aggregation = ([position[i] for i in group_indices],
+                               [(function, None if i is None else position[i]) for function, i in aggregates], having)
+            elif position:
+                select_indices = [position[i] for i in select_indices]
+                if order_by:
+                    order_by = (position[order_by[0]], order_by[1])
+
+            if aggregation:
+                group_indices, aggregates, _ = aggregation
+                plan = HashAggregate(plan, group_indices, aggregates, self.settings["HASH_BUFFER_ROWS"])
+                texts = [f"{function}({'*' if i is None else columns[i]})" for function, i in aggregates]
+                plan.detail = ", ".join(texts)
+                if group_indices:
+                    plan.detail = f"group by {', '.join(columns[i] for i in group_indices)}: {plan.detail}"
+                columns = [columns[i] for i in group_indices] + texts
+
+        if aggregation and aggregation[2]:
+            plan = self._filter(plan, aggregation[2].evaluate, aggregation[2].condition)
+
+        # DISTINCT는 선택한 컬럼들로 중복을 없애므로 먼저 project한다.
+        if distinct:
+            plan = Project(plan, select_indices)
+            plan.detail = ", ".join(columns[i] for i in select_indices)
+            plan = HashDistinct(plan, self.settings["HASH_BUFFER_ROWS"])
+            if order_by:
+                order_by = (select_indices.index(order_by[0]), order_by[1])
+            columns = [columns[i] for i in select_indices]
+            select_indices = None
+
+        # LIMIT이 있으면 정렬은 필요한 개수만 heap에 유지하고, 정렬이 없으면 필요한 개수를 읽은 뒤 멈춘다.
+        # 병렬 순회면 worker들이 정렬한(LIMIT이 있으면 필요한 개수만 남긴) 결과를 병합한다.
+        if order_by and isinstance(plan, ParallelScan):
+            plan.sort = order_by
+            sort_detail = f"merge sorted by {columns[order_by[0]]} {'DESC' if order_by[1] else 'ASC'}"
+            plan.detail = f"{plan.detail}, {sort_detail}" if plan.detail else sort_detail
+            if limit:
+                plan.keep = limit[0] + limit[1]
+                plan = Limit(plan, *limit)
+                plan.detail = f"{limit[0]} rows offset {limit[1]}"
+        elif order_by and limit:
+            plan = TopN(plan, *order_by, *limit)
+            plan.detail = f"{columns[order_by[0]]} {'DESC' if order_by[1] else 'ASC'}, {limit[0]} rows offset {limit[1]}"
+        elif order_by:
+            plan = Sort(plan, *order_by, self.settings["SORT_BUFFER_ROWS"])
+            plan.detail = f"{columns[order_by[0]]} {'DESC' if order_by[1] else 'ASC'}"
+        elif limit:
+            plan = Limit(plan, *limit)
+            plan.detail = f"{limit[0]} rows offset {limit[1]}"
+
+        if select_indices is not None:
+            plan = Project(plan, select_indices)
+            plan.detail = ", ".join(columns[i] for i in select_indices)
+        return plan
+
+    # FROM, JOIN, WHERE로 레코드를 만드는 실행 계획.
+    # (계획, 계획이 내보내는 레코드의 컬럼들, 테이블 순서가 바뀌었으면 원래 컬럼 위치 -> 바뀐 위치 목록)
+    def _plan_from(self, from_tables, join_steps, where_evaluator):
+        where_conjuncts = []
+        if where_evaluator:
+            where_conjuncts = RecordEvaluator.conjuncts(where_evaluator.condition)
+        table_list = from_tables + [step[0] for step in join_steps]
+        on_conjuncts = {step[0]: RecordEvaluator.conjuncts(step[4].condition) for step in join_steps}
+
+        # WHERE의 AND 조건들은 필요한 테이블을 모두 읽은 직후에 확인하고(predicate pushdown),
+        # 두 입력을 잇는 '=' 조건은 hash join에 사용한다.
+        # 평가 중 에러가 날 수 있는 조건이 있으면 에러가 나는 레코드가 달라지지 않도록 마지막에 한 번에 확인한다.
+        conditions = [where_evaluator.condition] if where_evaluator else []
+        conditions += [step[4].condition for step in join_steps]
+        pushdown = len(set(table_list)) == len(table_list) and all(self._comparable(condition) for condition in conditions)
+
+        order = table_list
+        pending = []
+        if pushdown:
+            # JOIN은 모두 inner join이므로 ON 조건도 WHERE 조건과 같이 다룰 수 있고, 테이블 순서를 바꿀 수 있다.
+            pending = where_conjuncts + [conjunct for table_name in table_list[1:] for conjunct in on_conjuncts.get(table_name, [])]
+            on_conjuncts = {}
+            order = self._join_order(table_list, pending)
+
+        plan = None
+        columns = []    # plan이 내보내는 레코드의 컬럼들
+        for table_name in order:
+            access_conjuncts = list(pending) if pushdown else where_conjuncts + on_conjuncts.get(table_name, [])
+            scan, predicate = self._plan_table(table_name, access_conjuncts, table_list, pending)
+            table_columns = list(self.db_handler.get_table_metadata(table_name).full_names)
+
+            if plan is None:
+                plan = scan
+            else:
+                join_conjuncts = on_conjuncts.get(table_name, []) + self._take_conjuncts(pending, self._tables(columns + table_columns))
+                plan = self._plan_join(plan, columns, scan, table_name, table_columns, join_conjuncts, predicate)
+            columns += table_columns
+
+        if where_evaluator and not pushdown:
+            plan = self._filter(plan, where_evaluator.evaluate, where_evaluator.condition)
+
+        position = None
+        if order != table_list:
+            result_column = [name for table_name in table_list for name in self.db_handler.get_table_metadata(table_name).full_names]
+            position = [columns.index(name) for name in result_column]
+        return plan, columns, position
+
+    # EXPLAIN에 조건이 표시되는 Filter
+    def _filter(self, child, predicate, condition):
+        plan = Filter(child, predicate)
+        plan.detail = RecordEvaluator.condition_text(condition)
+        return plan
+
+    # join 순서를 정하는 함수. 모든 테이블에 ANALYZE 통계가 있을 때만 순서를 바꾼다.
+    def _join_order(self, table_list, conjuncts):
+        """
+        greedy ordering: start with the table with least estimated records after its own conditions,
+        then repeatedly add the table which makes the smallest intermediate result.
+        tables connected to joined tables by some condition are preferred to avoid cartesian product.
+        """
+        statistics = {table_name: self.db_handler.get_table_metadata(table_name).statistics for table_name in table_list}
+        if len(table_list) < 2 or None in statistics.values():
+            return table_list
+
+        conjunct_tables = [(conjunct, self._tables(self._condition_columns(conjunct))) for conjunct in conjuncts]
+        estimates = {}
+        for table_name in table_list:
+            selectivity = 1.0
+            for conjunct, tables in conjunct_tables:
+                if tables == {table_name}:
+                    selectivity *= statistics[table_name].selectivity(conjunct)
+            estimates[table_name] = statistics[table_name].row_count * selectivity
+
+        order = [min(table_list, key=lambda table_name: estimates[table_name])]
+        size = estimates[order[0]]
+        while len(order) < len(table_list):
+            best = None
+            for table_name in table_list:
+                if table_name in order:
+                    continue
+
+                joined = set(order) | {table_name}
+                result = size * estimates[table_name]
+                connected = False
+                for conjunct, tables in conjunct_tables:
+                    if table_name in tables and len(tables) > 1 and tables <= joined:
+                        result *= self._join_selectivity(conjunct, statistics)
+                        connected = True
+
+                if best is None or (not connected, result) < best[0]:
+                    best = ((not connected, result), table_name)
+
+            (_, size), table_name = best
+            order.append(table_name)
+        return order
+
+    # 두 테이블 이상을 참조하는 조건의 selectivity. 'a.x = b.y'는 1 / max(distinct(a.x), distinct(b.y))
+    def _join_selectivity(self, conjunct, statistics):
+        if conjunct[0] == "compare" and conjunct[1] == "=" and conjunct[2][0] == "column" and conjunct[3][0] == "column":
+            left, right = conjunct[2][1], conjunct[3][1]
+            distinct = max(statistics[left.split(".")[0]].column(left).distinct, statistics[right.split(".")[0]].column(right).distinct)
+            return 1.0 / max(distinct, 1)
+        return Statistics.DEFAULT_SELECTIVITY
+
+    # 테이블을 읽는 연산자와, pending에서 가져온 이 테이블만 참조하는 조건(없으면 None)
+    def _plan_table(self, table_name, conjuncts, table_list, pending):
+        scan = self.plan_scan(table_name, conjuncts, table_list)
+
+        local = self._take_conjuncts(pending, {table_name})
+        if isinstance(scan, TableScan) and self._parallel(table_name, table_list):
+            scan = ParallelScan(self.db_handler, table_name, self.settings["PARALLEL_WORKERS"], ("and", local) if local else None)
+            if local:
+                scan.detail = RecordEvaluator.condition_text(("and", local))
+            return scan, None
+
+        if not local:
+            return scan, None
+
+        column_index = {name: i for i, name in enumerate(self.db_handler.get_table_metadata(table_name).full_names)}
+        predicate = RecordEvaluator.compile_condition(("and", local), column_index)
+        return self._filter(scan, predicate, ("and", local)), predicate
+
+    # 테이블 하나만 읽는 SELECT에서 테이블 전체를 worker 프로세스들로 나눠 읽을지 정하는 함수.
+    # BEGIN한 트랜잭션 안에서는 worker가 트랜잭션에서 쓴 값을 볼 수 없으므로 나누지 않는다.
+    # 테이블을 나누는 경계 키는 ANALYZE 통계에 있으므로 ANALYZE한 테이블만 나눈다.
+    def _parallel(self, table_name, table_list):
+        statistics = self.db_handler.get_table_metadata(table_name).statistics
+        return (len(table_list) == 1 and self.settings["PARALLEL_WORKERS"] > 1 and self.db_handler.txn is None
+                and statistics is not None and bool(statistics.scan_keys)
+                and statistics.row_count >= self.settings["PARALLEL_SCAN_MIN_ROWS"])
+
+    # 두 입력의 join. equi-join 조건이 있으면 hash join, 없으면 cartesian product 후 조건 확인
+    def _plan_join(self, left, left_column, right, right_table, right_column, conjuncts, right_predicate):
+        """
+        conjuncts are conditions to check on joined records.
+        right_predicate is condition already applied to right input, also applied to records found by lookup.
+        """
+        step_column = left_column + right_column
+        column_index = {name: i for i, name in enumerate(step_column)}
+
+        equi_keys = None
+        if right_table not in self._tables(left_column):
+            equi_keys = self._find_equi_join_keys(("and", conjuncts), left_column, right_column)
+
+        if not equi_keys or not equi_keys[0]:
+            if not conjuncts:
+                return NestedLoopJoin(left, right)
+            plan = NestedLoopJoin(left, right, RecordEvaluator.compile_condition(("and", conjuncts), column_index))
+            plan.detail = RecordEvaluator.condition_text(("and", conjuncts))
+            return plan
+
+        left_keys, right_keys, residual = equi_keys
+
+        # 왼쪽 입력이 작으면 오른쪽 테이블 전체를 읽지 않고 primary key / 인덱스로 짝을 찾는다.
+        lookup = lookup_limit = None
+        access = self._join_access_path(right_table, [right_column[k].split(".")[1] for k in right_keys])
+        if access:
+            lookup = self._join_lookup(right_table, access, right_predicate)
+            lookup_limit = lambda table_name=right_table: self._row_count(table_name)
+
+        plan = HashJoin(left, right, left_keys, right_keys, lookup, lookup_limit)
+        plan.detail = " AND ".join(f"{left_column[i]} = {right_column[j]}" for i, j in zip(left_keys, right_keys))
+        if access:
+            kind, index_name, _ = access
+            plan.detail += f" (small left input: lookup by {'primary key' if kind == 'primary_key' else index_name} of {right_table})"
+        if residual:
+            plan = self._filter(plan, RecordEvaluator.compile_condition(("and", residual), column_index), ("and", residual))
+        return plan
+
+    # 테이블의 레코드 수. ANALYZE 통계가 있으면 통계를 사용한다.
+    def _row_count(self, table_name):
+        statistics = self.db_handler.get_table_metadata(table_name).statistics
+        if statistics is not None:
+            return statistics.row_count
+        return self.db_handler.table_count(table_name)
+
+    # pending에서 tables에 속한 테이블만 참조하는 조건들을 꺼내는 함수.
+    def _take_conjuncts(self, pending, tables):
+        taken = [conjunct for conjunct in pending if self._tables(self._condition_columns(conjunct)) <= tables]
+        pending[:] = [conjunct for conjunct in pending if conjunct not in taken]
+        return taken
+
+    def _tables(self, columns):
+        return {column.split(".")[0] for column in columns}
+
+    # 조건이 참조하는 컬럼들의 full name
+    def _condition_columns(self, condition):
+        kind = condition[0]
+        if kind in ("or", "and"):
+            return [column for child in condition[1] for column in self._condition_columns(child)]
+        if kind == "not":
+            return self._condition_columns(condition[1])
+        if kind == "null":
+            return [condition[1]]
+        if kind == "compare":
+            return [operand[1] for operand in condition[2:] if operand[0] == "column"]
+        return []
+
+    # 조건의 모든 비교가 타입이 맞아 평가 중 IncomparableError가 날 수 없는지 확인하는 함수.
+    def _comparable(self, condition):
+        kind = condition[0]
+        if kind in ("or", "and"):
+            return all(self._comparable(child) for child in condition[1])
+        if kind == "not":
+            return self._comparable(condition[1])
+        if kind != "compare":
+            return True
+
+        types = []
+        for operand in condition[2:]:
+            if operand[0] == "column":
+                table_name, col_name = operand[1].split(".")
+                types.append(self.db_handler.get_table_metadata(table_name)["columns"][col_name]["data_type"][0])
+            elif operand[1] is None:
+                return True   # NULL과의 비교는 항상 False
+            else:
+                types.append({int: "I", str: "C", date: "D"}.get(type(operand[1])))
+
+        if types[0] != types[1]:
+            return False
+        return types[0] != "C" or condition[1] in ("=", "!=")
+
+
+    # 테이블의 레코드를 읽는 연산자.
+    # primary key '=' 조건이 있으면 키로 바로 읽고, 인덱스를 쓸 수 있으면 인덱스 범위만 읽고, 없으면 전체를 순회한다.
+    def plan_scan(self, table_name, conjuncts, table_list, with_key = False):
+        predicates = None
+        if table_list.count(table_name) == 1:
+            predicates = self._table_predicates(table_name, conjuncts)
+        if not predicates:
+            return TableScan(self.db_handler, table_name, with_key)
+
+        meta = self.db_handler.get_table_metadata(table_name)
+        key = self._primary_key_lookup(meta, predicates)
+        if key is not None:
+            return KeyLookup(self.db_handler, table_name, key, with_key)
+
+        index = self._index_lookup(meta, predicates)
+        if index is not None:
+            return IndexScan(self.db_handler, table_name, *index, with_key)
+
+        return TableScan(self.db_handler, table_name, with_key)
+
+
+    # UPDATE, DELETE에서 사용. primary key나 인덱스로 찾은 레코드 키들, 테이블 전체를 봐야 하면 None
+    def candidate_keys(self, table_name, conjuncts, table_list):
+        """keys are read before records are changed, so that changed index entries are not visited again"""
+        scan = self.plan_scan(table_name, conjuncts, table_list)
+        if isinstance(scan, KeyLookup):
+            return [scan.key]
+        if isinstance(scan, IndexScan):
+            return list(self.db_handler.index_scan(scan.index_name, scan.prefix, scan.lower, scan.upper))
+        return None
+
+
+    # 값이 컬럼의 데이터 타입과 같은 종류인지 확인하는 함수.
+    def _value_matches_type(self, value, data_type):
+        if data_type == "INT":
+            return type(value) == int
+        elif data_type == "DATE":
+            return type(value) == date
+        return type(value) == str
+
+    # WHERE의 AND 조건들 중 한 테이블의 '컬럼 op 값' 형태의 조건을 (컬럼, op, 값)으로 모으는 함수.
+    def _table_predicates(self, table_name, conjuncts):
+        """
+        return None if some condition compares incomparable value,
+        then the table should be scanned so that evaluation raises the error.
+        """
+        meta = self.db_handler.get_table_metadata(table_name)
+        predicates = []
+
+        for conjunct in conjuncts:
+            if conjunct[0] != "compare":
+                continue
+
+            op, column, value = conjunct[1:]
+            if column[0] == "value":
+                op = RecordEvaluator.SWAPPED_OPERATORS[op]
+                column, value = value, column
+            if column[0] != "column" or value[0] != "value":
+                continue
+
+            col_table, col_name = column[1].split(".")
+            if col_table != table_name:
+                continue
+
+            data_type = meta["columns"][col_name]["data_type"]
+            if not self._value_matches_type(value[1], data_type) or (data_type[0] == "C" and op not in ("=", "!=")):
+                return None
+            predicates.append((col_name, op, value[1]))
+
+        return predicates
+
+    # primary key 전체에 대한 '=' 조건으로 레코드 키를 만드는 함수. 불가능하면 None
+    def _primary_key_lookup(self, meta, predicates):
+        if not meta.keyed_by_primary_key:
+            return None
+
+        values = {}
+        for col_name, op, value in predicates:
+            if op == "=" and col_name in meta["primary_keys"]:
+                values.setdefault(col_name, value)
+
+        if len(values) != len(meta["primary_keys"]):
+            return None
+        return self.db_handler.primary_key(meta, [values[col] for col in meta["primary_keys"]])
+
+    # 사용할 인덱스와 범위를 고르는 함수. 앞쪽 컬럼들의 '=' 조건과 다음 컬럼의 범위 조건을 사용한다.
+    def _index_lookup(self, meta, predicates):
+        """
+        return (index_name, prefix, lower, upper) for DatabaseHandler.index_scan, or None.
+        index with more '=' columns is preferred.
+        """
+        best = None
+        for index_name, columns in meta.indexes.items():
+            prefix = []
+            for col in columns:
+                values = [value for col_name, op, value in predicates if col_name == col and op == "="]
+                if not values:
+                    break
+                prefix.append(values[0])
+
+            lower = upper = None
+            if len(prefix) < len(columns):
+                col = columns[len(prefix)]
+                for col_name, op, value in predicates:
+                    if col_name != col:
+                        continue
+                    if op in (">", ">=") and (lower is None or value > lower[0] or (value == lower[0] and op == ">")):
+                        lower = (value, op == ">=")
+                    elif op in ("<", "<=") and (upper is None or value < upper[0] or (value == upper[0] and op == "<")):
+                        upper = (value, op == "<=")
+
+            score = (len(prefix), lower is not None or upper is not None)
+            if score > (0, False) and (best is None or score > best[0]):
+                best = (score, index_name, prefix, lower, upper)
+
+        if best is None:
+            return None
+
+        _, index_name, prefix, lower, upper = best
+        if lower:
+            lower = (KeyCodec.encode_value(lower[0]), lower[1])
+        if upper:
+            upper = (KeyCodec.encode_value(upper[0]), upper[1])
+        return index_name, KeyCodec.encode_key(prefix), lower, upper
+
+
+    # ON 조건에서 두 입력을 잇는 '=' 조건(equi-join)을 찾는 함수.
+    def _find_equi_join_keys(self, condition, left_column, join_column):
+        """
+        condition is resolved condition of RecordEvaluator.
+        return (left_keys, right_keys, residual) where keys are column index of each input
+        and residual is list of remaining conjuncts.
+        return None if condition cannot be handled by hash join.
+        """
+        left_keys, right_keys, residual = [], [], []
+
+        for conjunct in RecordEvaluator.conjuncts(condition):
+            if conjunct[0] != "compare" or conjunct[1] != "=" or conjunct[2][0] != "column" or conjunct[3][0] != "column":
+                residual.append(conjunct)
+                continue
+
+            left_name, right_name = conjunct[2][1], conjunct[3][1]
+            if left_name in join_column and right_name in left_column:
+                left_name, right_name = right_name, left_name
+            if left_name not in left_column or right_name not in join_column:
+                residual.append(conjunct)
+                continue
+
+            # 타입이 다르면 IncomparableError가 나야 하므로 기존 방식으로 처리
+            left_table, left_col = left_name.split(".")
+            right_table, right_col = right_name.split(".")
+            left_type = self.db_handler.get_table_metadata(left_table)["columns"][left_col]["data_type"]
+            right_type = self.db_handler.get_table_metadata(right_table)["columns"][right_col]["data_type"]
+            if left_type[0] != right_type[0]:
+                return None
+
+            left_keys.append(left_column.index(left_name))
+            right_keys.append(join_column.index(right_name))
+
+        return left_keys, right_keys, residual
+
+    # equi-join에서 오른쪽 테이블을 primary key나 인덱스로 찾을 수 있는지 확인하는 함수.
+    def _join_access_path(self, join_table, right_columns):
+        """
+        right_columns is list of column names of join table compared with '=' in ON condition.
+        return ("primary_key", None, positions) or ("index", index_name, positions),
+        where positions are index in right_columns of the key columns. None if not possible.
+        """
+        meta = self.db_handler.get_table_metadata(join_table)
+        if meta.keyed_by_primary_key and all(col in right_columns for col in meta["primary_keys"]):
+            return ("primary_key", None, [right_columns.index(col) for col in meta["primary_keys"]])
+
+        best = None
+        for index_name, columns in meta.indexes.items():
+            positions = []
+            for col in columns:
+                if col not in right_columns:
+                    break
+                positions.append(right_columns.index(col))
+            if positions and (best is None or len(positions) > len(best[2])):
+                best = ("index", index_name, positions)
+        return best
+
+    def _join_lookup(self, join_table, access, predicate = None):
+        """
+        return function that generates records of join table whose key columns equal to given key.
+        if predicate is given, only records satisfying it are generated.
+        """
+        kind, index_name, positions = access
+        meta = self.db_handler.get_table_metadata(join_table)
+
+        def lookup(key):
+            values = [key[i] for i in positions]
+            if kind == "primary_key":
+                keys = [self.db_handler.primary_key(meta, values)]
+            else:
+                keys = self.db_handler.index_scan(index_name, KeyCodec.encode_key(values))
+
+            for record_key in keys:
+                record = self.db_handler.table_get(join_table, record_key)
+                if record is not None and (predicate is None or predicate(record)):
+                    yield record
+        return lookup
@@ -0,0 +1,107 @@
+import json
+import struct
+from datetime import date, datetime
+
+# 레코드를 저장하는 바이너리 형식 (format version 1)
+#   1 byte          : FORMAT_MARK (0x01). 예전 JSON 레코드는 '['로 시작하므로 구분된다.
+#   null bitmap     : 컬럼 수 / 8 bytes (올림). i번째 비트가 1이면 i번째 컬럼이 NULL
+#   NULL이 아닌 컬럼 값들을 순서대로
+#       INT     : 8 bytes signed
+#       DATE    : 4 bytes ordinal
+#       CHAR(n) : 2 bytes 길이 + utf-8 (n이 커서 길이가 2 bytes를 넘을 수 있으면 4 bytes 길이)
+
+FORMAT_VERSION = 1
+FORMAT_MARK = 0x01
+
+INT_MIN = -(1 << 63)
+INT_MAX = (1 << 63) - 1
+
+_INT = struct.Struct("<q")
+_DATE = struct.Struct("<i")
+_SHORT_LENGTH = struct.Struct("<H")
+_LONG_LENGTH = struct.Struct("<I")
+
+
+class RecordCodec:
+    """encode / decode records of one table, driven by its metadata"""
+    def __init__(self, meta):
+        self.types = [meta["columns"][col]["data_type"] for col in meta["column_order"]]
+        self.null_bytes = (len(self.types) + 7) // 8
+        self.header_size = 1 + self.null_bytes
+        self.date_positions = [i for i, data_type in enumerate(self.types) if data_type == "DATE"]
+
+        # 컬럼별 (종류, struct). 종류는 0: INT, 1: DATE, 2: CHAR
+        self.fields = []
+        for data_type in self.types:
+            if data_type == "INT":
+                self.fields.append((0, _INT))
+            elif data_type == "DATE":
+                self.fields.append((1, _DATE))
+            else:
+                length = int(data_type[5:-1])
+                self.fields.append((2, _SHORT_LENGTH if length * 4 <= 0xFFFF else _LONG_LENGTH))
+
+        # NULL이 없을 때 한 번에 읽을 수 있는 형식 (CHAR 컬럼이 없는 테이블)
+        self.fixed = None
+        if all(kind != 2 for kind, _ in self.fields):
+            self.fixed = struct.Struct("<" + "".join("q" if kind == 0 else "i" for kind, _ in self.fields))
+
+
+    def encode(self, record) -> bytes:
+        nulls = 0
+        body = []
+        for i, ((kind, packer), value) in enumerate(zip(self.fields, record)):
+            if value is None:
+                nulls |= 1 << i
+            elif kind == 0:
+                body.append(packer.pack(value))
+            elif kind == 1:
+                if type(value) == str:
+                    value = datetime.strptime(value, '%Y-%m-%d').date()
+                body.append(packer.pack(value.toordinal()))
+            else:
+                encoded = value.encode()
+                body.append(packer.pack(len(encoded)))
+                body.append(encoded)
+
+        return bytes([FORMAT_MARK]) + nulls.to_bytes(self.null_bytes, "little") + b"".join(body)
+
+
+    def decode(self, data) -> list:
+        if data[0] != FORMAT_MARK:
+            return self.decode_json(data)
+
+        offset = self.header_size
+        nulls = int.from_bytes(data[1:offset], "little")
+
+        if nulls == 0 and self.fixed is not None:
+            record = list(self.fixed.unpack_from(data, offset))
+            for i in self.date_positions:
+                record[i] = date.fromordinal(record[i])
+            return record
+
+        record = []
+        for i, (kind, packer) in enumerate(self.fields):
+            if nulls >> i & 1:
+                record.append(None)
+            elif kind == 0:
+                record.append(packer.unpack_from(data, offset)[0])
+                offset += 8
+            elif kind == 1:
+                record.append(date.fromordinal(packer.unpack_from(data, offset)[0]))
+                offset += 4
+            else:
+                length = packer.unpack_from(data, offset)[0]
+                offset += packer.size
+                record.append(data[offset:offset + length].decode())
+                offset += length
+        return record
+
+
+    def decode_json(self, data) -> list:
+        """decode record stored in JSON by earlier version"""
+        record = json.loads(data.decode())
+        for i in self.date_positions:
+            if record[i] is not None:
+                record[i] = datetime.strptime(record[i], '%Y-%m-%d').date()
+        return record
@@ -1,5 +1,8 @@
+import copy
 from dataclasses import dataclass
 from datetime import datetime
+import operator
+import re
 from src import Exceptions
 
 @dataclass
@@ -12,17 +15,47 @@ class ColumnInfo:
 
     @classmethod
     def parse_column_name(cls, full_name: str) -> tuple:
-        parts = full_name.split('.')
-        return parts[0], parts[1]
+        table_name, _, column_name = full_name.partition('.')
+        return table_name, column_name
+
+
+COMPARISON_OPERATORS = {
+    "=": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+# 피연산자의 좌우를 바꿀 때 대응되는 연산자
+SWAPPED_OPERATORS = {"=": "=", "!=": "!=", "<": ">", "<=": ">=", ">": "<", ">=": "<="}
 
 
 class RecordEvaluator:
-    def __init__(self, column_names, table_list, condition_tree, clause_name):
+    """
+    WHERE / ON 조건 트리를 한 번만 해석해 파이썬 함수로 컴파일한다.
+    컬럼 참조와 리터럴은 생성 시점에 해석되므로 존재하지 않거나 모호한 컬럼은 바로 에러가 나고,
+    레코드마다의 평가는 evaluate(record) 함수 호출 한 번이다.
+
+    해석된 조건(self.condition)은 다음과 같은 tuple 형태로 표현된다.
+        ("or", [cond, ...]), ("and", [cond, ...]), ("not", cond), ("true",)
+        ("compare", op, operand, operand)       operand: ("column", full_name) | ("value", value) | ("param", number)
+        ("null", full_name, is_not)
+
+    '?' 파라미터가 있는 조건은 bind(params)로 값을 채운 뒤에 평가한다.
+
+    HAVING처럼 집계 함수를 쓸 수 있는 조건은 aggregate_column(aggregate 파싱 트리)으로
+    집계 값이 있는 컬럼 이름(column_names 중 하나)을 받는다. 없으면 집계 함수는 에러다.
+    """
+    def __init__(self, column_names, table_list, condition_tree, clause_name, aggregate_column = None):
         self.columns = {}
         self.table_list = table_list
         self.condition_tree = condition_tree
         self.clause_name = clause_name
-        
+        self.aggregate_column = aggregate_column
+        self.has_parameters = False
+
         for i, full_name in enumerate(column_names):
             table_name, column_name = ColumnInfo.parse_column_name(full_name)
             column_info = ColumnInfo(
@@ -33,201 +66,323 @@ class RecordEvaluator:
             )
             self.columns[full_name] = column_info
 
+        self.column_index = {name: info.index for name, info in self.columns.items()}
+        self.condition = self._build_node(condition_tree)
+        self.evaluate = None if self.has_parameters else compile_condition(self.condition, self.column_index)
+
 
     def evaluate_record(self, record) -> bool:
         """where condition evaluate"""
-        return self._evaluate_node(self.condition_tree, record)
+        return self.evaluate(record)
+
+    def bind(self, params):
+        """return evaluator whose '?' parameters are replaced by params"""
+        if not self.has_parameters:
+            return self
 
+        bound = copy.copy(self)
+        bound.has_parameters = False
+        bound.condition = bind_condition(self.condition, params)
+        bound.evaluate = compile_condition(bound.condition, self.column_index)
+        return bound
 
 
-    def _evaluate_node(self, node, record) -> bool:
+
+    def _build_node(self, node):
+        """파싱 트리를 해석된 조건으로 변환"""
         if not hasattr(node, 'data'):
-            return True
-        
+            return ("true",)
+
         node_type = node.data
-        
-        if node_type == 'where_clause':
-            return self._evaluate_node(node.children[1], record)
-            
+
+        if node_type in ('where_clause', 'having_clause'):
+            return self._build_node(node.children[1])
+
         elif node_type == 'boolean_expr':
-            return self._evaluate_boolean_expr(node.children, record)
-            
+            # or
+            terms = [self._build_node(child) for child in node.children[::2]]
+            return terms[0] if len(terms) == 1 else ("or", terms)
+
         elif node_type == 'boolean_term':
-            return self._evaluate_boolean_term(node.children, record)
-            
+            # and
+            factors = [self._build_node(child) for child in node.children[::2]]
+            return factors[0] if len(factors) == 1 else ("and", factors)
+
         elif node_type == 'boolean_factor':
             has_not = len(node.children) > 1 and str(node.children[0]).upper() == 'NOT'
-            result = self._evaluate_node(node.children[-1], record)
-            return not result if has_not else result
-            
+            result = self._build_node(node.children[-1])
+            return ("not", result) if has_not else result
+
         elif node_type == 'boolean_test':
-            return self._evaluate_node(node.children[0], record)
-            
-        elif node_type == 'parenthesized_boolean_expr':
-            return self._evaluate_node(node.children[1], record)
-            
-        elif node_type == 'predicate':
-            return self._evaluate_node(node.children[0], record)
-            
-        elif node_type == 'comparison_predicate':
-            return self._evaluate_comparison(node.children, record)
-            
-        elif node_type == 'null_predicate':
-            return self._evaluate_null_predicate(node.children, record)
-        
-        return False
+            return self._build_node(node.children[0])
 
+        elif node_type == 'parenthesized_boolean_expr':
+            return self._build_node(node.children[1])
 
+        elif node_type == 'predicate':
+            return self._build_node(node.children[0])
 
-    def _evaluate_boolean_expr(self, children, record) -> bool:
-        """or"""
-        result = self._evaluate_node(children[0], record)
-        for i in range(2, len(children), 2):
-            result = result or self._evaluate_node(children[i], record)
-        
-            if result:
-                return True
-            
-        return result
-   
-
-    def _evaluate_boolean_term(self, children, record) -> bool:
-        """and"""
-        result = self._evaluate_node(children[0], record)
-        for i in range(2, len(children), 2):
-            result = result and self._evaluate_node(children[i], record)
-           
-            if not result:
-                return False
-           
-        return result
+        elif node_type == 'comparison_predicate':
+            children = node.children
+            op = str(children[1].children[0])
+            return ("compare", op, self._build_operand(children[0]), self._build_operand(children[2]))
 
+        elif node_type == 'null_predicate':
+            # null_operation: [IS, NOT?, NULL]
+            children = node.children
+            is_not = children[2].children[1] is not None
+            return ("null", self._resolve_column(children[0], children[1]), is_not)
 
-    def _evaluate_comparison(self, children, record) -> bool:
-        """condition evaluate"""
-       
-        left_val = self._get_operand_value(children[0], record)
-        op = str(children[1].children[0])
-        right_val = self._get_operand_value(children[2], record)
-       
-       
-        if left_val is None or right_val is None:
-            return False
-        
-        if type(left_val) != type(right_val):
-            raise Exceptions.IncomparableError(self.clause_name)
-        
-        if (type(left_val) == str and (op != '=' and op != '!=')):
-            raise Exceptions.IncomparableError(self.clause_name)
-        
-        if op == '=':
-            return left_val == right_val
-        elif op == '<':
-            return left_val < right_val
-        elif op == '<=':
-            return left_val <= right_val
-        elif op == '>':
-            return left_val > right_val
-        elif op == '>=':
-            return left_val >= right_val
-        elif op == '!=':
-            return left_val != right_val
-       
-        return False
+        return ("true",)
 
 
-    def _get_operand_value(self, node, record):
-        """피연산자 값 추출"""
-        
+    def _build_operand(self, node):
+        """피연산자 해석"""
         children = node.children
-    
+
         # column_name
         if len(children) == 2:
-            table_name = None
-            
-            if not children[0]:  # table_name이 None인 경우
-                column_name = children[1].children[0].value.upper()
-                
-                for full in self.columns.keys():
-                    front, end = full.split(".")
-                    if end == column_name:
-                        if table_name:
-                            raise Exceptions.AmbiguousReference(self.clause_name)
-                        table_name = front
-
-                full_name = f"{table_name}.{column_name}"
-                
-            else:  # table_name이 있는 경우
-                table_name = children[0].children[0].value.upper()
-                column_name = children[1].children[0].value.upper()
-                full_name = f"{table_name}.{column_name}"
-                
-                if table_name not in self.table_list:
-                    raise Exceptions.TableNotSpecified(self.clause_name)
-                
-            col_info = self.columns.get(full_name)
-            
-            # column 존재
-            if col_info:
-                value = record[col_info.index]
-                return value
-            
-            # column 존재 x
-            else:
-                raise Exceptions.ColumnNotExist(self.clause_name)
-    
-        
+            return ("column", self._resolve_column(children[0], children[1]))
+
+        # aggregate
+        if children[0].data == 'aggregate':
+            if self.aggregate_column is None:
+                raise Exceptions.AggregateNotAllowed(self.clause_name)
+            return ("column", self.aggregate_column(children[0]))
+
         # comparable value
-        elif len(children) == 1:
-            return self._parse_literal(children[0].children[0])
-        
-        return None
+        token = children[0].children[0]
+        if token.type == 'PARAM':
+            self.has_parameters = True
+            return ("param", int(token))
+        return ("value", parse_literal(token))
 
 
-    def _evaluate_null_predicate(self, children, record) -> bool:
-        """NULL 비교 평가"""
-
-        table_name = None
-        if children[0] is None:  # table_name이 None인 경우
-            column_name = children[1].children[0].value.upper()
-            
-            for full in self.columns.keys():
-                    front, end = full.split(".")
-                    if end == column_name:
-                        if table_name:
-                            raise Exceptions.AmbiguousReference(self.clause_name)
-                        table_name = front
-            
-            full_name = f"{table_name}.{column_name}"
+    def _resolve_column(self, table_node, column_node) -> str:
+        """[table_name.]column_name 을 'TABLE.COLUMN' 으로 해석"""
+        column_name = column_node.children[0].value.upper()
+
+        if not table_node:  # table_name이 None인 경우
+            table_name = None
+            for col_info in self.columns.values():
+                if col_info.column_name == column_name:
+                    if table_name:
+                        raise Exceptions.AmbiguousReference(self.clause_name)
+                    table_name = col_info.table_name
+
         else:  # table_name이 있는 경우
-            table_name = children[0].children[0].value.upper()
-            column_name = children[1].children[0].value.upper()
-            full_name = f"{table_name}.{column_name}"
-            
+            table_name = table_node.children[0].value.upper()
             if table_name not in self.table_list:
-                    raise Exceptions.TableNotSpecified(self.clause_name)
-        
-        col_info = self.columns.get(full_name)
-        if not col_info:
+                raise Exceptions.TableNotSpecified(self.clause_name)
+
+        full_name = f"{table_name}.{column_name}"
+
+        # column 존재 x
+        if full_name not in self.columns:
             raise Exceptions.ColumnNotExist(self.clause_name)
-        
-        # null_operation: [IS, NOT?, NULL]
-        null_op = children[2].children
-        is_not = null_op[1] is not None
-        value = record[col_info.index]
-        return (value is None) != is_not
-
-
-    def _parse_literal(self, token):
-        """리터럴 값 파싱"""
-        token_type = token.type
-        value = str(token)
-       
-        if token_type == 'INT':
-            return int(value)
-        elif token_type == 'STR':
-            return value.strip("'\"")
-        elif token_type == 'DATE':
-            return datetime.strptime(value, '%Y-%m-%d').date()
-        
-        return value
+        return full_name
+
+
+
+# 문자열 리터럴의 escape. grammar.lark의 STR, ScriptReader처럼 '\'는 뒤의 문자 하나를 escape한다.
+# \n, \t, \r, \0 외에는 그 문자 자체가 된다. (\' -> ', \\ -> \)
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "0": "\0"}
+_ESCAPE = re.compile(r"\\(.)", re.DOTALL)
+
+
+def _unescape(value: str) -> str:
+    """value of string literal without quotes"""
+    return _ESCAPE.sub(lambda match: _ESCAPES.get(match.group(1), match.group(1)), value[1:-1])
+
+
+def parse_literal(token):
+    """리터럴 토큰(INT, STR, DATE, NULL)을 값으로 변환"""
+    token_type = token.type
+    value = str(token)
+
+    if token_type == 'INT':
+        return int(value)
+    elif token_type == 'STR':
+        return _unescape(value)
+    elif token_type == 'DATE':
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    elif token_type == 'NULL':
+        return None
+
+    return value
+
+
+def bind_condition(condition, params):
+    """해석된 조건의 ("param", i)를 ("value", params[i])로 바꾼 조건"""
+    kind = condition[0]
+
+    if kind in ("or", "and"):
+        return (kind, [bind_condition(child, params) for child in condition[1]])
+    if kind == "not":
+        return (kind, bind_condition(condition[1], params))
+    if kind == "compare":
+        operands = [("value", params[operand[1]]) if operand[0] == "param" else operand for operand in condition[2:]]
+        return (kind, condition[1], *operands)
+    return condition
+
+
+def conjuncts(condition) -> list:
+    """해석된 조건을 AND로 연결된 조건들의 리스트로 분리"""
+    if condition[0] == "and":
+        result = []
+        for child in condition[1]:
+            result += conjuncts(child)
+        return result
+    if condition[0] == "true":
+        return []
+    return [condition]
+
+
+def condition_text(condition) -> str:
+    """해석된 조건을 sql 형태의 문자열로 변환. EXPLAIN에서 사용한다."""
+    kind = condition[0]
+
+    if kind == "true":
+        return "TRUE"
+
+    if kind in ("or", "and"):
+        texts = []
+        for child in condition[1]:
+            text = condition_text(child)
+            texts.append(f"({text})" if child[0] in ("or", "and") else text)
+        return f" {kind.upper()} ".join(texts)
+
+    if kind == "not":
+        text = condition_text(condition[1])
+        return f"NOT ({text})" if condition[1][0] in ("or", "and") else f"NOT {text}"
+
+    if kind == "null":
+        return f"{condition[1]} IS {'NOT ' if condition[2] else ''}NULL"
+
+    return f"{_operand_text(condition[2])} {condition[1]} {_operand_text(condition[3])}"
+
+
+def _operand_text(operand) -> str:
+    if operand[0] == "column":
+        return operand[1]
+    if operand[0] == "param":
+        return "?"
+
+    value = operand[1]
+    if value is None:
+        return "NULL"
+    if type(value) == str:
+        return f"'{value}'"
+    return str(value)
+
+
+def compile_condition(condition, column_index: dict):
+    """해석된 조건을 record -> bool 함수로 컴파일. column_index는 full name -> 레코드에서의 위치"""
+    kind = condition[0]
+
+    if kind == "true":
+        return lambda record: True
+
+    if kind in ("or", "and"):
+        functions = [compile_condition(child, column_index) for child in condition[1]]
+        return _compile_or(functions) if kind == "or" else _compile_and(functions)
+
+    if kind == "not":
+        function = compile_condition(condition[1], column_index)
+        return lambda record: not function(record)
+
+    if kind == "null":
+        i = column_index[condition[1]]
+        if condition[2]:
+            return lambda record: record[i] is not None
+        return lambda record: record[i] is None
+
+    return _compile_comparison(condition[1], condition[2], condition[3], column_index)
+
+
+def _compile_or(functions):
+    if len(functions) == 2:
+        first, second = functions
+        return lambda record: first(record) or second(record)
+
+    def evaluate(record):
+        for function in functions:
+            if function(record):
+                return True
+        return False
+    return evaluate
+
+
+def _compile_and(functions):
+    if len(functions) == 2:
+        first, second = functions
+        return lambda record: first(record) and second(record)
+
+    def evaluate(record):
+        for function in functions:
+            if not function(record):
+                return False
+        return True
+    return evaluate
+
+
+def _compile_comparison(op, left, right, column_index):
+    """
+    NULL과의 비교는 항상 False. 타입이 다른 값, 문자열의 대소 비교는 IncomparableError.
+    """
+    if left[0] == "value" and right[0] == "column":
+        op = SWAPPED_OPERATORS[op]
+        left, right = right, left
+
+    compare = COMPARISON_OPERATORS[op]
+    equality = op in ("=", "!=")
+
+    # NULL 파라미터
+    if (left[0] == "value" and left[1] is None) or (right[0] == "value" and right[1] is None):
+        return lambda record: False
+
+    # value op value
+    if left[0] == "value":
+        left_val, right_val = left[1], right[1]
+        if type(left_val) != type(right_val) or (type(left_val) == str and not equality):
+            def evaluate(record):
+                raise Exceptions.IncomparableError
+            return evaluate
+        result = compare(left_val, right_val)
+        return lambda record: result
+
+    # column op value
+    if right[0] == "value":
+        i = column_index[left[1]]
+        value = right[1]
+        value_type = type(value)
+
+        if value_type == str and not equality:
+            def evaluate(record):
+                if record[i] is None:
+                    return False
+                raise Exceptions.IncomparableError
+            return evaluate
+
+        def evaluate(record):
+            x = record[i]
+            if x is None:
+                return False
+            if type(x) != value_type:
+                raise Exceptions.IncomparableError
+            return compare(x, value)
+        return evaluate
+
+    # column op column
+    i = column_index[left[1]]
+    j = column_index[right[1]]
+
+    def evaluate(record):
+        x = record[i]
+        y = record[j]
+        if x is None or y is None:
+            return False
+        if type(x) != type(y) or (type(x) == str and not equality):
+            raise Exceptions.IncomparableError
+        return compare(x, y)
+    return evaluate
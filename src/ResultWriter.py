@@ -0,0 +1,128 @@
+import csv
+import io
+import json
+from datetime import date
+from itertools import islice
+
+# SELECT 결과를 출력하는 객체들. SET OUTPUT_FORMAT = table | csv | tsv | jsonl 로 고른다.
+# 레코드는 실행 계획에서 하나씩 받아 WRITE_BATCH개씩 모아 한 번에 쓰므로,
+# 결과 전체를 메모리에 두지 않는다.
+WRITE_BATCH = 1000
+
+# table 형식에서 컬럼 너비를 정할 때 보는 레코드 수.
+# 결과가 이보다 많으면 나머지 레코드는 정해진 너비로 바로 출력되고, 더 긴 값은 칸을 넘어 출력된다.
+TABLE_WIDTH_SAMPLE = 1000
+
+
+def format_value(value):
+    """printable form of value. DATE to 'YYYY-MM-DD' and NULL to 'NULL'"""
+    if value is None:
+        return "NULL"
+    if type(value) == date:
+        return value.strftime("%Y-%m-%d")
+    return value
+
+
+class ResultWriter:
+    """writes header and records to stream. write() returns number of records written"""
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, headers, records) -> int:
+        raise NotImplementedError
+
+    # 레코드를 WRITE_BATCH개씩 문자열로 만들어 쓴다.
+    def _write_lines(self, records, format_record) -> int:
+        count = 0
+        records = iter(records)
+        while batch := list(islice(records, WRITE_BATCH)):
+            self.stream.write("".join(map(format_record, batch)))
+            count += len(batch)
+        return count
+
+
+class TableWriter(ResultWriter):
+    """
+    human readable table, the default format.
+    column widths are computed from the first TABLE_WIDTH_SAMPLE records, rounded up to multiple of 10.
+    """
+    def write(self, headers, records) -> int:
+        records = iter(records)
+        sample = [[str(format_value(value)) for value in record] for record in islice(records, TABLE_WIDTH_SAMPLE)]
+
+        if headers:
+            widths = [len(header) for header in headers]
+        else:
+            widths = [20]
+        for row in sample:
+            widths = [max(width, len(cell)) for width, cell in zip(widths, row)]
+        widths = [(width + 9) // 10 * 10 for width in widths]
+
+        separator = "-" * (sum(widths) + 10)
+        format_string = " | ".join(f"{{:<{width}}}" for width in widths) + "\n"
+
+        self.stream.write(separator + "\n")
+        if headers:
+            self.stream.write(format_string.format(*headers))
+        count = self._write_lines(sample, lambda row: format_string.format(*row))
+        count += self._write_lines(records, lambda record: format_string.format(*[format_value(value) for value in record]))
+        self.stream.write(separator + "\n")
+
+        if count == 1:
+            self.stream.write(f"{count} row in set\n")
+        else:
+            self.stream.write(f"{count} rows in set\n")
+        return count
+
+
+class CsvWriter(ResultWriter):
+    """CSV with header line. NULL is empty field, as read by LOAD DATA"""
+    def write(self, headers, records) -> int:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+
+        def format_record(record):
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerow(["" if value is None else format_value(value) for value in record])
+            return buffer.getvalue()
+
+        self.stream.write(format_record(headers))
+        return self._write_lines(records, format_record)
+
+
+class TsvWriter(ResultWriter):
+    """tab separated values with header line. NULL is \\N, and backslash, tab, newline are escaped"""
+    ESCAPE = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+    def write(self, headers, records) -> int:
+        escape = self.ESCAPE
+
+        def format_record(record):
+            return "\t".join("\\N" if value is None else str(format_value(value)).translate(escape) for value in record) + "\n"
+
+        self.stream.write(format_record(headers))
+        return self._write_lines(records, format_record)
+
+
+class JsonLinesWriter(ResultWriter):
+    """one JSON object per record, keys are headers. DATE is 'YYYY-MM-DD' string and NULL is null"""
+    def write(self, headers, records) -> int:
+        encode = json.JSONEncoder(ensure_ascii=False, default=format_value).encode
+
+        def format_record(record):
+            return encode(dict(zip(headers, record))) + "\n"
+
+        return self._write_lines(records, format_record)
+
+
+WRITERS = {
+    "TABLE": TableWriter,
+    "CSV": CsvWriter,
+    "TSV": TsvWriter,
+    "JSONL": JsonLinesWriter,
+}
+
+
+def create(output_format, stream) -> ResultWriter:
+    return WRITERS[output_format](stream)
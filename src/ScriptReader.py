@@ -0,0 +1,69 @@
+import re
+
+# 스크립트를 읽는 chunk 크기(문자 수). 큰 파일도 한 번에 메모리에 올리지 않는다.
+CHUNK_SIZE = 1 << 16
+
+# 문장 구분에 영향을 주는 문자들. 나머지 문자는 건너뛴다.
+_SPECIAL = re.compile(r"[;'\"\\]")
+
+
+class StatementSplitter:
+    """
+    splits sql text into statements ending with ';'.
+    text may be fed in pieces of any size, and ';' inside string literals does not end statement.
+    in string literal, backslash escapes next character as in grammar.lark STR.
+    """
+    def __init__(self):
+        self.pending = []     # 아직 ';'로 끝나지 않은 문장의 조각들
+        self.quote = None     # 문자열 안이면 그 따옴표 문자
+        self.escaped = False  # 앞 조각이 문자열 안의 '\'로 끝났으면 True
+
+    def feed(self, text) -> list:
+        """returns statements completed by text, stripped and including ';'"""
+        statements = []
+        start = 0
+        # escape된 문자의 위치. 이 위치의 문자는 따옴표나 ';'여도 무시한다.
+        skip = 0 if self.escaped else -1
+
+        for match in _SPECIAL.finditer(text):
+            i = match.start()
+            if i == skip:
+                continue
+            char = match.group()
+            if self.quote is not None:
+                if char == "\\":
+                    skip = i + 1
+                elif char == self.quote:
+                    self.quote = None
+            elif char == ";":
+                self.pending.append(text[start:i + 1])
+                statements.append("".join(self.pending).strip())
+                self.pending = []
+                start = i + 1
+            elif char != "\\":
+                self.quote = char
+
+        self.pending.append(text[start:])
+        self.escaped = skip == len(text)
+        return statements
+
+    def complete(self) -> bool:
+        """True if no unfinished statement is left"""
+        return self.quote is None and not "".join(self.pending).strip()
+
+    def rest(self) -> str:
+        """unfinished text left after last ';'"""
+        return "".join(self.pending).strip()
+
+
+def read_statements(file, chunk_size=CHUNK_SIZE):
+    """
+    yields statements of file, reading it in chunks of chunk_size characters.
+    text after last ';' is yielded as last statement, so that its error is reported.
+    """
+    splitter = StatementSplitter()
+    while chunk := file.read(chunk_size):
+        yield from splitter.feed(chunk)
+
+    if rest := splitter.rest():
+        yield rest
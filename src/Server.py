@@ -0,0 +1,189 @@
+import asyncio
+import io
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+from itertools import islice
+from berkeleydb import db
+from lark import UnexpectedInput
+from src import Exceptions, Profiler, ResultWriter, ScriptReader, Settings
+
+# run.py --serve 로 실행하는 asyncio 서버. 여러 클라이언트가 하나의 데이터베이스 환경을 함께 사용한다.
+#
+# 프로토콜: 요청과 응답 모두 한 줄에 json 객체 하나.
+#   요청: {"sql": "select * from t where id = ?;", "params": [1]}   (params는 생략 가능)
+#   응답: SELECT면 {"columns": [...]} 다음에 {"rows": [[...], ...]}가 WRITE_BATCH개씩 이어지고,
+#         마지막에 {"ok": true, "messages": [...], "row_count": n} 또는 {"ok": false, "error": "..."}
+#   DATE는 'YYYY-MM-DD' 문자열, NULL은 null이다.
+#   messages는 대화형 모드에서 출력되는 메세지들(DB_ID> 없이)이다.
+#
+# Engine, MyTransformer의 상태와 캐시는 스레드 사이에서 공유할 수 없으므로,
+# 문장은 한 개의 worker 스레드에서 한 번에 하나씩 실행하고 event loop는 연결의 입출력만 처리한다.
+# BEGIN한 트랜잭션은 세션마다 따로 가지고 그 세션의 문장을 실행할 때만 DatabaseHandler에 끼우므로,
+# 트랜잭션 중인 세션이 있어도 다른 세션의 문장은 그 사이사이에 실행된다.
+# 다른 세션의 트랜잭션이 가진 lock을 기다리면 하나뿐인 worker 스레드가 멈추므로, 기다리지 않고 그 문장만 실패한다.
+# 트랜잭션 중에 연결이 끊기면 ROLLBACK한다.
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 9000
+
+# 한 요청 줄의 최대 크기
+MAX_REQUEST_SIZE = 16 << 20
+
+
+class RowWriter(ResultWriter.ResultWriter):
+    """SELECT result as json frames of server protocol"""
+    def __init__(self, stream):
+        super().__init__(stream)
+        self.row_count = None
+
+    def write(self, headers, records) -> int:
+        encode = json.JSONEncoder(ensure_ascii=False, default=ResultWriter.format_value).encode
+        self.stream.write(encode({"columns": headers}) + "\n")
+
+        count = 0
+        records = iter(records)
+        while batch := list(islice(records, ResultWriter.WRITE_BATCH)):
+            self.stream.write(encode({"rows": batch}) + "\n")
+            count += len(batch)
+        self.row_count = count
+        return count
+
+
+class Session:
+    """state of one client connection: session variables, prepared statements, profiles and its own output"""
+    def __init__(self, server, writer):
+        self.server = server
+        self.writer = writer
+        self.settings = Settings.Settings()
+        self.prepared = {}
+        self.profiler = Profiler.Profiler(server.db_handler)
+        self.txn = None   # BEGIN한 트랜잭션
+
+    # worker 스레드에서 호출된다. event loop에서 보내고 전송 버퍼가 빌 때까지 기다린다.
+    def write(self, text):
+        asyncio.run_coroutine_threadsafe(self._send(text), self.server.loop).result()
+
+    async def _send(self, text):
+        self.writer.write(text.encode())
+        await self.writer.drain()
+
+    def execute(self, command, params) -> dict:
+        """run one statement in worker thread and return final response frame"""
+        server = self.server
+        result_writer = RowWriter(self)
+        server.transformer.use_session(self.settings, result_writer)
+        server.engine.prepared = self.prepared
+        server.engine.profiler = self.profiler
+        server.db_handler.swap_transaction(self.txn)
+
+        prefix = f"DB_{server.transformer.id}> "
+        output = io.StringIO()
+        response = {"ok": True}
+        try:
+            with redirect_stdout(output):
+                server.engine.execute(command, params)
+        except UnexpectedInput:
+            response = {"ok": False, "error": "Syntax error"}
+        except (db.DBLockDeadlockError, db.DBLockNotGrantedError):
+            response = {"ok": False, "error": str(Exceptions.LockConflictError())}
+        except Exception as e:
+            response = {"ok": False, "error": str(e)}
+        finally:
+            self.txn = server.db_handler.swap_transaction(None)
+
+        messages = [line.removeprefix(prefix) for line in output.getvalue().splitlines()]
+        if response["ok"]:
+            response["messages"] = messages
+            if result_writer.row_count is not None:
+                response["row_count"] = result_writer.row_count
+        return response
+
+    def rollback(self):
+        handler = self.server.db_handler
+        handler.swap_transaction(self.txn)
+        with redirect_stdout(io.StringIO()):
+            handler.rollback()
+        self.txn = handler.swap_transaction(None)
+
+
+class Server:
+    def __init__(self, engine):
+        self.engine = engine
+        self.transformer = engine.transformer
+        self.db_handler = engine.db_handler
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="database")
+        self.db_handler.env.set_flags(db.DB_TXN_NOWAIT, 1)
+        self.loop = None
+
+    async def serve(self, host = DEFAULT_HOST, port = DEFAULT_PORT, path = None):
+        """accept clients on tcp host:port, or on unix socket path if given, until cancelled"""
+        self.loop = asyncio.get_running_loop()
+        if path is not None:
+            server = await asyncio.start_unix_server(self.handle, path, limit=MAX_REQUEST_SIZE)
+        else:
+            server = await asyncio.start_server(self.handle, host, port, limit=MAX_REQUEST_SIZE)
+
+        for sock in server.sockets:
+            print(f"listening on {sock.getsockname()}", file=sys.stderr)
+        async with server:
+            await server.serve_forever()
+
+    async def handle(self, reader, writer):
+        session = Session(self, writer)
+        try:
+            while line := await reader.readline():
+                if not line.strip():
+                    continue
+                try:
+                    command, params = self._parse_request(line)
+                except Exceptions.ProtocolError as e:
+                    await session._send(json.dumps({"ok": False, "error": str(e)}) + "\n")
+                    continue
+
+                # EXIT은 서버가 아니라 연결을 닫는다.
+                if command.rstrip(" ;").strip().upper() == "EXIT":
+                    await session._send(json.dumps({"ok": True, "messages": []}) + "\n")
+                    break
+
+                response = await self.loop.run_in_executor(self.executor, session.execute, command, params)
+                await session._send(json.dumps(response, ensure_ascii=False) + "\n")
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            if session.txn is not None:
+                await self.loop.run_in_executor(self.executor, session.rollback)
+            writer.close()
+
+    @staticmethod
+    def _parse_request(line):
+        try:
+            request = json.loads(line)
+        except ValueError:
+            raise Exceptions.ProtocolError("request is not json")
+        if type(request) != dict or type(request.get("sql")) != str:
+            raise Exceptions.ProtocolError("request must have 'sql' string")
+
+        params = request.get("params")
+        if params is not None and type(params) != list:
+            raise Exceptions.ProtocolError("'params' must be a list")
+
+        statements = list(ScriptReader.read_statements(io.StringIO(request["sql"])))
+        if len(statements) != 1:
+            raise Exceptions.ProtocolError("request must have exactly one statement")
+        command = statements[0]
+        if not command.endswith(";"):
+            command += ";"
+        return command, params
+
+
+def serve(engine, host = DEFAULT_HOST, port = DEFAULT_PORT, path = None):
+    """run server until interrupted, then close database"""
+    server = Server(engine)
+    try:
+        asyncio.run(server.serve(host, port, path))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.executor.shutdown()
+        engine.db_handler.close()
@@ -0,0 +1,58 @@
+from src import Exceptions, ResultWriter
+
+
+# 값을 확인하고 변환하는 함수들. 잘못된 값이면 None
+def _positive_int(value):
+    if type(value) == int and value > 0:
+        return value
+    return None
+
+
+def _flag(value):
+    if type(value) == int and value in (0, 1):
+        return value
+    return None
+
+
+def _output_format(value):
+    if type(value) == str and value.upper() in ResultWriter.WRITERS:
+        return value.upper()
+    return None
+
+
+# SET 이름 = 값 으로 바꿀 수 있는 세션 변수. 이름 -> (기본값, 값 확인 함수)
+VARIABLES = {
+    # ORDER BY에서 메모리에 두고 정렬하는 최대 레코드 수. 넘으면 정렬된 run을 임시 파일에 쓰고 병합한다.
+    "SORT_BUFFER_ROWS": (100000, _positive_int),
+    # GROUP BY, DISTINCT가 해시 테이블에 두는 최대 그룹 수. 넘으면 나머지 레코드를 임시 파일에 나눠 쓴 뒤 처리한다.
+    "HASH_BUFFER_ROWS": (100000, _positive_int),
+    # SELECT 결과 출력 형식. table, csv, tsv, jsonl (ResultWriter)
+    "OUTPUT_FORMAT": ("TABLE", _output_format),
+    # ANALYZE한 테이블 하나를 전체 순회하는 SELECT를 나눠 실행할 worker 프로세스 수. 1이면 나누지 않는다. (ParallelScan)
+    "PARALLEL_WORKERS": (1, _positive_int),
+    # 레코드가 이보다 적은 테이블은 나누지 않고 순회한다.
+    "PARALLEL_SCAN_MIN_ROWS": (100000, _positive_int),
+    # 1이면 문장마다 단계별 실행 시간을 기록한다. (SHOW PROFILES, SHOW PROFILE [FOR QUERY n], src/Profiler.py)
+    "PROFILING": (0, _flag),
+    # 프로파일을 남겨 두는 최근 문장 수
+    "PROFILING_HISTORY_SIZE": (15, _positive_int),
+}
+
+
+class Settings:
+    """session variables, changed by SET name = value"""
+    def __init__(self):
+        self.values = {name: default for name, (default, _) in VARIABLES.items()}
+
+    def __getitem__(self, name):
+        return self.values[name]
+
+    def set(self, name, value):
+        if name not in VARIABLES:
+            raise Exceptions.NoSuchVariable(name)
+
+        converted = VARIABLES[name][1](value)
+        if converted is None:
+            raise Exceptions.VariableValueError(name)
+        self.values[name] = converted
+        return converted
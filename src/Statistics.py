@@ -0,0 +1,220 @@
+import heapq
+import random
+import zlib
+from bisect import bisect_right
+from datetime import date
+from src.RecordEvaluator import SWAPPED_OPERATORS
+
+# ANALYZE로 모으는 테이블 통계. 테이블 메타데이터의 "statistics"에 json으로 저장된다.
+#   {"row_count": 레코드 수,
+#    "columns": {컬럼 이름: {"distinct": 서로 다른 값의 수(추정치), "null_fraction": NULL 비율,
+#                           "min": 최솟값, "max": 최댓값, "histogram": 구간 경계값들}},
+#    "scan_keys": 표본에서 고른 레코드 키들(hex)}
+# DATE 값은 'YYYY-MM-DD' 문자열로 저장한다.
+# 히스토그램은 NULL이 아닌 값을 같은 개수씩 HISTOGRAM_BUCKETS개 구간으로 나눈 경계값(equi-depth)이고,
+# 최대 SAMPLE_SIZE개 레코드의 표본으로 만든다.
+# 서로 다른 값의 수는 DistinctSketch로 추정하고, 최솟값과 최댓값은 모든 레코드에서 구한다.
+HISTOGRAM_BUCKETS = 10
+SAMPLE_SIZE = 30000
+DISTINCT_SKETCH_SIZE = 1024
+# ParallelScanner가 테이블을 worker들에게 나누는 경계로 쓰는 레코드 키 수
+SCAN_KEYS = 256
+
+# 통계로 추정할 수 없는 조건의 selectivity
+DEFAULT_SELECTIVITY = 1 / 3
+
+
+def collect(meta, entries) -> dict:
+    """compute statistics of table from its (key, record) entries in one pass"""
+    column_count = len(meta.column_order)
+    row_count = 0
+    nulls = [0] * column_count
+    sketches = [DistinctSketch() for _ in range(column_count)]
+    mins = [None] * column_count
+    maxs = [None] * column_count
+    sample = []
+    rng = random.Random(0)
+
+    for entry in entries:
+        record = entry[1]
+        row_count += 1
+        # reservoir sampling
+        if len(sample) < SAMPLE_SIZE:
+            sample.append(entry)
+        else:
+            i = rng.randrange(row_count)
+            if i < SAMPLE_SIZE:
+                sample[i] = entry
+
+        for i, value in enumerate(record):
+            if value is None:
+                nulls[i] += 1
+                continue
+            sketches[i].add(value)
+            if mins[i] is None:
+                mins[i] = maxs[i] = value
+            elif value < mins[i]:
+                mins[i] = value
+            elif value > maxs[i]:
+                maxs[i] = value
+
+    columns = {}
+    for i, col in enumerate(meta.column_order):
+        distinct = min(sketches[i].estimate(), row_count - nulls[i])
+        column = {"distinct": distinct, "null_fraction": nulls[i] / row_count if row_count else 0.0}
+        if mins[i] is not None:
+            values = sorted(record[i] for _, record in sample if record[i] is not None)
+            column["min"] = _dump(mins[i])
+            column["max"] = _dump(maxs[i])
+            column["histogram"] = [_dump(values[len(values) * k // HISTOGRAM_BUCKETS]) for k in range(1, HISTOGRAM_BUCKETS)]
+        columns[col] = column
+
+    # 표본이 테이블 전체면 cursor 순서대로 들어 있으므로 앞쪽에 몰리지 않게 무작위로 고른다.
+    scan_keys = [key.hex() for key, _ in rng.sample(sample, min(SCAN_KEYS, len(sample)))]
+    return {"row_count": row_count, "columns": columns, "scan_keys": scan_keys}
+
+
+class DistinctSketch:
+    """
+    KMV (k minimum values) estimate of number of distinct values, in memory of k hashes.
+    exact while there are at most k distinct values.
+    """
+    HASH_MASK = (1 << 64) - 1
+
+    def __init__(self, k = DISTINCT_SKETCH_SIZE):
+        self.k = k
+        self.heap = []        # 가장 작은 해시 k개의 음수 (최대 힙)
+        self.hashes = set()   # heap에 있는 해시들
+
+    def add(self, value):
+        h = self._hash(value)
+        if len(self.heap) < self.k:
+            if h not in self.hashes:
+                heapq.heappush(self.heap, -h)
+                self.hashes.add(h)
+        elif h < -self.heap[0] and h not in self.hashes:
+            self.hashes.discard(-heapq.heapreplace(self.heap, -h))
+            self.hashes.add(h)
+
+    def estimate(self) -> int:
+        if len(self.heap) < self.k:
+            return len(self.heap)
+        # k번째로 작은 해시가 해시 공간에서 차지하는 비율로 전체 개수를 추정한다.
+        return round((self.k - 1) * (self.HASH_MASK + 1) / (-self.heap[0] + 1))
+
+    # 실행할 때마다 같은 통계가 나오도록 salt가 적용되는 str, date의 hash() 대신 정수로 바꿔 해시한다.
+    # 정수 하나짜리 tuple의 hash()로 연속된 정수도 해시 공간에 고르게 흩어지게 한다.
+    @classmethod
+    def _hash(cls, value):
+        if type(value) == str:
+            value = zlib.crc32(value.encode())
+        elif type(value) == date:
+            value = value.toordinal()
+        return hash((value,)) & cls.HASH_MASK
+
+
+def _dump(value):
+    return value.isoformat() if type(value) == date else value
+
+
+def _load(value, data_type):
+    return date.fromisoformat(value) if data_type == "DATE" else value
+
+
+class ColumnStatistics:
+    def __init__(self, data_type, statistics):
+        self.distinct = statistics["distinct"]
+        self.null_fraction = statistics["null_fraction"]
+        self.bounds = None   # [최솟값, 히스토그램 경계값들, 최댓값]
+        if "min" in statistics:
+            self.bounds = [_load(value, data_type) for value in (statistics["min"], *statistics["histogram"], statistics["max"])]
+
+    def fraction_below(self, value) -> float:
+        """estimated fraction of non-null values less than value"""
+        bounds = self.bounds
+        if value <= bounds[0]:
+            return 0.0
+        if value > bounds[-1]:
+            return 1.0
+
+        # value가 속한 구간 안에서는 값이 고르게 분포한다고 가정한다.
+        bucket = min(bisect_right(bounds, value) - 1, len(bounds) - 2)
+        low, high = bounds[bucket], bounds[bucket + 1]
+        partial = 0.5
+        if type(value) == int and high > low:
+            partial = (value - low) / (high - low)
+        elif type(value) == date and high > low:
+            partial = (value - low).days / (high - low).days
+        return (bucket + min(max(partial, 0.0), 1.0)) / (len(bounds) - 1)
+
+
+class TableStatistics:
+    """
+    statistics stored by ANALYZE, used by QueryPlanner to estimate number of records.
+    selectivity() takes resolved condition of RecordEvaluator which refers only to this table.
+    """
+    def __init__(self, meta, statistics):
+        self.row_count = statistics["row_count"]
+        # 이전 버전의 ANALYZE가 저장한 통계에는 없다.
+        self.scan_keys = [bytes.fromhex(key) for key in statistics.get("scan_keys", ())]
+        self.columns = {
+            col: ColumnStatistics(meta["columns"][col]["data_type"], column)
+            for col, column in statistics["columns"].items()
+        }
+
+    def column(self, full_name) -> ColumnStatistics:
+        return self.columns[full_name.split(".")[1]]
+
+    def selectivity(self, condition) -> float:
+        kind = condition[0]
+        if kind == "true":
+            return 1.0
+        if kind == "and":
+            result = 1.0
+            for child in condition[1]:
+                result *= self.selectivity(child)
+            return result
+        if kind == "or":
+            result = 1.0
+            for child in condition[1]:
+                result *= 1.0 - self.selectivity(child)
+            return 1.0 - result
+        if kind == "not":
+            return 1.0 - self.selectivity(condition[1])
+        if kind == "null":
+            null_fraction = self.column(condition[1]).null_fraction
+            return 1.0 - null_fraction if condition[2] else null_fraction
+
+        op, left, right = condition[1:]
+        if left[0] == "value":
+            op = SWAPPED_OPERATORS[op]
+            left, right = right, left
+        if left[0] != "column":
+            return DEFAULT_SELECTIVITY
+        if right[0] == "column":
+            if op == "=":
+                return 1.0 / max(self.column(left[1]).distinct, self.column(right[1]).distinct, 1)
+            return DEFAULT_SELECTIVITY
+        return self._compare_selectivity(self.column(left[1]), op, right[1])
+
+    def _compare_selectivity(self, column, op, value) -> float:
+        if value is None or column.bounds is None:
+            return 0.0
+        if type(value) != type(column.bounds[0]):
+            return DEFAULT_SELECTIVITY
+
+        non_null = 1.0 - column.null_fraction
+        equal = 0.0
+        if column.bounds[0] <= value <= column.bounds[-1]:
+            equal = non_null / column.distinct
+
+        if op == "=":
+            result = equal
+        elif op == "!=":
+            result = non_null - equal
+        elif type(value) == str:
+            return DEFAULT_SELECTIVITY
+        else:
+            below = non_null * column.fraction_below(value)
+            result = {"<": below, "<=": below + equal, ">": non_null - below - equal, ">=": non_null - below}[op]
+        return min(max(result, 0.0), 1.0)
@@ -0,0 +1,82 @@
+from collections.abc import Mapping
+from types import MappingProxyType
+from src.RecordCodec import RecordCodec
+from src.Statistics import TableStatistics
+
+
+def _freeze(value):
+    """dict -> 읽기 전용 mapping, list -> tuple"""
+    if isinstance(value, Mapping):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _thaw(value):
+    """_freeze의 반대. json으로 저장할 수 있는 dict, list로 되돌린다."""
+    if isinstance(value, Mapping):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(item) for item in value]
+    return value
+
+
+class TableSchema(Mapping):
+    """
+    파싱된 테이블 메타데이터의 읽기 전용 객체. DatabaseHandler가 테이블마다 하나씩 캐시한다.
+    메타데이터 dict처럼 schema["columns"] 형태로 읽을 수 있고,
+    자주 쓰는 값들은 미리 계산해 속성으로 가지고 있다.
+
+    수정할 때는 to_metadata()로 dict를 만들어 고친 뒤 DatabaseHandler.metadata_put으로 저장한다.
+    """
+    def __init__(self, table_name, metadata):
+        self._metadata = _freeze(metadata)
+        self.table_name = table_name
+
+        self.column_order = self._metadata["column_order"]
+        self.column_index = MappingProxyType({col: i for i, col in enumerate(self.column_order)})
+        self.full_names = tuple(f"{table_name}.{col}" for col in self.column_order)
+        self.data_types = tuple(self._metadata["columns"][col]["data_type"] for col in self.column_order)
+        self.date_positions = tuple(i for i, data_type in enumerate(self.data_types) if data_type == "DATE")
+
+        self.keyed_by_primary_key = bool(self._metadata.get("keyed_by_primary_key"))
+        self.primary_key_positions = tuple(self.column_index[col] for col in self._metadata["primary_keys"])
+        self.indexes = self._metadata.get("indexes", MappingProxyType({}))
+        self.index_positions = MappingProxyType({
+            index_name: tuple(self.column_index[col] for col in columns)
+            for index_name, columns in self.indexes.items()
+        })
+
+        # 외래키 확인에 쓰는 값들
+        # foreign_key_positions: (참조하는 테이블, 참조되는 컬럼들, 이 테이블에서 외래키 컬럼들의 위치)
+        # referencing_tables:    (이 테이블을 참조하는 테이블, 그 테이블의 외래키 컬럼들, 이 테이블에서 참조되는 컬럼들의 위치)
+        self.foreign_key_positions = tuple(
+            (fk["fk_ref_table"], fk["fk_ref_columns"], tuple(self.column_index[col] for col in fk["fk_columns"]))
+            for fk in self._metadata["foreign_keys"]
+        )
+        self.referencing_tables = tuple(
+            (ref["referencing_table"], ref["referencing_column"], tuple(self.column_index[col] for col in ref["referenced_columns"]))
+            for ref in self._metadata["referenced_by"]
+        )
+
+        # ANALYZE로 저장한 통계. ANALYZE하지 않은 테이블은 None
+        self.statistics = None
+        if "statistics" in self._metadata:
+            self.statistics = TableStatistics(self, self._metadata["statistics"])
+
+        self.codec = RecordCodec(self)
+
+
+    def __getitem__(self, key):
+        return self._metadata[key]
+
+    def __iter__(self):
+        return iter(self._metadata)
+
+    def __len__(self):
+        return len(self._metadata)
+
+    def to_metadata(self) -> dict:
+        """mutable copy of metadata"""
+        return _thaw(self._metadata)
@@ -0,0 +1,102 @@
+import io
+from contextlib import redirect_stdout
+from pathlib import Path
+import pytest
+from lark import Lark
+from berkeleydb import db
+from src import DatabaseHandler, Engine, MyTransformer, Operators, ResultWriter
+
+# 테스트마다 임시 디렉토리에 새 데이터베이스 환경을 만들고, run.py처럼 파서와 Engine을 만들어 문장을 실행한다.
+
+GRAMMAR_PATH = Path(__file__).resolve().parent.parent / "grammar.lark"
+ID = "TEST"
+
+
+class CollectingWriter(ResultWriter.ResultWriter):
+    """keeps headers and records of SELECT results instead of printing them"""
+    def __init__(self):
+        super().__init__(None)
+        self.results = []
+
+    def write(self, headers, records) -> int:
+        records = [tuple(record) for record in records]
+        self.results.append((headers, records))
+        return len(records)
+
+
+class Rows(Operators.Operator):
+    """operator yielding given records, used as input of operators under test"""
+    name = "Rows"
+
+    def __init__(self, records):
+        super().__init__()
+        self.rows = list(records)
+
+    def records(self):
+        return iter(self.rows)
+
+
+class Database:
+    """database environment in env_path and engine executing statements on it, opened as run.py does"""
+    def __init__(self, env_path, parser):
+        self.env_path = str(env_path)
+        self.parser = parser
+        Path(self.env_path).mkdir(parents=True, exist_ok=True)
+        self.open()
+
+    def open(self):
+        env = db.DBEnv()
+        env.set_lk_max_locks(100000)
+        env.set_lk_max_objects(100000)
+        env.open(self.env_path, db.DB_CREATE | db.DB_INIT_MPOOL | db.DB_INIT_TXN | db.DB_INIT_LOG | db.DB_INIT_LOCK | db.DB_RECOVER | db.DB_THREAD)
+        self.db_handler = DatabaseHandler.DatabaseHandler(env, self.env_path)
+        self.transformer = MyTransformer.MyTransformer(ID, self.db_handler)
+        self.engine = Engine.Engine(self.parser, self.transformer)
+        self.writer = CollectingWriter()
+        self.transformer.use_session(self.transformer.settings, self.writer)
+        self.closed = False
+
+    def close(self):
+        if not self.closed:
+            self.db_handler.close()
+            self.closed = True
+
+    def reopen(self):
+        self.close()
+        self.open()
+
+    def execute(self, sql, params = None) -> str:
+        """execute one statement, returning printed messages"""
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.engine.execute(sql, params)
+        return output.getvalue()
+
+    def script(self, *statements):
+        for sql in statements:
+            self.execute(sql)
+
+    def select(self, sql, params = None) -> list:
+        """records of SELECT statement"""
+        return self.result(sql, params)[1]
+
+    def result(self, sql, params = None) -> tuple:
+        """(headers, records) of SELECT statement"""
+        self.writer.results.clear()
+        self.execute(sql, params)
+        return self.writer.results[-1]
+
+    def set(self, name, value):
+        self.transformer.settings.set(name, value)
+
+
+@pytest.fixture(scope="session")
+def parser():
+    return Lark(GRAMMAR_PATH.read_text(), start="command", lexer="basic")
+
+
+@pytest.fixture
+def database(tmp_path, parser):
+    database = Database(tmp_path / "DB", parser)
+    yield database
+    database.close()
@@ -0,0 +1,98 @@
+import random
+from datetime import date
+import pytest
+from src import Exceptions
+from src.Operators import HashAggregate, HashDistinct
+from tests.conftest import Rows
+
+
+@pytest.fixture
+def table(database):
+    database.script(
+        "create table t (g char(3), v int, d date);",
+        "insert into t values ('a', 1, 2024-01-01), ('a', 3, null), ('b', null, 2024-02-01), ('b', 5, 2024-03-01), ('c', 2, null);",
+    )
+    return database
+
+
+def test_group_by_with_having(table):
+    assert table.result("select g, count(*), count(v), sum(v), min(v), max(v), avg(v) from t group by g order by g;") == (
+        ["G", "COUNT(*)", "COUNT(V)", "SUM(V)", "MIN(V)", "MAX(V)", "AVG(V)"],
+        [("a", 2, 2, 4, 1, 3, 2.0), ("b", 2, 1, 5, 5, 5, 5.0), ("c", 1, 1, 2, 2, 2, 2.0)],
+    )
+    assert sorted(table.select("select t.g from t group by t.g having sum(v) >= 4;")) == [("a",), ("b",)]
+
+
+def test_aggregates_without_group_by(table):
+    assert table.select("select min(d), max(d), max(g), count(d) from t;") == [(date(2024, 1, 1), date(2024, 3, 1), "c", 3)]
+    assert table.select("select count(*), sum(v), avg(v) from t where v > 100;") == [(0, None, None)]
+
+
+def test_count_star_uses_table_statistics(table, monkeypatch):
+    monkeypatch.setattr(table.db_handler, "table_scan", None)
+    assert "Table Count on T" in table.execute("explain select count(*) from t;")
+    assert table.select("select count(*) from t;") == [(5,)]
+
+
+def test_distinct(table):
+    assert table.select("select distinct g from t order by g desc;") == [("c",), ("b",), ("a",)]
+    assert sorted(table.select("select distinct g, d from t where d is null;")) == [("a", None), ("c", None)]
+
+
+@pytest.mark.parametrize("sql, error", [
+    ("select sum(g) from t;", Exceptions.AggregateTypeError),
+    ("select avg(d) from t;", Exceptions.AggregateTypeError),
+    ("select g, v from t group by g;", Exceptions.GroupByError),
+    ("select g from t group by g having v > 1;", Exceptions.ColumnNotExist),
+    ("select distinct g from t order by v;", Exceptions.DistinctOrderByError),
+    ("select count(x) from t;", Exceptions.SelectColumnResolveError),
+])
+def test_aggregation_errors(table, sql, error):
+    with pytest.raises(error):
+        table.execute(sql)
+
+
+def grouped(records):
+    sums = {}
+    for key, value in records:
+        count, total = sums.get(key, (0, 0))
+        sums[key] = (count + 1, total + value)
+    return sorted([key, count, total] for key, (count, total) in sums.items())
+
+
+def test_hash_aggregate_spills_groups():
+    rng = random.Random(0)
+    records = [(rng.randrange(3000), rng.randrange(100)) for _ in range(20000)]
+    aggregate = HashAggregate(Rows(records), [0], [("COUNT", None), ("SUM", 1)], buffer_groups=100)
+    assert sorted(aggregate) == grouped(records)
+    assert aggregate.spilled_partitions > 16   # 파티션에서도 다시 spill한다.
+
+
+def test_hash_distinct_spills_records():
+    rng = random.Random(1)
+    records = [(rng.randrange(2000), None) for _ in range(10000)]
+    distinct = HashDistinct(Rows(records), buffer_rows=50)
+    result = list(distinct)
+    assert len(result) == len(set(records)) and set(result) == set(records)
+    assert distinct.spilled_partitions > 0
+
+
+def test_group_by_spills_with_small_buffer(database, tmp_path):
+    path = tmp_path / "t.csv"
+    path.write_text("".join(f"g{i % 300},{i % 11}\n" for i in range(3000)))
+    database.script("create table t (g char(5), v int);", f"load data '{path}' into table t;")
+    expected = sorted(database.select("select g, count(*), sum(v) from t group by g;"))
+    distinct = sorted(database.select("select distinct g, v from t;"))
+    database.set("HASH_BUFFER_ROWS", 20)
+    assert sorted(database.select("select g, count(*), sum(v) from t group by g;")) == expected
+    assert sorted(database.select("select distinct g, v from t;")) == distinct
+    assert "spilled:" in database.execute("explain analyze select g, count(*) from t group by g;")
+
+
+def test_aggregate_keywords_as_names(database):
+    database.script(
+        "create table count (sum int, min int, group int, distinct int);",
+        "insert into count values (1, 2, 3, 4), (1, 5, 3, 4);",
+    )
+    assert database.select("select sum, sum(min), max(group) from count group by sum;") == [(1, 7, 3)]
+    assert database.select("select distinct distinct from count;") == [(4,)]
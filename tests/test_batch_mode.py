@@ -0,0 +1,74 @@
+import io
+import pytest
+import run
+from src import ScriptReader
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 1000])
+def test_statements_are_split_in_any_chunks(chunk_size):
+    script = ("create table t (s char(10));\n"
+              "insert into t values ('a;b'), (\"c'd;\");\n"
+              "insert into t values ('e\\';f');select * from t;  \n"
+              "select * from t")
+    assert list(ScriptReader.read_statements(io.StringIO(script), chunk_size)) == [
+        "create table t (s char(10));",
+        "insert into t values ('a;b'), (\"c'd;\");",
+        "insert into t values ('e\\';f');",
+        "select * from t;",
+        "select * from t",
+    ]
+
+
+def test_splitter_completes_only_outside_strings():
+    splitter = ScriptReader.StatementSplitter()
+    assert splitter.feed("select 'x;") == []
+    assert not splitter.complete()
+    assert splitter.feed("y'; ") == ["select 'x;y';"]
+    assert splitter.complete()
+
+
+@pytest.fixture
+def script(database, capsys):
+    """runs script text with run.run_script, returning (exit status, stdout, stderr)"""
+    def run_script(text, stop_on_error = False):
+        capsys.readouterr()
+        status = run.run_script(database.db_handler, database.engine, io.StringIO(text), stop_on_error)
+        database.closed = True
+        output = capsys.readouterr()
+        return status, output.out, output.err
+    database.transformer.result_writer = None
+    return run_script
+
+
+def test_run_script(script):
+    status, out, err = script(
+        "create table t (s char(10));\n"
+        "insert into t values ('a;b'),\n('c');\n"
+        "select * from t where s = 'a;b';\n")
+    assert status == 0
+    assert out.splitlines()[:2] == ["DB_TEST> 'T' table is created", "DB_TEST> 2 rows inserted"]
+    assert "a;b" in out and "1 row in set" in out
+    assert f"DB_{run.id}> " not in out   # 프롬프트를 출력하지 않는다.
+    assert err.splitlines()[0].startswith("3 statements, 0 failed, ")
+    assert {line.split()[0] for line in err.splitlines()[1:]} == {"CREATE", "INSERT", "SELECT"}
+
+
+def test_errors_continue_by_default(script):
+    # 마지막 ';' 뒤의 문장도 실행해 에러를 출력한다.
+    status, out, err = script("select * from nothing;\nselec;\ncreate table t (a int);\ncreate table u (a int)")
+    assert status == 1
+    assert out.splitlines() == [
+        f"DB_{run.id}> Select has failed: 'NOTHING' does not exist",
+        f"DB_{run.id}> Syntax error",
+        "DB_TEST> 'T' table is created",
+        f"DB_{run.id}> Syntax error",
+    ]
+    assert err.startswith("4 statements, 3 failed, ")
+
+
+def test_stop_on_error(script):
+    status, out, err = script("create table t (a int);\ninsert into t values ('x');\ncreate table u (a int);", True)
+    assert status == 1
+    assert "'U'" not in out
+    assert "stopped at statement 2" in err
+    assert "2 statements, 1 failed, " in err
@@ -0,0 +1,91 @@
+import argparse
+import pytest
+from benchmark import Report, Workloads
+from benchmark.__main__ import _scale, _setting
+from benchmark.DataGenerator import DataGenerator, TABLES
+
+
+def test_generator_is_deterministic():
+    first, second = DataGenerator(1000, 7), DataGenerator(1000, 7)
+    # 테이블마다 난수열이 따로 있으므로 생성 순서와 관계없이 같은 행이 나온다.
+    orders = list(first.rows("ORDERS"))
+    list(second.rows("CUSTOMER"))
+    assert list(second.rows("ORDERS")) == orders
+    assert list(DataGenerator(1000, 8).rows("ORDERS")) != orders
+    assert first.row_counts == {"CUSTOMER": 100, "PRODUCT": 10, "ORDERS": 1000}
+
+
+def test_generated_foreign_keys_exist():
+    generator = DataGenerator(500)
+    orders = list(generator.rows("ORDERS"))
+    assert all(0 <= row[1] < 50 and 0 <= row[2] < 5 for row in orders)
+    assert any(row[6] is None for row in orders) and any(row[6] is not None for row in orders)
+
+
+def test_write_csv(tmp_path):
+    path = tmp_path / "orders.csv"
+    assert DataGenerator(100).write_csv("ORDERS", path) == 100
+    lines = path.read_text().splitlines()
+    assert len(lines) == 100 and lines[0].startswith("0,")
+
+
+def test_percentile_and_summary():
+    values = [float(i) for i in range(1, 101)]
+    assert (Report.percentile(values, 50), Report.percentile(values, 99), Report.percentile([], 50)) == (50.0, 99.0, 0.0)
+    summary = Report.summarize(Workloads.Measurement([0.5, 0.25, 0.25], 10), 12.34)
+    assert summary == {"operations": 3, "rows": 10, "seconds": 1.0, "throughput": 3.0, "rows_per_second": 10.0,
+                       "p50_ms": 250.0, "p99_ms": 500.0, "peak_rss_mb": 12.3}
+
+
+def result(**workloads):
+    return {"version": Report.RESULT_VERSION, "workloads": workloads}
+
+
+def test_compare_reports_regressions_beyond_threshold():
+    baseline = result(insert={"throughput": 100.0, "p99_ms": 10.0, "rows_per_second": 0.0},
+                      join={"throughput": 10.0}, gone={"throughput": 1.0})
+    current = result(insert={"throughput": 85.0, "p99_ms": 10.5, "rows_per_second": 5.0},
+                     join={"throughput": 9.5}, new={"throughput": 1.0})
+    assert Report.compare(current, baseline) == [("insert", "throughput", 100.0, 85.0, pytest.approx(-0.15))]
+    assert Report.compare(current, baseline, 0.04) == [
+        ("insert", "throughput", 100.0, 85.0, pytest.approx(-0.15)),
+        ("insert", "p99_ms", 10.0, 10.5, pytest.approx(0.05)),
+        ("join", "throughput", 10.0, 9.5, pytest.approx(-0.05)),
+    ]
+    assert Report.format_regressions([], 0.1) == "no regression beyond 10%"
+    assert Report.format_regressions(Report.compare(current, baseline), 0.1).startswith("1 regression(s) beyond 10%:")
+
+
+def test_compare_rejects_other_result_version():
+    with pytest.raises(ValueError):
+        Report.compare(result(), {"version": Report.RESULT_VERSION + 1, "workloads": {}})
+
+
+def test_command_line_values():
+    assert [_scale(value) for value in ["10k", "1.5M", "250"]] == [10000, 1500000, 250]
+    assert _setting("sort_buffer_rows=100") == ("SORT_BUFFER_ROWS", 100)
+    assert _setting("output_format=csv") == ("OUTPUT_FORMAT", "csv")
+    for value in ["0", "-3k"]:
+        with pytest.raises(argparse.ArgumentTypeError):
+            _scale(value)
+    with pytest.raises(argparse.ArgumentTypeError):
+        _setting("sort_buffer_rows")
+
+
+def test_every_workload_runs(tmp_path):
+    generator = DataGenerator(300)
+    bench = Workloads.Bench(str(tmp_path), generator, {"SORT_BUFFER_ROWS": 100})
+    try:
+        Workloads.create_schema(bench)
+        measurements = {name: workload(bench, 20) for name, workload in Workloads.WORKLOADS.items()}
+    finally:
+        bench.close()
+
+    assert measurements["bulk_load"].rows == sum(generator.row_counts[table] for table in TABLES)
+    assert measurements["insert"].rows == 20
+    assert measurements["point_select"].rows == 20
+    assert len(measurements["join"].latencies) == 2
+    assert measurements["order_by"].rows == Workloads.ORDER_BY_REPEATS * 320
+    assert measurements["delete"].rows > 0
+    assert len(measurements["cold_startup"].latencies) == Workloads.STARTUP_REPEATS
+    assert all(measurement.latencies for measurement in measurements.values())
@@ -0,0 +1,71 @@
+from datetime import date
+import pytest
+from src import Exceptions
+
+
+@pytest.fixture
+def table(database):
+    database.execute("create table t (id int, name char(3) not null, d date, primary key (id));")
+    return database
+
+
+def test_multi_row_insert_reports_one_total(table):
+    output = table.execute("insert into t values (1, 'a', 2024-01-01), (2, 'bcdef', null), (3, 'c', 2024-03-01);")
+    assert output == "DB_TEST> 3 rows inserted\n"
+    assert table.select("select id, name from t where id = 2;") == [(2, "bcd")]   # CHAR 길이로 잘린다.
+
+
+def test_insert_with_columns(table):
+    assert table.execute("insert into t (name, id) values ('x', 7), ('y', 8);") == "DB_TEST> 2 rows inserted\n"
+    assert table.select("select * from t where id = 8;") == [(8, "y", None)]
+
+
+@pytest.mark.parametrize("sql, error", [
+    ("insert into t values (3, 'c', null), (4, 'd');", Exceptions.InsertTypeMismatchError),
+    ("insert into t values (3, 'c', null), ('4', 'd', null);", Exceptions.InsertTypeMismatchError),
+    ("insert into t values (3, 'c', null), (4, null, null);", Exceptions.InsertColumnNonNullableError),
+    ("insert into t values (3, 'c', null), (1, 'd', null);", Exceptions.InsertDuplicatePrimaryKeyError),
+    ("insert into t (id, nothing) values (3, 'c');", Exceptions.InsertColumnExistenceError),
+    ("insert into u values (3, 'c', null);", Exceptions.NoSuchTable),
+])
+def test_failing_row_cancels_whole_insert(table, sql, error):
+    table.execute("insert into t values (1, 'a', null);")
+    with pytest.raises(error):
+        table.execute(sql)
+    assert table.select("select id from t;") == [(1,)]
+
+
+def test_load_data(table, tmp_path):
+    path = tmp_path / "t.csv"
+    path.write_text("1,a,2024-01-01\n2,\"b,c\",NULL\n\n3,c,\n")
+    assert table.execute(f"load data '{path}' into table t;") == "DB_TEST> 3 rows inserted\n"
+    assert sorted(table.select("select * from t;")) == [(1, "a", date(2024, 1, 1)), (2, "b,c", None), (3, "c", None)]
+
+
+def test_load_data_with_columns(table, tmp_path):
+    path = tmp_path / "t.csv"
+    path.write_text("x,5\ny,6\n")
+    assert table.execute(f"load data '{path}' into table t (name, id);") == "DB_TEST> 2 rows inserted\n"
+    assert sorted(table.select("select id, name, d from t;")) == [(5, "x", None), (6, "y", None)]
+
+
+@pytest.mark.parametrize("content, error", [
+    ("1,a,2024-01-01\n2,b\n", Exceptions.InsertTypeMismatchError),
+    ("1,a,2024-01-01\nx,b,\n", Exceptions.InsertTypeMismatchError),
+    ("1,a,2024-01-01\n2,b,2024-13-01\n", Exceptions.InsertTypeMismatchError),
+    ("1,a,\n2,,\n", Exceptions.InsertColumnNonNullableError),
+    ("1,a,\n1,b,\n", Exceptions.InsertDuplicatePrimaryKeyError),
+])
+def test_failing_line_cancels_whole_load(table, tmp_path, content, error):
+    path = tmp_path / "t.csv"
+    path.write_text(content)
+    with pytest.raises(error):
+        table.execute(f"load data '{path}' into table t;")
+    assert table.select("select * from t;") == []
+
+
+def test_load_data_errors(table, tmp_path):
+    with pytest.raises(Exceptions.LoadFileError, match="cannot read"):
+        table.execute(f"load data '{tmp_path / 'missing.csv'}' into table t;")
+    with pytest.raises(Exceptions.NoSuchTable):
+        table.execute(f"load data '{tmp_path / 'missing.csv'}' into table u;")
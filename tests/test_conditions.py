@@ -0,0 +1,84 @@
+from datetime import date
+import pytest
+from src import Exceptions, RecordEvaluator
+
+COLUMNS = {"T.A": 0, "T.B": 1, "T.C": 2}
+
+
+def column(name):
+    return ("column", name)
+
+
+def value(v):
+    return ("value", v)
+
+
+@pytest.mark.parametrize("condition, expected", [
+    (("compare", "=", column("T.A"), value(1)), [True, False, False]),
+    (("compare", "<", value(1), column("T.A")), [False, True, False]),
+    (("compare", "!=", column("T.B"), value("x")), [False, True, False]),
+    (("null", "T.A", False), [False, False, True]),
+    (("null", "T.A", True), [True, True, False]),
+    (("not", ("compare", "=", column("T.A"), value(1))), [False, True, True]),
+    (("or", [("compare", "=", column("T.A"), value(1)), ("null", "T.A", False)]), [True, False, True]),
+    (("and", [("compare", ">=", column("T.A"), value(1)), ("compare", "=", column("T.B"), column("T.B")),
+              ("compare", "<", column("T.C"), value(date(2024, 1, 1)))]), [True, False, False]),
+    (("true",), [True, True, True]),
+])
+def test_compiled_condition(condition, expected):
+    records = [(1, "x", date(2023, 5, 1)), (2, "y", date(2024, 5, 1)), (None, None, None)]
+    evaluate = RecordEvaluator.compile_condition(condition, COLUMNS)
+    assert [evaluate(record) for record in records] == expected
+
+
+def test_comparison_with_null_value_is_false():
+    evaluate = RecordEvaluator.compile_condition(("compare", "=", column("T.A"), value(None)), COLUMNS)
+    assert evaluate((None, None, None)) is False
+
+
+@pytest.mark.parametrize("condition", [
+    ("compare", "<", column("T.B"), value("x")),
+    ("compare", "=", column("T.A"), value("1")),
+    ("compare", "=", column("T.A"), column("T.B")),
+    ("compare", "=", value(1), value("1")),
+])
+def test_incomparable_values_raise(condition):
+    evaluate = RecordEvaluator.compile_condition(condition, COLUMNS)
+    with pytest.raises(Exceptions.IncomparableError):
+        evaluate((1, "x", None))
+
+
+def test_condition_helpers():
+    condition = ("and", [("compare", "=", column("T.A"), ("param", 0)),
+                         ("and", [("null", "T.B", True), ("or", [("compare", "<", column("T.A"), value(3)),
+                                                                ("not", ("compare", "=", column("T.B"), value("x")))])])])
+    assert len(RecordEvaluator.conjuncts(condition)) == 3
+    assert RecordEvaluator.conjuncts(("true",)) == []
+
+    bound = RecordEvaluator.bind_condition(condition, [7])
+    assert bound[1][0] == ("compare", "=", column("T.A"), value(7))
+    assert RecordEvaluator.condition_text(condition) == "T.A = ? AND (T.B IS NOT NULL AND (T.A < 3 OR NOT T.B = 'x'))"
+
+
+def test_where_clause(database):
+    database.script(
+        "create table t (a int, b char(5), c date);",
+        "insert into t values (1, 'x', 2023-05-01);",
+        "insert into t values (2, 'y', 2024-05-01);",
+        "insert into t values (null, null, null);",
+    )
+    # 조건은 두 값 논리로 평가한다. NULL과의 비교는 False이므로 NOT을 붙이면 True다.
+    assert database.select("select a from t where not (a = 1 or b = 'y');") == [(None,)]
+    assert database.select("select a from t where a is null or c < 2024-01-01;") == [(1,), (None,)]
+    assert database.select("select b from t where 1 = 1 and a > 1;") == [("y",)]
+
+
+def test_where_clause_errors(database):
+    database.execute("create table t (a int, b char(5));")
+    database.execute("insert into t values (1, 'x');")
+    with pytest.raises(Exceptions.ColumnNotExist):
+        database.execute("select * from t where d = 1;")
+    with pytest.raises(Exceptions.TableNotSpecified):
+        database.execute("select * from t where u.a = 1;")
+    with pytest.raises(Exceptions.IncomparableError):
+        database.execute("select * from t where b > 'a';")
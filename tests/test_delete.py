@@ -0,0 +1,58 @@
+import pytest
+from src import Exceptions
+
+
+@pytest.fixture
+def table(database):
+    database.script(
+        "create table t (id int, v int, primary key (id));",
+        "insert into t values (1, 10), (2, 20), (3, 30), (4, 40);",
+        "create index t_v on t (v);",
+    )
+    return database
+
+
+def ids(database):
+    return sorted(record[0] for record in database.select("select id from t;"))
+
+
+def test_delete_with_where_streams_through_cursor(table, monkeypatch):
+    monkeypatch.setattr(table.db_handler, "table_get_all", None)
+    assert table.execute("delete from t where v > 15 and v < 35;") == "DB_TEST> 2 rows deleted\n"
+    assert ids(table) == [1, 4]
+    assert table.execute("delete from t where id = 9;") == "DB_TEST> 0 rows deleted\n"
+
+
+def test_delete_removes_index_entries(table):
+    table.execute("delete from t where id = 2;")
+    assert "Index Scan using T_V on T" in table.execute("explain select * from t where v = 20;")
+    assert table.select("select id from t where v = 20;") == []
+    assert [key for key in table.db_handler.index_scan("T_V", b"")] == [
+        table.db_handler.primary_key(table.db_handler.get_table_metadata("T"), [i]) for i in (1, 3, 4)]
+
+
+def test_delete_all(table):
+    assert table.execute("delete from t;") == "DB_TEST> 4 rows deleted\n"
+    assert ids(table) == []
+    assert list(table.db_handler.index_scan("T_V", b"")) == []
+    table.execute("insert into t values (1, 10);")
+    assert table.select("select id from t where v = 10;") == [(1,)]
+
+
+def test_delete_errors(table):
+    with pytest.raises(Exceptions.NoSuchTable):
+        table.execute("delete from u where id = 1;")
+    with pytest.raises(Exceptions.ColumnNotExist):
+        table.execute("delete from t where nothing = 1;")
+    with pytest.raises(Exceptions.IncomparableError):
+        table.execute("delete from t where id > 'a';")
+    assert ids(table) == [1, 2, 3, 4]
+
+
+def test_load_and_data_as_names(database, tmp_path):
+    path = tmp_path / "d.csv"
+    path.write_text("1\n2\n")
+    database.execute("create table data (load int);")
+    database.execute(f"load data '{path}' into table data (load);")
+    assert database.execute("delete from data where load = 1;") == "DB_TEST> 1 row deleted\n"
+    assert database.select("select data.load from data;") == [(2,)]
@@ -0,0 +1,67 @@
+import re
+import pytest
+from src import Exceptions
+
+
+@pytest.fixture
+def table(database):
+    database.script(
+        "create table t (id int, v int, primary key (id));",
+        "insert into t values (1, 5), (2, 3), (3, 9);",
+        "create index t_v on t (v);",
+    )
+    return database
+
+
+def test_explain_prints_operator_tree(table):
+    assert table.execute("explain select id from t where v > 3 order by v desc limit 1;").splitlines() == [
+        "Project: T.ID",
+        "  -> Top-N Sort: T.V DESC, 1 rows offset 0",
+        "    -> Filter: T.V > 3",
+        "      -> Index Scan using T_V on T",
+    ]
+    assert "Primary Key Lookup on T" in table.execute("explain select * from t where id = 2;")
+
+
+def test_explain_does_not_run_query(table, monkeypatch):
+    monkeypatch.setattr(table.db_handler, "table_scan", None)
+    table.writer.results.clear()
+    assert "Table Scan on T" in table.execute("explain select * from t;")
+    assert table.writer.results == []
+
+
+def test_explain_analyze_reports_actual_rows(table):
+    table.writer.results.clear()
+    lines = table.execute("explain analyze select id from t where v > 3 order by v;").splitlines()
+    pattern = re.compile(r"^( *(-> )?)(.+) \(actual rows=(\d+) loops=(\d+) time=\d+\.\d{3} ms\)$")
+    operators = [pattern.match(line).group(3, 4, 5) for line in lines[:-1]]
+    assert operators == [
+        ("Project: T.ID", "2", "1"),
+        ("Sort: T.V ASC", "2", "1"),
+        ("Filter: T.V > 3", "2", "1"),
+        ("Index Scan using T_V on T", "2", "1"),
+    ]
+    assert re.fullmatch(r"2 rows in set, execution time: \d+\.\d{3} ms", lines[-1])
+    assert table.writer.results == []
+
+
+def test_explain_analyze_join_loops(table):
+    table.execute("create table u (x int);")
+    table.execute("insert into u values (1), (2);")
+    output = table.execute("explain analyze select * from t, u where t.id < u.x;")
+    assert "Nested Loop Join: T.ID < U.X (actual rows=1 loops=1" in output
+
+
+def test_explain_table_is_kept(table):
+    output = table.execute("explain t;")
+    assert output == table.execute("describe t;")
+    assert "ID                   | INT        | N          | PRI" in output
+
+
+def test_explain_errors(table):
+    with pytest.raises(Exceptions.NoSuchTable):
+        table.execute("explain nothing;")
+    with pytest.raises(Exceptions.SelectTableExistenceError):
+        table.execute("explain select * from nothing;")
+    with pytest.raises(Exceptions.ParameterCountError, match="^Explain"):
+        table.execute("explain select * from t where id = ?;")
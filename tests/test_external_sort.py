@@ -0,0 +1,78 @@
+import random
+import tempfile
+import pytest
+from src import Exceptions, Operators
+from src.Operators import Sort
+from tests.conftest import Rows
+
+
+def records(count, seed = 0):
+    rng = random.Random(seed)
+    return [(rng.choice([None, *range(50)]), i) for i in range(count)]
+
+
+def in_memory(rows, descending):
+    return sorted(rows, key=lambda record: (record[0] is not None, record[0]), reverse=descending)
+
+
+@pytest.fixture
+def run_files(monkeypatch):
+    """temporary files created by Sort"""
+    files = []
+    create = tempfile.TemporaryFile
+    def temporary_file():
+        file = create()
+        files.append(file)
+        return file
+    monkeypatch.setattr(Operators.tempfile, "TemporaryFile", temporary_file)
+    return files
+
+
+@pytest.mark.parametrize("descending", [False, True])
+@pytest.mark.parametrize("count", [0, 10, 99, 100, 1001])
+def test_external_sort_is_same_as_in_memory_sort(run_files, descending, count):
+    rows = records(count, count)
+    sort = Sort(Rows(rows), 0, descending, buffer_rows=100)
+    assert list(sort) == in_memory(rows, descending)
+    assert sort.spilled_runs == count // 100 == len(run_files)
+    assert all(file.closed for file in run_files)
+
+
+def test_runs_are_merged_in_several_passes(run_files, monkeypatch):
+    monkeypatch.setattr(Operators, "MERGE_FAN_IN", 4)
+    monkeypatch.setattr(Operators, "SPILL_BATCH", 7)
+    rows = records(1000)
+    sort = Sort(Rows(rows), 0, True, buffer_rows=50)
+    assert list(sort) == in_memory(rows, True)
+    assert sort.spilled_runs == 20 and len(run_files) > 20
+    assert all(file.closed for file in run_files)
+
+
+def test_run_files_are_closed_when_output_is_not_read(run_files):
+    sort = iter(Sort(Rows(records(500)), 0, buffer_rows=100))
+    next(sort)
+    sort.close()
+    assert len(run_files) == 5 and all(file.closed for file in run_files)
+
+
+def test_order_by_spills_with_small_buffer(database):
+    database.execute("create table t (id int, v char(5));")
+    database.execute("insert into t values " + ", ".join(
+        f"({i}, {'null' if i % 7 == 0 else repr(str(i % 13))})" for i in range(300)) + ";")
+    expected = database.select("select id, v from t order by v desc;")
+    database.set("SORT_BUFFER_ROWS", 40)
+    assert database.select("select id, v from t order by v desc;") == expected
+    assert expected[-1][1] is None
+    output = database.execute("explain analyze select id from t order by v;")
+    assert "Sort: T.V ASC (external: 7 runs) (actual rows=300" in output
+
+
+def test_sort_buffer_setting_errors(database):
+    assert database.execute("set sort_buffer_rows = 10;") == "DB_TEST> 'SORT_BUFFER_ROWS' is set to 10\n"
+    with pytest.raises(Exceptions.VariableValueError):
+        database.execute("set sort_buffer_rows = 0;")
+    with pytest.raises(Exceptions.VariableValueError):
+        database.execute("set sort_buffer_rows = 'many';")
+    with pytest.raises(Exceptions.NoSuchVariable):
+        database.execute("set sort_memory = 10;")
+    assert database.transformer.settings["SORT_BUFFER_ROWS"] == 10
@@ -0,0 +1,76 @@
+import pytest
+from src import Exceptions
+
+
+@pytest.fixture
+def tables(database):
+    database.script(
+        "create table p (id int, name char(3), primary key (id));",
+        "create table c (cid int, pid int, primary key (cid), foreign key (pid) references p (id));",
+        "insert into p values (1, 'a'), (2, 'b'), (3, 'c');",
+        "insert into c values (10, 1), (11, 1), (12, 2), (13, null);",
+    )
+    return database
+
+
+# 외래키 확인은 키나 인덱스로만 하고 테이블을 순회하지 않는다.
+@pytest.fixture
+def no_scan(tables, monkeypatch):
+    monkeypatch.setattr(tables.db_handler, "table_scan", None)
+    return tables
+
+
+def test_foreign_key_index_is_created(tables):
+    assert tables.db_handler.get_table_metadata("C").indexes["C_FK0"] == ("PID",)
+
+
+def test_insert_probes_parent(no_scan):
+    assert no_scan.execute("insert into c values (14, 3), (15, null);") == "DB_TEST> 2 rows inserted\n"
+    with pytest.raises(Exceptions.ReferentialIntegrityError, match="^Insert"):
+        no_scan.execute("insert into c values (16, 3), (17, 4);")
+
+
+def test_delete_probes_children(no_scan):
+    assert no_scan.execute("delete from p where id = 3;") == "DB_TEST> 1 row deleted\n"
+    with pytest.raises(Exceptions.ReferentialIntegrityError, match="^Delete"):
+        no_scan.execute("delete from p where id >= 2;")
+    no_scan.execute("delete from c where pid = 2;")
+    assert no_scan.execute("delete from p where id = 2;") == "DB_TEST> 1 row deleted\n"
+
+
+def test_update_probes_parent_and_children(no_scan):
+    no_scan.execute("update c set pid = 2 where cid = 10;")
+    with pytest.raises(Exceptions.ReferentialIntegrityError, match="^Update"):
+        no_scan.execute("update c set pid = 4 where cid = 11;")
+    with pytest.raises(Exceptions.ReferentialIntegrityError, match="^Update"):
+        no_scan.execute("update p set id = 5 where id = 1;")
+    # 참조되는 값이 바뀌지 않으면 확인하지 않는다.
+    no_scan.execute("update p set name = 'z' where id = 1;")
+    assert no_scan.execute("update p set id = 7 where id = 3;") == "DB_TEST> 1 row updated\n"
+
+
+def test_failed_check_changes_nothing(tables):
+    with pytest.raises(Exceptions.ReferentialIntegrityError):
+        tables.execute("insert into c values (20, 1), (21, 9);")
+    with pytest.raises(Exceptions.ReferentialIntegrityError):
+        tables.execute("delete from p;")
+    assert len(tables.select("select * from c;")) == 4
+    assert len(tables.select("select * from p;")) == 3
+
+
+def test_self_reference(database):
+    database.script(
+        "create table e (id int, boss int, primary key (id), foreign key (boss) references e (id));",
+        "insert into e values (1, null), (2, 1), (3, 2);",
+    )
+    with pytest.raises(Exceptions.ReferentialIntegrityError):
+        database.execute("delete from e where id = 2;")
+    assert database.execute("delete from e where id >= 2;") == "DB_TEST> 2 rows deleted\n"
+    assert database.execute("delete from e;") == "DB_TEST> 1 row deleted\n"
+
+
+def test_drop_referenced_table(tables):
+    with pytest.raises(Exceptions.DropReferencedTableError):
+        tables.execute("drop table p;")
+    tables.execute("drop table c;")
+    tables.execute("drop table p;")
@@ -0,0 +1,87 @@
+import pytest
+from src import Exceptions
+from src.Operators import HashJoin
+from tests.conftest import Rows
+
+
+@pytest.fixture
+def joined(database):
+    database.script(
+        "create table a (x int, y char(3), z int);",
+        "create table b (x int, w char(3));",
+        "insert into a values (1, 'p', 5);",
+        "insert into a values (2, 'q', 6);",
+        "insert into a values (2, 'r', null);",
+        "insert into a values (null, 's', 7);",
+        "insert into a values (3, 'p', 8);",
+        "insert into b values (2, 'p');",
+        "insert into b values (1, 'q');",
+        "insert into b values (2, 'r');",
+        "insert into b values (null, 'p');",
+    )
+    return database
+
+
+def test_equi_join_keeps_order_of_cartesian_product(joined):
+    assert joined.select("select * from a join b on a.x = b.x;") == [
+        (1, "p", 5, 1, "q"),
+        (2, "q", 6, 2, "p"),
+        (2, "q", 6, 2, "r"),
+        (2, "r", None, 2, "p"),
+        (2, "r", None, 2, "r"),
+    ]
+
+
+def test_null_keys_never_match(joined):
+    records = joined.select("select a.x, b.x from b join a on a.x = b.x;")
+    assert records and all(left is not None and left == right for left, right in records)
+
+
+def test_residual_condition_is_checked_on_matches(joined):
+    assert joined.select("select * from a join b on a.x = b.x and y = w;") == [(2, "r", None, 2, "r")]
+    assert joined.select("select * from a join b on (a.x = b.x and a.z > 5) and not w = 'p';") == [(2, "q", 6, 2, "r")]
+
+
+def test_explain_uses_hash_join_only_for_equality(joined):
+    assert "Hash Join: A.X = B.X" in joined.execute("explain select * from a join b on a.x = b.x;")
+    assert "Nested Loop Join: A.X < B.X" in joined.execute("explain select * from a join b on a.x < b.x;")
+
+
+def test_small_left_input_is_joined_by_primary_key_lookup(database):
+    database.script(
+        "create table parent (id int, name char(5), primary key (id));",
+        "create table child (id int, parent_id int);",
+        "insert into parent values (1, 'one'), (2, 'two'), (3, 'three');",
+        "insert into child values (10, 2), (11, 3), (12, 4);",
+    )
+    assert "lookup by primary key of PARENT" in database.execute(
+        "explain select * from child join parent on child.parent_id = parent.id;")
+    assert database.select("select child.id, name from child join parent on child.parent_id = parent.id;") == [
+        (10, "two"), (11, "three"),
+    ]
+
+
+def test_join_errors(joined):
+    with pytest.raises(Exceptions.AmbiguousReference):
+        joined.execute("select * from a join b on x = b.x;")
+    with pytest.raises(Exceptions.IncomparableError):
+        joined.execute("select * from a join b on a.y = b.x;")
+
+
+@pytest.mark.parametrize("left_size", [1, 50])
+def test_hash_join_builds_on_either_input(left_size):
+    left = [(i % 5, f"l{i}") for i in range(left_size)] + [(None, "null")]
+    right = [(i % 7, f"r{i}") for i in range(20)] + [(None, "null")]
+    expected = [l + r for l in left for r in right if l[0] is not None and l[0] == r[0]]
+    assert list(HashJoin(Rows(left), Rows(right), [0], [0])) == expected
+
+
+def test_lookup_replaces_reading_right_input():
+    class Unread(Rows):
+        def records(self):
+            raise AssertionError("right input must not be read")
+
+    right = {1: [(1, "one")], 2: [(2, "two"), (2, "deux")]}
+    join = HashJoin(Rows([(2,), (None,), (1,), (3,)]), Unread([]), [0], [0],
+                    lookup=lambda key: right.get(key[0], []), lookup_limit=lambda: 10)
+    assert list(join) == [(2, 2, "two"), (2, 2, "deux"), (1, 1, "one")]
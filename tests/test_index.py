@@ -0,0 +1,78 @@
+import pytest
+from src import Exceptions
+
+
+@pytest.fixture
+def indexed(database):
+    database.script(
+        "create table t (id int, v int, s char(5), primary key (id));",
+        "insert into t values (1, 10, 'a');",
+        "insert into t values (2, 20, 'b');",
+        "insert into t values (3, 30, 'c');",
+        "insert into t values (4, 20, 'd');",
+        "create index t_v on t (v);",
+    )
+    return database
+
+
+# 인덱스의 모든 항목이 가리키는 레코드들. 없는 레코드를 가리키는 항목이 있으면 실패한다.
+def index_records(database, index_name = "T_V"):
+    records = []
+    for key in database.db_handler.index_scan(index_name, b""):
+        record = database.db_handler.table_get("T", key)
+        assert record is not None, "index entry of removed record"
+        records.append(record)
+    return sorted(records)
+
+
+def test_index_is_filled_with_existing_records(indexed):
+    assert index_records(indexed) == [[1, 10, "a"], [2, 20, "b"], [3, 30, "c"], [4, 20, "d"]]
+
+
+def test_equality_and_range_use_index(indexed):
+    assert "Index Scan using T_V on T" in indexed.execute("explain select * from t where v = 20;")
+    assert sorted(indexed.select("select id from t where v = 20;")) == [(2,), (4,)]
+    assert sorted(indexed.select("select id from t where v >= 20 and v < 30;")) == [(2,), (4,)]
+    assert indexed.select("select id from t where v > 20;") == [(3,)]
+    assert indexed.select("select id from t where v <= 10;") == [(1,)]
+
+
+def test_index_follows_insert_update_and_delete(indexed):
+    indexed.execute("insert into t values (5, null, 'e');")
+    indexed.execute("update t set id = 9 where id = 2;")     # primary key가 바뀌면 레코드 키도 바뀐다.
+    indexed.execute("update t set v = 25 where id = 4;")
+    indexed.execute("delete from t where v = 30;")
+    assert index_records(indexed) == [[1, 10, "a"], [4, 25, "d"], [5, None, "e"], [9, 20, "b"]]
+    assert indexed.select("select id from t where v = 20;") == [(9,)]
+    assert indexed.select("select id from t where v > 20;") == [(4,)]
+
+
+def test_index_survives_reopen(indexed):
+    indexed.reopen()
+    assert "Index Scan using T_V on T" in indexed.execute("explain select * from t where v = 30;")
+    assert indexed.select("select id from t where v = 30;") == [(3,)]
+
+
+def test_drop_index(indexed):
+    assert "'T_V' index is dropped" in indexed.execute("drop index t_v;")
+    assert "Table Scan on T" in indexed.execute("explain select * from t where v = 20;")
+    with pytest.raises(Exceptions.NoSuchIndex):
+        indexed.execute("drop index t_v;")
+
+
+def test_create_index_errors(indexed):
+    with pytest.raises(Exceptions.IndexExistenceError):
+        indexed.execute("create index t_v on t (s);")
+    with pytest.raises(Exceptions.IndexColumnExistenceError):
+        indexed.execute("create index t_x on t (x);")
+    with pytest.raises(Exceptions.NoSuchTable):
+        indexed.execute("create index other on nothere (v);")
+
+
+def test_index_as_name(database):
+    database.script("create table index (index int, v int);", "insert into index values (1, 2), (3, 4);")
+    database.reopen()
+    assert "'INDEX' index is created" in database.execute("create index index on index (index);")
+    assert "Index Scan using INDEX on INDEX" in database.execute("explain select v from index where index = 3;")
+    assert database.select("select v from index where index.index = 3;") == [(4,)]
+    assert "'INDEX' index is dropped" in database.execute("drop index index;")
@@ -0,0 +1,82 @@
+import random
+import pytest
+from src import Exceptions
+from src.Operators import Filter, Limit, TopN
+from tests.conftest import Rows
+
+
+@pytest.mark.parametrize("descending", [False, True])
+@pytest.mark.parametrize("count, offset", [(0, 0), (3, 0), (5, 10), (10, 95), (200, 0)])
+def test_top_n_is_sort_then_limit(descending, count, offset):
+    rng = random.Random(count)
+    records = [(rng.choice([None, *range(20)]), i) for i in range(100)]
+    expected = sorted(records, key=lambda record: (record[0] is not None, record[0]), reverse=descending)
+    assert list(TopN(Rows(records), 0, descending, count, offset)) == expected[offset:offset + count]
+
+
+def test_limit_closes_child():
+    closed = []
+
+    def records():
+        try:
+            yield from range(100)
+        finally:
+            closed.append(True)
+
+    source = Rows([])
+    source.records = records
+    assert list(Limit(source, 2, 3)) == [3, 4]
+    assert closed == [True]
+
+    # Filter를 거쳐도 LIMIT이 멈추면 자식이 바로 닫혀야 한다.
+    closed.clear()
+    filtered = iter(Filter(source, lambda record: record % 2 == 0))
+    assert next(filtered) == 0
+    filtered.close()
+    assert closed == [True]
+    closed.clear()
+    assert list(Limit(Filter(source, lambda record: record % 2 == 0), 2)) == [0, 2]
+    assert closed == [True]
+
+
+@pytest.fixture
+def table(database):
+    database.script(
+        "create table t (id int, v int, primary key (id));",
+        "insert into t values " + ", ".join(f"({i}, {(i * 7) % 10})" for i in range(50)) + ";",
+    )
+    return database
+
+
+def test_limit_and_offset(table):
+    # 같은 값의 순서는 테이블 순회 순서를 따르므로 LIMIT 없는 정렬 결과와 비교한다.
+    ordered = table.select("select id, v from t order by v desc;")
+    assert table.select("select id, v from t order by v desc limit 3;") == ordered[:3]
+    assert table.select("select id, v from t order by v desc limit 4 offset 6;") == ordered[6:10]
+    assert table.select("select id from t order by id limit 2 offset 47;") == [(47,), (48,)]
+    assert table.select("select id from t order by id limit 5 offset 100;") == []
+    assert table.select("select id from t limit 0;") == []
+    assert len(table.select("select id from t limit 4 offset 2;")) == 4
+
+
+def test_limit_stops_scan(table):
+    output = table.execute("explain analyze select id from t where v > 0 limit 2 offset 1;")
+    assert "Limit: 2 rows offset 1 (actual rows=2" in output
+    assert "Filter: T.V > 0 (actual rows=3 " in output
+    assert "Top-N Sort: T.V ASC, 3 rows offset 0" in table.execute("explain select * from t order by v limit 3;")
+
+
+def test_limit_parameters(table):
+    assert table.select("select id from t order by id limit ? offset ?;", [2, 1]) == [(1,), (2,)]
+    with pytest.raises(Exceptions.SelectLimitError):
+        table.execute("select id from t limit ?;", [-1])
+    with pytest.raises(Exceptions.SelectLimitError):
+        table.execute("select id from t limit 1 offset ?;", ["a"])
+
+
+def test_limit_and_offset_as_names(database):
+    database.script("create table limit (offset int, limit int);", "insert into limit values (1, 5), (2, 6), (3, 7);")
+    database.reopen()
+    assert database.select("select limit from limit order by offset desc limit 2 offset 1;") == [(6,), (5,)]
+    assert database.select("select limit.offset from limit where limit = 7 limit 1;") == [(3,)]
+    assert database.select("select offset from limit order by limit limit 1;") == [(1,)]
@@ -0,0 +1,58 @@
+import pytest
+from src import Exceptions
+
+
+def test_metadata_is_parsed_once_and_shared(database):
+    database.execute("create table t (a int, c date, b char(3), primary key (a));")
+    handler = database.db_handler
+    schema = handler.get_table_metadata("T")
+    assert handler.get_table_metadata("T") is schema
+    assert schema.column_index["B"] == 2
+    assert schema.full_names == ("T.A", "T.C", "T.B")
+    assert schema.date_positions == (1,)
+    assert schema.primary_key_positions == (0,)
+
+
+def test_schema_is_read_only(database):
+    database.execute("create table t (a int);")
+    schema = database.db_handler.get_table_metadata("T")
+    with pytest.raises(TypeError):
+        schema["columns"]["A"] = {}
+    # to_metadata는 고쳐도 캐시에 영향을 주지 않는 복사본이다.
+    metadata = schema.to_metadata()
+    metadata["column_order"].append("X")
+    assert schema["column_order"] == ("A",)
+
+
+def test_metadata_put_and_delete_update_cache(database):
+    database.execute("create table t (a int);")
+    handler = database.db_handler
+    schema, version = handler.get_table_metadata("T"), handler.schema_version
+
+    database.execute("create index t_a on t (a);")
+    assert handler.schema_version > version
+    assert handler.get_table_metadata("T") is not schema
+    assert "T_A" in handler.get_table_metadata("T").indexes
+
+    database.execute("drop table t;")
+    assert handler.get_table_metadata("T") is None
+    with pytest.raises(Exceptions.SelectTableExistenceError):
+        database.execute("select * from t;")
+
+
+def test_foreign_key_lookups(database):
+    database.script(
+        "create table p (id int, primary key (id));",
+        "create table c (x int, pid int, foreign key (pid) references p (id));",
+    )
+    handler = database.db_handler
+    assert handler.get_table_metadata("C").foreign_key_positions == (("P", ("ID",), (1,)),)
+    assert handler.get_table_metadata("P").referencing_tables[0][0] == "C"
+
+
+def test_cache_is_rebuilt_on_reopen(database):
+    database.execute("create table t (a int, b char(3));")
+    database.reopen()
+    assert database.db_handler.get_table_metadata("T").column_order == ("A", "B")
+    database.execute("insert into t values (1, 'x');")
+    assert database.select("select b from t;") == [("x",)]
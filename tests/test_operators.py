@@ -0,0 +1,62 @@
+import pytest
+from src import Exceptions, Operators
+from src.Operators import Filter, Limit, NestedLoopJoin, Project
+from tests.conftest import Rows
+
+
+class Counted(Rows):
+    """Rows counting records pulled from it"""
+    def __init__(self, records):
+        super().__init__(records)
+        self.pulled = 0
+
+    def records(self):
+        for record in self.rows:
+            self.pulled += 1
+            yield record
+
+
+def test_pipeline_pulls_records_one_by_one():
+    source = Counted([(i, i * 10) for i in range(100)])
+    plan = Project(Filter(source, lambda record: record[0] % 2 == 0), [1])
+    records = iter(plan)
+    assert next(records) == [0]
+    assert next(records) == [20]
+    assert source.pulled == 3
+
+
+def test_limit_stops_reading_child():
+    source = Counted([(i,) for i in range(100)])
+    assert list(Limit(source, 3, 2)) == [(2,), (3,), (4,)]
+    assert source.pulled == 5
+
+
+def test_nested_loop_join():
+    left, right = Rows([(1,), (2,)]), Rows([("a",), ("b",)])
+    assert list(NestedLoopJoin(left, right)) == [(1, "a"), (1, "b"), (2, "a"), (2, "b")]
+    join = NestedLoopJoin(left, right, lambda record: record[0] == 2)
+    assert list(join) == [(2, "a"), (2, "b")]
+
+
+def test_measure_and_explain():
+    plan = Project(Filter(Rows([(1,), (2,), (3,)]), lambda record: record[0] > 1), [0])
+    plan.detail = "T.A"
+    Operators.measure(plan)
+    assert list(plan) == [[2], [3]]
+    assert (plan.actual.rows, plan.children[0].actual.rows, plan.children[0].children[0].actual.rows) == (2, 2, 3)
+
+    lines = Operators.explain(plan)
+    assert lines[0].startswith("Project: T.A (actual rows=2 loops=1")
+    assert lines[1].startswith("  -> Filter (actual rows=2")
+    assert lines[2].startswith("    -> Rows (actual rows=3")
+
+
+def test_select_runs_as_pipeline(database):
+    database.script(
+        "create table t (a int, b char(3));",
+        "insert into t values (1, 'x');",
+        "insert into t values (2, 'y');",
+    )
+    assert database.select("select b, a from t where a > 1;") == [("y", 2)]
+    with pytest.raises(Exceptions.IncomparableError):
+        database.execute("select * from t where b < 'z';")
@@ -0,0 +1,118 @@
+import queue
+import pytest
+from src import Exceptions, ParallelScanner
+
+
+def test_partitions():
+    assert ParallelScanner.partitions([b"a", b"b", b"c", b"d"], 2) == [[None, b"b", b"d"], [b"a", b"c"]]
+    assert ParallelScanner.partitions([b"a"], 4) == [[None], [b"a"]]
+    assert ParallelScanner.partitions([], 4) == [[None]]
+
+
+class ListCursor:
+    """cursor over keys in fixed order, as Berkeley DB cursor over hash table"""
+    def __init__(self, keys):
+        self.keys = keys
+        self.position = None
+
+    def _entry(self):
+        if self.position >= len(self.keys):
+            return None
+        key = self.keys[self.position]
+        return key, key.upper()
+
+    def first(self):
+        self.position = 0
+        return self._entry() if self.keys else None
+
+    def set(self, key):
+        if key not in self.keys:
+            return None
+        self.position = self.keys.index(key)
+        return self._entry()
+
+    def next(self):
+        self.position += 1
+        return self._entry()
+
+
+class Stop:
+    def is_set(self):
+        return False
+
+
+@pytest.mark.parametrize("workers", [1, 2, 3, 5])
+@pytest.mark.parametrize("deleted", [(), (b"a",), (b"f", b"g"), (b"a", b"i")])
+def test_each_record_is_read_by_one_worker(workers, deleted):
+    scan_keys = [b"f", b"c", b"i", b"g"]
+    keys = [key for key in [b"a", b"b", b"c", b"d", b"e", b"f", b"g", b"h", b"i", b"j"] if key not in deleted]
+    read = []
+    for starts in ParallelScanner.partitions(scan_keys, workers):
+        read += ParallelScanner._partition_records(ListCursor(keys), starts, set(scan_keys), bytes, Stop())
+    assert sorted(read) == sorted(key.upper() for key in keys)
+
+
+class DeadProcess:
+    exitcode = 3
+
+    def is_alive(self):
+        return False
+
+
+def test_worker_failures_raise():
+    with pytest.raises(Exceptions.ParallelScanError, match="worker exited with code 3"):
+        list(ParallelScanner._receive(queue.Queue(), DeadProcess()))
+
+    results = queue.Queue()
+    results.put(("rows", [(1,)]))
+    results.put(("error", "cannot open table"))
+    records = ParallelScanner._receive(results, DeadProcess())
+    assert next(records) == (1,)
+    with pytest.raises(Exceptions.ParallelScanError, match="cannot open table"):
+        next(records)
+
+
+@pytest.fixture
+def table(database, tmp_path):
+    path = tmp_path / "t.csv"
+    path.write_text("".join(f"{i},{i % 7 if i % 5 else ''}\n" for i in range(3000)))
+    database.script("create table t (id int, v int, primary key (id));", f"load data '{path}' into table t;")
+    database.set("PARALLEL_WORKERS", 3)
+    database.set("PARALLEL_SCAN_MIN_ROWS", 1000)
+    return database
+
+
+def test_parallel_scan_needs_statistics(table):
+    assert "Table Scan on T" in table.execute("explain select * from t;")
+    table.execute("analyze t;")
+    assert "Parallel Table Scan on T (3 workers)" in table.execute("explain select * from t;")
+    table.set("PARALLEL_SCAN_MIN_ROWS", 5000)
+    assert "Parallel" not in table.execute("explain select * from t;")
+
+
+def test_parallel_scan_is_not_used_in_transaction(table):
+    table.execute("analyze t;")
+    table.execute("begin;")
+    assert "Parallel" not in table.execute("explain select * from t;")
+
+
+def test_parallel_scan_gives_same_records_as_serial(table):
+    table.execute("analyze t;")
+    # 경계 키가 ANALYZE 후에 삭제되어도 모든 레코드를 읽는다.
+    table.execute("delete from t where id < 200;")
+    queries = [
+        "select * from t where v > 2;",
+        "select id, v from t order by v desc;",
+        "select id, v from t order by v limit 10 offset 5;",
+    ]
+    table.set("PARALLEL_WORKERS", 1)
+    serial = [table.select(query) for query in queries]
+    table.set("PARALLEL_WORKERS", 3)
+    assert "Parallel Table Scan on T (3 workers): T.V > 2" in table.execute("explain " + queries[0])
+    parallel = [table.select(query) for query in queries]
+
+    assert sorted(parallel[0]) == sorted(serial[0])
+    assert sorted(parallel[1]) == sorted(serial[1])
+    # 같은 값의 순서는 순회 순서에 따라 다르므로 정렬 컬럼만 비교한다.
+    for records, expected in zip(parallel[1:], serial[1:]):
+        assert [record[1] for record in records] == [record[1] for record in expected]
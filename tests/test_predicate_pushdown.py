@@ -0,0 +1,64 @@
+from itertools import product
+import pytest
+from src import Exceptions
+
+A = [(1, 1), (2, 1), (3, 2), (4, 1)]
+B = [(1, 6), (1, 3), (2, 9), (3, 9), (4, 2)]
+C = [(1,), (2,), (3,)]
+
+
+@pytest.fixture
+def tables(database):
+    database.script(
+        "create table a (id int, x int);",
+        "create table b (aid int, y int);",
+        "create table c (z int);",
+        f"insert into a values {', '.join(map(str, A))};",
+        f"insert into b values {', '.join(map(str, B))};",
+        "insert into c values (1), (2), (3);",
+    )
+    return database
+
+
+def test_single_table_conjuncts_are_applied_during_scan(tables):
+    lines = tables.execute("explain select * from a, b, c where a.x = 1 and b.y > 5 and a.id = b.aid;").splitlines()
+    assert lines[2:7] == [
+        "    -> Hash Join: A.ID = B.AID",
+        "      -> Filter: A.X = 1",
+        "        -> Table Scan on A",
+        "      -> Filter: B.Y > 5",
+        "        -> Table Scan on B",
+    ]
+
+
+def test_pushed_down_filters_give_same_result(tables):
+    expected = [(a[0], c[0]) for a, b, c in product(A, B, C)
+                if a[1] == 1 and b[1] > 5 and a[0] == b[0] and c[0] < a[0]]
+    records = tables.select("select a.id, c.z from a, b, c where c.z < a.id and a.x = 1 and a.id = b.aid and b.y > 5;")
+    assert sorted(records) == sorted(expected)
+
+
+def test_join_reads_only_filtered_records(tables):
+    output = tables.execute("explain analyze select * from a, b where a.x = 2 and a.id = b.aid;")
+    assert "Hash Join: A.ID = B.AID (actual rows=1 " in output
+    assert "-> Filter: A.X = 2 (actual rows=1 " in output
+
+
+def test_conjunct_on_several_tables_stays_above_scans(tables):
+    output = tables.execute("explain select * from a, b where a.x = 1 or b.y = 3;")
+    assert "Nested Loop Join: (A.X = 1 OR B.Y = 3)" in output
+    assert "Filter" not in output
+    expected = [a + b for a, b in product(A, B) if a[1] == 1 or b[1] == 3]
+    assert sorted(tables.select("select * from a, b where a.x = 1 or b.y = 3;")) == sorted(expected)
+
+
+def test_constant_false_condition(tables):
+    assert tables.select("select * from a, b where 1 = 2 and a.id = b.aid;") == []
+
+
+def test_pushdown_errors(tables):
+    with pytest.raises(Exceptions.ColumnNotExist):
+        tables.execute("select * from a, b where a.y = 1 and a.id = b.aid;")
+    tables.execute("create table d (id int);")
+    with pytest.raises(Exceptions.AmbiguousReference):
+        tables.execute("select * from a, d where id = 1;")
@@ -0,0 +1,111 @@
+import pytest
+from lark import UnexpectedInput
+from src import Exceptions
+
+
+@pytest.fixture
+def table(database):
+    database.script(
+        "create table t (id int, name char(10), primary key (id));",
+        "insert into t values (1, 'a');",
+        "insert into t values (2, 'b');",
+        "insert into t values (3, 'c');",
+    )
+    return database
+
+
+def test_prepare_and_execute(table):
+    assert "'FIND' statement is prepared" in table.execute("prepare find as select name from t where id = ?;")
+    table.writer.results.clear()
+    table.execute("execute find (2);")
+    assert table.writer.results[-1][1] == [("b",)]
+
+    table.engine.prepare("add", "insert into t values (?, ?)")
+    table.engine.execute_prepared("add", [4, "d"])
+    assert table.select("select name from t where id = ?;", [4]) == [("d",)]
+
+
+def test_literals_share_cached_statement(table):
+    engine = table.engine
+    engine.cache.clear()
+    assert table.select("select name from t where id = 1;") == [("a",)]
+    assert table.select("select name from t where id = 3;") == [("c",)]
+    assert table.select("SELECT name FROM t WHERE id = 2 ;") == [("b",)]
+    assert list(engine.cache) == ["SELECT NAME FROM T WHERE ID = ? ;"]
+    # 문자열 리터럴 안의 키워드나 대소문자는 그대로 값이 된다.
+    assert table.select("select id from t where name = 'B';") == []
+
+
+def test_cache_is_lru(table):
+    engine = table.engine
+    engine.cache.clear()
+    engine.cache_size = 2
+    table.execute("select * from t;")
+    table.execute("select id from t;")
+    table.execute("select * from t;")
+    table.execute("select name from t;")
+    assert list(engine.cache) == ["SELECT * FROM T ;", "SELECT NAME FROM T ;"]
+
+
+def test_cached_statement_is_resolved_again_after_ddl(table):
+    table.engine.prepare("everything", "select * from t")
+    assert table.select("select * from t where id = 1;") == [(1, "a")]
+    table.script(
+        "drop table t;",
+        "create table t (id int, extra int, name char(10));",
+        "insert into t values (1, 7, 'x');",
+    )
+    assert table.select("select * from t where id = 1;") == [(1, 7, "x")]
+    table.writer.results.clear()
+    table.engine.execute_prepared("everything")
+    assert table.writer.results[-1][1] == [(1, 7, "x")]
+
+
+def test_parameter_count_errors_name_the_statement(table):
+    table.execute("prepare find as select name from t where id = ?;")
+    with pytest.raises(Exceptions.ParameterCountError, match="^Execute has failed"):
+        table.execute("execute find (1, 2);")
+    with pytest.raises(Exceptions.ParameterCountError, match="^Select has failed"):
+        table.execute("select * from t where id = ?;", [1, 2])
+    with pytest.raises(Exceptions.ParameterCountError, match="^Delete has failed"):
+        table.execute("delete from t where id = ?;")
+    with pytest.raises(Exceptions.ParameterCountError, match="^Insert has failed"):
+        table.execute("insert into t values (?, ?); select * from t;")
+
+
+def test_prepare_errors(table):
+    with pytest.raises(Exceptions.NoSuchPreparedStatement):
+        table.execute("execute nothing (1);")
+    with pytest.raises(Exceptions.PrepareStatementError):
+        table.engine.prepare("make", "create table u (a int)")
+    with pytest.raises(UnexpectedInput):
+        table.execute("select from t where;")
+
+
+def test_keywords_as_names_are_not_parameterized(database):
+    database.script("create table data (load int);", "insert into data values (5);")
+    assert database.select("select load from data where load = 5;") == [(5,)]
+    assert "SELECT LOAD FROM DATA WHERE LOAD = ? ;" in database.engine.cache
+
+
+
+def test_prepare_and_execute_as_names(database):
+    database.script("create table prepare (execute int, prepare char(3));", "insert into prepare values (1, 'a');")
+    database.reopen()
+    database.execute("prepare find as select prepare from prepare where execute = ?;")
+    database.writer.results.clear()
+    database.execute("execute find (1);")
+    assert database.writer.results[-1][1] == [("a",)]
+    assert database.select("select prepare.execute from prepare where prepare = 'a';") == [(1,)]
+
+
+def test_string_escapes_round_trip(table):
+    table.execute("insert into t values (4, 'it\\'s'), (5, \"say \\\"hi\\\"\"), (6, 'a\\\\b\\tc');")
+    expected = [(4, "it's"), (5, 'say "hi"'), (6, "a\\b\tc")]
+    assert table.select("select * from t where id > 3;") == expected
+    # 캐시에서 리터럴을 파라미터로 바꿀 때도, '?'로 넘긴 값과 같은 값이 된다.
+    for id, name in expected:
+        assert table.select("select id from t where name = ?;", [name]) == [(id,)]
+    assert table.select("select id from t where name = 'it\\'s';") == [(4,)]
+    assert table.select("select id from t where name = \"it's\";") == [(4,)]
+    assert table.select("select id from t where name = 'a\\\\b\\tc';") == [(6,)]
@@ -0,0 +1,54 @@
+from datetime import date
+import pytest
+from src import Exceptions, KeyCodec
+
+
+@pytest.mark.parametrize("values", [
+    [0, 1, -1, 255, 256, -256, 2 ** 40, -(2 ** 40), 7, -7],
+    [date(2024, 1, 1), date(1999, 12, 31), date(2024, 1, 2)],
+    ["", "a", "ab", "b", "a\x00", "a\x00b", "B"],
+])
+def test_encoded_values_keep_order(values):
+    assert sorted(values, key=KeyCodec.encode_value) == sorted(values)
+
+
+def test_encoded_keys_are_prefix_free():
+    keys = [KeyCodec.encode_key(values) for values in [("a", "bc"), ("ab", "c"), ("abc", ""), (None, "abc")]]
+    assert len(set(keys)) == len(keys)
+    assert KeyCodec.encode_key([None]) < KeyCodec.encode_key([-(2 ** 40)])
+
+
+def test_records_are_keyed_by_primary_key(database):
+    database.execute("create table t (a int, b char(3), primary key (a, b));")
+    database.execute("insert into t values (1, 'x');")
+    database.execute("insert into t values (1, 'y');")
+
+    meta = database.db_handler.get_table_metadata("T")
+    key = database.db_handler.primary_key(meta, [1, "y"])
+    assert database.db_handler.table_get("T", key) == [1, "y"]
+    assert "Primary Key Lookup on T" in database.execute("explain select * from t where a = 1 and b = 'x';")
+    assert database.select("select * from t where a = 1 and b = 'x';") == [(1, "x")]
+
+
+def test_duplicate_primary_key_is_rejected(database):
+    database.execute("create table t (a int, b char(3), primary key (a));")
+    database.execute("insert into t values (1, 'x');")
+    with pytest.raises(Exceptions.InsertDuplicatePrimaryKeyError):
+        database.execute("insert into t values (1, 'y');")
+    # 문장 안에서 중복되면 문장 전체가 취소된다.
+    with pytest.raises(Exceptions.InsertDuplicatePrimaryKeyError):
+        database.execute("insert into t values (2, 'y'), (2, 'z');")
+    assert database.select("select * from t;") == [(1, "x")]
+
+
+def test_primary_key_is_not_nullable(database):
+    database.execute("create table t (a int, primary key (a));")
+    with pytest.raises(Exceptions.InsertColumnNonNullableError):
+        database.execute("insert into t values (null);")
+
+
+def test_table_without_primary_key_keeps_duplicates(database):
+    database.execute("create table t (a int);")
+    database.execute("insert into t values (1);")
+    database.execute("insert into t values (1);")
+    assert database.select("select * from t;") == [(1,), (1,)]
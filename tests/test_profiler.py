@@ -0,0 +1,107 @@
+import pytest
+from lark import UnexpectedInput
+from src import Exceptions, Profiler
+
+
+@pytest.fixture
+def profiled(database):
+    database.script(
+        "create table t (id int, v int, primary key (id));",
+        "insert into t values (1, 2), (3, 4);",
+        "set profiling = 1;",
+    )
+    return database
+
+
+def phases(profile):
+    return [(phase.name, phase.rows_in, phase.rows_out) for phase in profile.phases]
+
+
+def test_select_phases(profiled):
+    profiled.execute("select * from t where v > 2;")
+    profile = profiled.engine.profiler.get()
+    assert (profile.query_id, profile.statement, profile.error) == (1, "select * from t where v > 2;", None)
+    assert phases(profile) == [
+        ("parse", None, None), ("resolve", None, None), ("plan", None, None),
+        ("Table Scan on T", None, 2), ("Filter", 2, 1), ("Project", 1, 1), ("output", 1, 1), ("execute", None, None),
+    ]
+    # 단계의 값은 안쪽 단계를 뺀 값이므로 더하면 문장 전체를 넘지 않는다.
+    assert sum(phase.wall for phase in profile.phases) <= profile.wall
+    assert sum(phase.bytes_read for phase in profile.phases) == profile.bytes_read > 0
+
+
+def test_write_statement_rows(profiled):
+    profiled.execute("insert into t values (5, 6), (7, 8);")
+    profiled.execute("delete from t where v > 5;")
+    history = profiled.engine.profiler.history
+    assert [phases(profile)[-1] for profile in history] == [("execute", None, 2), ("execute", None, 2)]
+
+
+def test_show_profiles(profiled):
+    profiled.execute("select * from t;")
+    with pytest.raises(Exceptions.SelectTableExistenceError):
+        profiled.execute("select * from u;")
+    with pytest.raises(UnexpectedInput):
+        profiled.execute("selec;")
+    rows = [line.split("|") for line in profiled.execute("show profiles;").splitlines()[2:-2]]
+    assert [[cell.strip() for i, cell in enumerate(row) if i != 1] for row in rows] == [
+        ["1", "OK", "select * from t;"],
+        ["2", "ERROR", "select * from u;"],
+        ["3", "ERROR", "selec;"],
+    ]
+    assert profiled.engine.profiler.get(3).error == "Syntax error"
+
+
+def test_show_profile(profiled):
+    profiled.execute("select * from t;")
+    profiled.execute("insert into t values (5, 6);")
+    last = profiled.execute("show profile;").splitlines()
+    assert [line.split("|")[0].strip() for line in last[2:-2]] == ["parse", "resolve", "execute", "total"]
+    first = profiled.execute("show profile for query 1;").splitlines()
+    assert first[5].startswith("Table Scan on T ")
+    # SHOW PROFILE은 기록되지 않는다.
+    assert [profile.query_id for profile in profiled.engine.profiler.history] == [1, 2]
+
+
+def test_history_size(profiled):
+    profiled.execute("set profiling_history_size = 2;")
+    for _ in range(4):
+        profiled.execute("select * from t;")
+    assert [profile.query_id for profile in profiled.engine.profiler.history] == [4, 5]
+
+
+def test_profile_errors(database):
+    with pytest.raises(Exceptions.NoSuchProfile, match="no statement is profiled"):
+        database.execute("show profile;")
+    database.execute("set profiling = 1;")
+    with pytest.raises(Exceptions.NoSuchProfile):
+        database.execute("show profile for query 9;")
+    with pytest.raises(Exceptions.VariableValueError):
+        database.execute("set profiling = 2;")
+
+
+def test_hooks(profiled, capsys):
+    received = []
+    profiler = profiled.engine.profiler
+    profiler.add_hook(received.append)
+    profiler.add_hook(lambda profile: 1 / 0)
+    profiled.execute("select * from t;")
+    assert [profile.statement for profile in received] == ["select * from t;"]
+    assert received[0].to_dict()["phases"][0]["name"] == "parse"
+    assert "profiling hook has failed" in capsys.readouterr().err
+
+    profiler.remove_hook(received.append)
+    profiled.execute("set profiling = 0;")
+    profiled.execute("select * from t;")
+    assert len(received) == 1
+
+
+def test_phase_without_profiling_does_nothing(database):
+    with Profiler.phase(None, "parse"), Profiler.phase(database.engine.profiler, "parse"):
+        pass
+    assert list(database.engine.profiler.history) == []
+
+
+def test_profile_keywords_as_names(database):
+    database.script("create table profile (profiles int, query int, for int);", "insert into profile values (1, 2, 3);")
+    assert database.select("select profiles, query, for from profile where for = 3;") == [(1, 2, 3)]
@@ -0,0 +1,64 @@
+import json
+from datetime import date
+import pytest
+from src import Exceptions, RecordCodec
+
+META = {
+    "column_order": ["A", "B", "C", "D"],
+    "columns": {"A": {"data_type": "INT"}, "B": {"data_type": "CHAR(5)"},
+                "C": {"data_type": "DATE"}, "D": {"data_type": "CHAR(20000)"}},
+}
+
+
+@pytest.mark.parametrize("record", [
+    [1, "abc", date(2024, 2, 29), "x" * 100],
+    [RecordCodec.INT_MIN, "", date(1, 1, 1), ""],
+    [RecordCodec.INT_MAX, "한글", date(9999, 12, 31), "é" * 5000],
+    [None, None, None, None],
+    [None, "b", None, "d"],
+])
+def test_encode_decode_roundtrip(record):
+    codec = RecordCodec.RecordCodec(META)
+    data = codec.encode(record)
+    assert data[0] == RecordCodec.FORMAT_MARK
+    assert codec.decode(data) == record
+
+
+def test_fixed_width_record():
+    codec = RecordCodec.RecordCodec({"column_order": ["A", "C"],
+                                     "columns": {"A": {"data_type": "INT"}, "C": {"data_type": "DATE"}}})
+    assert codec.fixed is not None
+    assert len(codec.encode([5, date(2024, 1, 1)])) == 1 + 1 + 8 + 4
+    assert codec.decode(codec.encode([5, date(2024, 1, 1)])) == [5, date(2024, 1, 1)]
+    assert codec.decode(codec.encode([None, date(2024, 1, 1)])) == [None, date(2024, 1, 1)]
+
+
+def test_json_record_of_earlier_version():
+    codec = RecordCodec.RecordCodec(META)
+    data = json.dumps([3, "abc", "2024-01-02", None]).encode()
+    assert codec.decode(data) == [3, "abc", date(2024, 1, 2), None]
+
+
+def test_int_out_of_range_is_rejected(database):
+    database.execute("create table t (a int);")
+    database.execute(f"insert into t values ({RecordCodec.INT_MAX});")
+    with pytest.raises(Exceptions.InsertTypeMismatchError):
+        database.execute(f"insert into t values ({RecordCodec.INT_MAX + 1});")
+    assert database.select("select * from t;") == [(RecordCodec.INT_MAX,)]
+
+
+def test_legacy_table_is_migrated_on_startup(database):
+    database.execute("create table t (a int, c date, primary key (a));")
+    handler = database.db_handler
+    meta = handler.get_table_metadata("T").to_metadata()
+    del meta["record_format"]
+    handler.metadata_put("T", meta)
+    handler.tables["T"].put(handler.primary_key(handler.get_table_metadata("T"), [1]), b'[1, "2024-01-02"]')
+
+    database.reopen()
+    handler = database.db_handler
+    assert handler.get_table_metadata("T").get("record_format") == RecordCodec.FORMAT_VERSION
+    assert database.select("select * from t;") == [(1, date(2024, 1, 2))]
+    cursor = handler.tables["T"].cursor()
+    assert cursor.next()[1][0] == RecordCodec.FORMAT_MARK
+    cursor.close()
@@ -0,0 +1,79 @@
+import io
+import json
+from datetime import date
+import pytest
+from src import Exceptions, ResultWriter
+
+HEADERS = ["A", "B", "C"]
+RECORDS = [(1, "x,y", date(2024, 1, 2)), (None, 'say "hi"\tnow\n', None), (3, "한글\\", date(1999, 12, 31))]
+
+
+def written(output_format, records = RECORDS):
+    stream = io.StringIO()
+    count = ResultWriter.create(output_format, stream).write(HEADERS, iter(records))
+    return count, stream.getvalue()
+
+
+def test_csv():
+    assert written("CSV") == (3, 'A,B,C\n1,"x,y",2024-01-02\n,"say ""hi""\tnow\n",\n3,한글\\,1999-12-31\n')
+
+
+def test_tsv():
+    assert written("TSV") == (3, "A\tB\tC\n1\tx,y\t2024-01-02\n\\N\tsay \"hi\"\\tnow\\n\t\\N\n3\t한글\\\\\t1999-12-31\n")
+
+
+def test_json_lines():
+    count, output = written("JSONL")
+    assert count == 3
+    assert [json.loads(line) for line in output.splitlines()] == [
+        {"A": 1, "B": "x,y", "C": "2024-01-02"},
+        {"A": None, "B": 'say "hi"\tnow\n', "C": None},
+        {"A": 3, "B": "한글\\", "C": "1999-12-31"},
+    ]
+
+
+def test_table():
+    count, output = written("TABLE", RECORDS[:1])
+    assert count == 1
+    assert output.splitlines() == [
+        "-" * 40,
+        "A          | B          | C         ",
+        "1          | x,y        | 2024-01-02",
+        "-" * 40,
+        "1 row in set",
+    ]
+
+
+def test_table_width_is_computed_from_sample(monkeypatch):
+    monkeypatch.setattr(ResultWriter, "TABLE_WIDTH_SAMPLE", 2)
+    count, output = written("TABLE", [(1, "a", None), (2, "b", None), (3, "long value here", None)])
+    assert count == 3
+    assert "3          | long value here | NULL" in output
+    assert output.endswith("3 rows in set\n")
+
+
+def test_records_are_written_in_batches(monkeypatch):
+    monkeypatch.setattr(ResultWriter, "WRITE_BATCH", 2)
+    stream = io.StringIO()
+    writes = []
+    stream.write = lambda text: writes.append(text)
+
+    def records():
+        for i in range(5):
+            # 앞 배치를 쓴 뒤에 다음 레코드가 만들어진다.
+            assert len(writes) == 1 + i // 2
+            yield (i, "v", None)
+
+    assert ResultWriter.create("CSV", stream).write(HEADERS, records()) == 5
+    assert writes == ["A,B,C\n", "0,v,\n1,v,\n", "2,v,\n3,v,\n", "4,v,\n"]
+
+
+def test_output_format_setting(database):
+    database.transformer.result_writer = None
+    database.script("create table t (a int, d date);", "insert into t values (1, 2024-01-02), (2, null);")
+    database.execute("set output_format = 'jsonl';")
+    assert sorted(database.execute("select * from t;").splitlines()) == ['{"A": 1, "D": "2024-01-02"}', '{"A": 2, "D": null}']
+    database.execute("set output_format = 'csv';")
+    assert database.execute("select a from t where a = 2;") == "A\n2\n"
+    with pytest.raises(Exceptions.VariableValueError):
+        database.execute("set output_format = 'xml';")
@@ -0,0 +1,148 @@
+import asyncio
+import json
+import threading
+import time
+import pytest
+from berkeleydb import db
+from src import Exceptions, Server
+from src.Client import Client
+
+
+@pytest.fixture
+def server_path(database, tmp_path):
+    """runs Server on unix socket in a background thread, returning socket path"""
+    path = str(tmp_path / "server.sock")
+    server = Server.Server(database.engine)
+    loop = asyncio.new_event_loop()
+    task = loop.create_task(server.serve(path=path))
+
+    def run():
+        try:
+            loop.run_until_complete(task)
+        except asyncio.CancelledError:
+            pass
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    while server.loop is None or not (tmp_path / "server.sock").exists():
+        time.sleep(0.01)
+    time.sleep(0.05)
+    yield path
+
+    loop.call_soon_threadsafe(task.cancel)
+    thread.join()
+    loop.close()
+    server.executor.shutdown()
+
+
+def request(client, line) -> dict:
+    """send raw request line and return response frame"""
+    client.file.write(line.encode() + b"\n")
+    client.file.flush()
+    return json.loads(client.file.readline())
+
+
+def test_statements_and_rows(server_path):
+    with Client(path=server_path) as client:
+        assert client.execute("create table t (id int, d date, s char(5))").messages == ["'T' table is created"]
+        assert client.execute("insert into t values (?, 2024-01-02, ?), (2, null, 'b');", [1, "a"]).messages == ["2 rows inserted"]
+        result = client.execute("select * from t where id = 1;")
+        assert (result.columns, result.rows, result.row_count) == (["ID", "D", "S"], [[1, "2024-01-02", "a"]], 1)
+        with pytest.raises(Exceptions.ServerError, match="Syntax error"):
+            client.execute("selec * from t;")
+        with pytest.raises(Exceptions.ServerError, match="does not exist"):
+            client.execute("select * from u;")
+        # 에러 뒤에도 연결을 계속 사용할 수 있다.
+        assert client.execute("select count(*) from t;").rows == [[2]]
+
+
+def test_rows_are_streamed_in_batches(server_path, monkeypatch):
+    monkeypatch.setattr(Server.ResultWriter, "WRITE_BATCH", 2)
+    with Client(path=server_path) as client:
+        client.execute("create table t (id int);")
+        client.execute("insert into t values (1), (2), (3), (4), (5);")
+        frames = list(client.stream("select * from t;"))
+        assert [len(frame.get("rows", ())) for frame in frames] == [0, 2, 2, 1]
+        assert client.last == {"ok": True, "messages": [], "row_count": 5}
+
+
+def test_sessions_have_own_settings_and_prepared_statements(server_path):
+    with Client(path=server_path) as first, Client(path=server_path) as second:
+        first.execute("create table t (id int);")
+        first.execute("prepare find as select id from t where id = ?;")
+        first.execute("set sort_buffer_rows = 5;")
+        with pytest.raises(Exceptions.ServerError, match="FIND"):
+            second.execute("execute find (1);")
+        assert second.execute("select id from t;").rows == []
+
+
+def test_other_sessions_run_during_transaction(server_path):
+    with Client(path=server_path) as first, Client(path=server_path) as second:
+        first.execute("create table t (id int);")
+        first.execute("create table u (id int);")
+        first.execute("begin;")
+        first.execute("insert into t values (1);")
+
+        # 트랜잭션이 끝나기를 기다리지 않고 다른 세션의 문장이 실행된다.
+        results = []
+        thread = threading.Thread(target=lambda: results.append(second.execute("insert into u values (2);").messages))
+        thread.start()
+        thread.join(5)
+        assert results == [["1 row inserted"]]
+
+        # 트랜잭션은 세션마다 따로 가진다.
+        second.execute("begin;")
+        second.execute("insert into u values (3);")
+        first.execute("insert into t values (4);")
+        second.execute("rollback;")
+        first.execute("commit;")
+        assert second.execute("select id from t;").rows == [[1], [4]]
+        assert first.execute("select id from u;").rows == [[2]]
+        with pytest.raises(Exceptions.ServerError, match="no transaction is in progress"):
+            first.execute("commit;")
+
+
+def test_lock_conflict_fails_statement_only(server_path, database, monkeypatch):
+    with Client(path=server_path) as first, Client(path=server_path) as second:
+        first.execute("create table t (id int);")
+        first.execute("begin;")
+        first.execute("insert into t values (1);")
+
+        def locked(*args, **kwargs):
+            raise db.DBLockNotGrantedError(-30993, "DB_LOCK_NOTGRANTED: Lock not granted")
+        with monkeypatch.context() as patch:
+            patch.setattr(database.db_handler, "table_scan", locked)
+            with pytest.raises(Exceptions.ServerError, match="locked by transaction of another session"):
+                second.execute("select id from t;")
+        first.execute("commit;")
+        assert second.execute("select id from t;").rows == [[1]]
+
+
+def test_disconnect_rolls_back_transaction(server_path):
+    with Client(path=server_path) as first:
+        first.execute("create table t (id int);")
+        first.execute("begin;")
+        first.execute("insert into t values (1);")
+    with Client(path=server_path) as second:
+        assert second.execute("select id from t;").rows == []
+
+
+def test_exit_closes_connection_only(server_path):
+    with Client(path=server_path) as client:
+        assert client.execute("exit;").messages == []
+        with pytest.raises(ConnectionError):
+            client.execute("create table t (id int);")
+    with Client(path=server_path) as client:
+        assert client.execute("create table t (id int);").messages == ["'T' table is created"]
+
+
+@pytest.mark.parametrize("line, error", [
+    ("not json", "request is not json"),
+    ('["select 1;"]', "request must have 'sql' string"),
+    ('{"sql": 1}', "request must have 'sql' string"),
+    ('{"sql": "select * from t;", "params": 1}', "'params' must be a list"),
+    ('{"sql": "show tables; show tables;"}', "request must have exactly one statement"),
+])
+def test_protocol_errors(server_path, line, error):
+    with Client(path=server_path) as client:
+        assert request(client, line) == {"ok": False, "error": f"Request has failed: {error}"}
@@ -0,0 +1,106 @@
+from datetime import date
+import pytest
+from src import Exceptions, Statistics
+from src.Statistics import DistinctSketch, TableStatistics
+
+
+def test_distinct_sketch_is_exact_for_few_values():
+    sketch = DistinctSketch(k=16)
+    for value in [1, 2, 2, "a", "a", date(2024, 1, 1), 3]:
+        sketch.add(value)
+    assert sketch.estimate() == 5
+
+
+def test_distinct_sketch_estimate():
+    sketch = DistinctSketch()
+    for i in range(50000):
+        sketch.add(i % 20000)
+    assert abs(sketch.estimate() - 20000) < 20000 * 0.1
+    assert DistinctSketch._hash("abc") == DistinctSketch._hash("abc")
+
+
+@pytest.fixture
+def analyzed(database, tmp_path):
+    path = tmp_path / "t.csv"
+    path.write_text("".join(f"{i},{'' if i % 4 == 0 else i % 10},2024-01-{i % 28 + 1:02},x{i % 3}\n" for i in range(1000)))
+    database.script(
+        "create table t (id int, v int, d date, s char(3), primary key (id));",
+        f"load data '{path}' into table t;",
+    )
+    assert database.execute("analyze t;") == "DB_TEST> 'T' table is analyzed\n"
+    return database
+
+
+def test_analyze_stores_statistics(analyzed):
+    analyzed.reopen()
+    statistics = analyzed.db_handler.get_table_metadata("T").statistics
+    assert statistics.row_count == 1000
+    v = statistics.column("T.V")
+    assert (v.distinct, v.null_fraction) == (10, 0.25)
+    assert (v.bounds[0], v.bounds[-1]) == (0, 9)
+    d = statistics.column("T.D")
+    assert (d.bounds[0], d.bounds[-1]) == (date(2024, 1, 1), date(2024, 1, 28))
+    assert statistics.column("T.S").distinct == 3
+    assert len(statistics.scan_keys) == Statistics.SCAN_KEYS
+    assert all(analyzed.db_handler.table_get("T", key) is not None for key in statistics.scan_keys)
+
+
+@pytest.mark.parametrize("condition, expected", [
+    (("compare", "=", ("column", "T.V"), ("value", 3)), 0.75 / 10),
+    (("compare", "<", ("column", "T.ID"), ("value", 500)), 0.5),
+    (("compare", ">=", ("value", 500), ("column", "T.ID")), 0.5),
+    (("compare", "=", ("column", "T.V"), ("value", 100)), 0.0),
+    (("null", "T.V", False), 0.25),
+    (("not", ("null", "T.V", False)), 0.75),
+    (("compare", "=", ("column", "T.V"), ("value", None)), 0.0),
+    (("compare", "<", ("column", "T.S"), ("value", "x1")), Statistics.DEFAULT_SELECTIVITY),
+    (("true",), 1.0),
+])
+def test_selectivity(analyzed, condition, expected):
+    statistics = analyzed.db_handler.get_table_metadata("T").statistics
+    assert statistics.selectivity(condition) == pytest.approx(expected, abs=0.05)
+
+
+def test_statistics_of_earlier_version_have_no_scan_keys(analyzed):
+    meta = analyzed.db_handler.get_table_metadata("T")
+    stored = meta.to_metadata()["statistics"]
+    del stored["scan_keys"]
+    assert TableStatistics(meta, stored).scan_keys == []
+
+
+def test_analyze_empty_table(database):
+    database.execute("create table e (a int);")
+    database.execute("analyze e;")
+    statistics = database.db_handler.get_table_metadata("E").statistics
+    assert statistics.row_count == 0 and statistics.column("E.A").bounds is None
+    assert statistics.selectivity(("compare", "=", ("column", "E.A"), ("value", 1))) == 0.0
+
+
+def test_join_order_uses_statistics(database, tmp_path):
+    path = tmp_path / "big.csv"
+    path.write_text("".join(f"{i},{i % 10}\n" for i in range(500)))
+    database.script(
+        "create table big (id int, s int);",
+        "create table small (id int, k int);",
+        f"load data '{path}' into table big;",
+        "insert into small values (1, 1), (2, 2), (3, 3);",
+    )
+    query = "select small.k, big.s from big, small where big.id = small.id and small.k > 1;"
+    assert "-> Hash Join: BIG.ID = SMALL.ID\n    -> Table Scan on BIG" in database.execute("explain " + query)
+    database.execute("analyze;")
+    assert "-> Hash Join: SMALL.ID = BIG.ID\n    -> Filter: SMALL.K > 1" in database.execute("explain " + query)
+    # 테이블 순서가 바뀌어도 선택한 컬럼 순서는 그대로다.
+    assert database.select(query) == [(2, 2), (3, 3)]
+
+
+def test_analyze_errors(database):
+    with pytest.raises(Exceptions.NoSuchTable):
+        database.execute("analyze nothing;")
+
+
+def test_analyze_as_name(database):
+    database.script("create table analyze (analyze int);", "insert into analyze values (1), (2);")
+    database.reopen()
+    assert database.execute("analyze analyze;") == "DB_TEST> 'ANALYZE' table is analyzed\n"
+    assert database.db_handler.get_table_metadata("ANALYZE").statistics.row_count == 2
+    assert database.select("select analyze from analyze where analyze.analyze = 2;") == [(2,)]
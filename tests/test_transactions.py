@@ -0,0 +1,139 @@
+import threading
+import pytest
+from berkeleydb import db
+from src import Exceptions
+
+
+@pytest.fixture
+def table(database):
+    database.script(
+        "create table t (id int, v int, primary key (id));",
+        "insert into t values (1, 10), (2, 20);",
+    )
+    return database
+
+
+def ids(database):
+    return sorted(record[0] for record in database.select("select id from t;"))
+
+
+def test_commit(table):
+    assert table.execute("begin;") == "DB_TEST> transaction is started\n"
+    table.execute("insert into t values (3, 30);")
+    table.execute("delete from t where id = 1;")
+    assert table.execute("commit;") == "DB_TEST> transaction is committed\n"
+    table.reopen()
+    assert ids(table) == [2, 3]
+
+
+def test_rollback(table):
+    table.execute("begin;")
+    table.execute("insert into t values (3, 30);")
+    table.execute("update t set v = 0;")
+    table.execute("delete from t where id = 1;")
+    assert ids(table) == [2, 3]
+    assert table.execute("rollback;") == "DB_TEST> transaction is rolled back\n"
+    assert sorted(table.select("select * from t;")) == [(1, 10), (2, 20)]
+
+
+def test_failed_statement_keeps_transaction(table):
+    table.execute("begin;")
+    table.execute("insert into t values (3, 30);")
+    with pytest.raises(Exceptions.InsertDuplicatePrimaryKeyError):
+        table.execute("insert into t values (4, 40), (1, 10);")
+    assert ids(table) == [1, 2, 3]
+    table.execute("commit;")
+    assert ids(table) == [1, 2, 3]
+
+
+def test_failed_statement_is_rolled_back_without_transaction(table):
+    with pytest.raises(Exceptions.InsertDuplicatePrimaryKeyError):
+        table.execute("insert into t values (3, 30), (2, 20);")
+    assert ids(table) == [1, 2]
+
+
+def test_close_rolls_back_open_transaction(table):
+    table.execute("begin;")
+    table.execute("delete from t;")
+    table.reopen()
+    assert ids(table) == [1, 2]
+
+
+def test_ddl_commits_open_transaction(table):
+    table.execute("begin;")
+    table.execute("insert into t values (3, 30);")
+    table.execute("create table u (a int);")
+    with pytest.raises(Exceptions.NoTransactionError):
+        table.execute("rollback;")
+    assert ids(table) == [1, 2, 3]
+
+
+def test_transaction_errors(table):
+    with pytest.raises(Exceptions.NoTransactionError, match="Commit"):
+        table.execute("commit;")
+    with pytest.raises(Exceptions.NoTransactionError, match="Rollback"):
+        table.execute("rollback;")
+    table.execute("begin;")
+    with pytest.raises(Exceptions.TransactionInProgressError):
+        table.execute("begin;")
+
+
+def test_transaction_keywords_as_names(database):
+    database.script("create table commit (begin int, rollback int);", "insert into commit values (1, 2);")
+    database.reopen()
+    database.execute("begin;")
+    database.execute("delete from commit where begin = 1;")
+    database.execute("rollback;")
+    assert database.select("select commit.rollback from commit where begin = 1;") == [(2,)]
+
+
+@pytest.mark.parametrize("mode, write_no_sync, no_sync", [
+    ("sync", 0, 0), ("write_no_sync", 1, 0), ("group", 0, 1),
+])
+def test_durability_modes(database, mode, write_no_sync, no_sync):
+    database.db_handler.set_durability(mode)
+    flags = database.db_handler.env.flags
+    assert (flags[db.DB_TXN_WRITE_NOSYNC], flags[db.DB_TXN_NOSYNC]) == (write_no_sync, no_sync)
+
+
+def test_unknown_durability_mode(database):
+    with pytest.raises(ValueError):
+        database.db_handler.set_durability("never")
+
+
+def test_group_commit_flushes_log_on_interval(table, monkeypatch):
+    handler = table.db_handler
+    flushes = []
+    monkeypatch.setattr(handler.env, "log_flush", lambda: flushes.append(1), raising=False)
+
+    handler.set_durability("group", 3600)
+    for i in range(3, 10):
+        table.execute(f"insert into t values ({i}, 0);")
+    assert flushes == []
+
+    handler.group_commit_interval = 0
+    table.execute("begin;")
+    table.execute("insert into t values (10, 0);")
+    assert flushes == []
+    table.execute("commit;")
+    assert len(flushes) == 1
+
+    # group 방식을 끝낼 때 기록되지 않은 COMMIT들을 기록한다.
+    handler.group_commit_interval = 3600
+    table.execute("insert into t values (11, 0);")
+    handler.set_durability("sync")
+    assert len(flushes) == 2
+
+
+def test_group_commit_flushes_log_without_later_commit(table, monkeypatch):
+    handler = table.db_handler
+    flushed = threading.Event()
+    monkeypatch.setattr(handler.env, "log_flush", flushed.set, raising=False)
+
+    handler.set_durability("group", 0.2)
+    flushed.clear()
+    table.execute("insert into t values (3, 0);")
+    assert not flushed.is_set()
+    # 뒤따르는 COMMIT이 없어도 interval이 지나면 타이머가 기록한다.
+    assert flushed.wait(5)
+    assert handler._flush_timer is None
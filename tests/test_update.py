@@ -0,0 +1,59 @@
+from datetime import date
+import pytest
+from src import Exceptions
+
+
+@pytest.fixture
+def table(database):
+    database.script(
+        "create table t (id int, name char(3) not null, d date, primary key (id));",
+        "insert into t values (1, 'a', 2024-01-01), (2, 'b', null), (3, 'c', 2024-03-01);",
+    )
+    return database
+
+
+def rows(database):
+    return sorted(database.select("select * from t;"))
+
+
+def test_update_with_where(table):
+    assert table.execute("update t set name = 'xyzw', d = null where id >= 2;") == "DB_TEST> 2 rows updated\n"
+    assert rows(table) == [(1, "a", date(2024, 1, 1)), (2, "xyz", None), (3, "xyz", None)]
+    assert table.execute("update t set d = 2025-01-01 where id = 9;") == "DB_TEST> 0 rows updated\n"
+
+
+def test_update_every_record_without_reading_whole_table(table, monkeypatch):
+    monkeypatch.setattr(table.db_handler, "table_get_all", None)
+    assert table.execute("update t set d = 2025-05-05;") == "DB_TEST> 3 rows updated\n"
+    assert {record[2] for record in rows(table)} == {date(2025, 5, 5)}
+
+
+def test_update_primary_key(table):
+    # primary key가 바뀐 레코드는 새 키로 옮겨지고 다시 방문하지 않는다.
+    assert table.execute("update t set id = 10 where id = 1;") == "DB_TEST> 1 row updated\n"
+    assert rows(table) == [(2, "b", None), (3, "c", date(2024, 3, 1)), (10, "a", date(2024, 1, 1))]
+    assert table.select("select name from t where id = 10;") == [("a",)]
+    assert table.select("select name from t where id = 1;") == []
+
+
+@pytest.mark.parametrize("sql, error", [
+    ("update t set id = 3 where id = 1;", Exceptions.UpdateDuplicatePrimaryKeyError),
+    ("update t set id = 5;", Exceptions.UpdateDuplicatePrimaryKeyError),
+    ("update t set name = null where id = 1;", Exceptions.UpdateColumnNonNullableError),
+    ("update t set id = 'x' where id = 1;", Exceptions.UpdateTypeMismatchError),
+    ("update t set d = 3 where id = 1;", Exceptions.UpdateTypeMismatchError),
+    ("update t set nothing = 1;", Exceptions.UpdateColumnExistenceError),
+    ("update t set id = 1, id = 2;", Exceptions.DuplicatedColumnNameError),
+    ("update u set id = 1;", Exceptions.NoSuchTable),
+])
+def test_update_errors_change_nothing(table, sql, error):
+    before = rows(table)
+    with pytest.raises(error):
+        table.execute(sql)
+    assert rows(table) == before
+
+
+def test_update_with_parameters(table):
+    table.execute("prepare rename as update t set name = ? where id = ?;")
+    table.execute("execute rename ('q', 2);")
+    assert table.select("select name from t where id = 2;") == [("q",)]